@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AttendanceRecord, AttendanceEmailLog
+from .models import AttendanceRecord, AttendanceEmailLog, AttendanceDailyRollup
 
 
 @admin.register(AttendanceRecord)
@@ -17,3 +17,11 @@ class AttendanceEmailLogAdmin(admin.ModelAdmin):
     list_filter = ['email_type', 'status', 'sent_at']
     search_fields = ['employee__username', 'recipient_email']
     readonly_fields = ['sent_at']
+
+
+@admin.register(AttendanceDailyRollup)
+class AttendanceDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'department', 'role', 'total', 'present', 'late', 'absent', 'half_day', 'checked_out']
+    list_filter = ['role', 'department', 'date']
+    readonly_fields = ['updated_at']
+    date_hierarchy = 'date'
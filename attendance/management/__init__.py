@@ -0,0 +1 @@
+# This file is required for Python to treat this directory as a package
@@ -0,0 +1,105 @@
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from attendance.models import AttendanceRecord
+from attendance.tasks import employees_without_checkin, send_morning_checkin_reminder_chunk
+from holidays.workdays import default_region, get_calendar
+from notifications.fanout import id_ranges
+from users.models import UserRole
+
+
+class Command(BaseCommand):
+    help = 'Show that each morning check-in reminder chunk reads with a fixed number of queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[100, 1000, 5000],
+            help='Headcounts to measure',
+        )
+        parser.add_argument(
+            '--checked-in', type=float, default=0.7,
+            help='Fraction of employees who have already checked in',
+        )
+
+    def handle(self, *args, **options):
+        day = self._working_day()
+        if day != date.today():
+            self.stdout.write(f"Today is not a working day; measuring reminders for {day}.")
+        self.stdout.write(
+            f"{'employees':>10} {'reminders':>10} {'chunks':>7} {'selects':>8} {'queries':>8} "
+            f"{'selects/chunk':>14} {'seconds':>8}"
+        )
+        for size in options['sizes']:
+            row = self._measure(size, options['checked_in'], day)
+            self.stdout.write(
+                f"{row['employees']:>10} {row['reminders']:>10} {row['chunks']:>7} {row['selects']:>8} "
+                f"{row['queries']:>8} {row['per_chunk']:>14} {row['seconds']:>8.2f}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Each chunk (up to EMAIL_FANOUT_CHUNK_SIZE employees) reads with the same number of SELECTs; '
+            'its writes are bulk statements, one set per email batch.'
+        ))
+
+    def _working_day(self):
+        """Today, or the last working day before it: reminders only go out on working days"""
+        calendar = get_calendar()
+        day = date.today()
+        for _ in range(366):
+            if calendar.is_working_day(day):
+                return day
+            day -= timedelta(days=1)
+        raise CommandError(f"The '{default_region()}' holiday calendar has no working day in the past year.")
+
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def _measure(self, size, checked_in, day):
+        # Everything is seeded and measured inside a transaction that is
+        # rolled back, so the command is safe to run against a real database.
+        with transaction.atomic():
+            employees = self._seed(size, checked_in, day)
+            mail.outbox = []
+            ranges = id_ranges(employees_without_checkin(day))
+            # Chunks are run one by one, as workers would, rather than through
+            # the coordinator, so each one's queries can be told apart
+            total = elapsed = 0
+            selects = []
+            for first, last in ranges:
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    send_morning_checkin_reminder_chunk(first, last, day.isoformat())
+                    elapsed += time.perf_counter() - started
+                total += len(queries)
+                selects.append(sum(
+                    1 for q in queries.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')
+                ))
+            transaction.set_rollback(True)
+
+        return {
+            'employees': len(employees),
+            'reminders': len(mail.outbox),
+            'chunks': len(ranges),
+            'selects': sum(selects),
+            'queries': total,
+            'per_chunk': max(selects, default=0),
+            'seconds': elapsed,
+        }
+
+    def _seed(self, size, checked_in, day):
+        prefix = f'bench{size}_'
+        users = User.objects.bulk_create(
+            User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password='!')
+            for i in range(size)
+        )
+        UserRole.objects.bulk_create(UserRole(user=user, role='employee') for user in users)
+        now = timezone.now()
+        AttendanceRecord.objects.bulk_create(
+            AttendanceRecord(employee=user, attendance_date=day, check_in_time=now, status='present')
+            for user in users[:int(size * checked_in)]
+        )
+        return users
@@ -0,0 +1,35 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from attendance.models import AttendanceRecord
+from attendance.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute daily attendance rollups from raw attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First date to rebuild (default: earliest record)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last date to rebuild (default: latest record)')
+        parser.add_argument('--window', type=int, default=31, help='Days rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        bounds = AttendanceRecord.objects.aggregate(first=Min('attendance_date'), last=Max('attendance_date'))
+        start = options['start'] or bounds['first']
+        end = options['end'] or bounds['last']
+        if start is None or end is None:
+            self.stdout.write('No attendance records to roll up.')
+            return
+        if start > end:
+            raise CommandError('--start must not be after --end')
+
+        # Rebuild in windows so a multi-year backfill never holds one huge transaction
+        written = 0
+        window_start = start
+        while window_start <= end:
+            window_end = min(window_start + timedelta(days=options['window'] - 1), end)
+            written += rebuild(window_start, window_end)
+            window_start = window_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {written} rollup rows for {start} to {end}'))
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:01
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_rollups(apps, schema_editor):
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    AttendanceDailyRollup = apps.get_model('attendance', 'AttendanceDailyRollup')
+    statuses = ('present', 'late', 'absent', 'half_day')
+    grouped = (
+        AttendanceRecord.objects
+        .order_by()
+        .values(
+            'attendance_date',
+            group_department=Coalesce('employee__role_profile__department', Value('')),
+            group_role=Coalesce('employee__role_profile__role', Value('')),
+        )
+        .annotate(
+            total=Count('id'),
+            checked_out=Count('id', filter=Q(check_out_time__isnull=False)),
+            **{status: Count('id', filter=Q(status=status)) for status in statuses},
+        )
+    )
+    AttendanceDailyRollup.objects.bulk_create(
+        (
+            AttendanceDailyRollup(
+                date=row['attendance_date'],
+                department=row['group_department'],
+                role=row['group_role'],
+                total=row['total'],
+                checked_out=row['checked_out'],
+                **{status: row[status] for status in statuses},
+            )
+            for row in grouped.iterator()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('department', models.CharField(blank=True, max_length=100)),
+                ('role', models.CharField(blank=True, max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('half_day', models.PositiveIntegerField(default=0)),
+                ('checked_out', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Attendance Daily Rollups',
+                'ordering': ['-date', 'department', 'role'],
+                'unique_together': {('date', 'department', 'role')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:07
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendanceemaillog_attendance_log_sent_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='attendance_date',
+            field=models.DateField(default=datetime.date.today),
+        ),
+    ]
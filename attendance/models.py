@@ -1,7 +1,20 @@
 from django.db import models
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.utils import timezone
-from datetime import date
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+
+def attendance_timezone():
+    """Timezone in which office hours (e.g. the late threshold) are defined"""
+    return ZoneInfo(getattr(settings, 'ATTENDANCE_TIME_ZONE', settings.TIME_ZONE))
+
+
+def late_threshold(day):
+    """Aware datetime from which a check-in on ``day`` counts as late"""
+    hour, minute = map(int, getattr(settings, 'ATTENDANCE_LATE_THRESHOLD', '09:30').split(':'))
+    return datetime.combine(day, time(hour, minute), tzinfo=attendance_timezone())
 
 
 class AttendanceRecord(models.Model):
@@ -14,7 +27,7 @@ class AttendanceRecord(models.Model):
     ]
     
     employee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_records')
-    attendance_date = models.DateField(auto_now_add=True)
+    attendance_date = models.DateField(default=date.today)
     check_in_time = models.DateTimeField(null=True, blank=True)
     check_out_time = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='absent')
@@ -28,13 +41,18 @@ class AttendanceRecord(models.Model):
     class Meta:
         unique_together = ('employee', 'attendance_date')
         ordering = ['-attendance_date']
+        indexes = [
+            models.Index(fields=['attendance_date', 'status'], name='attendance_date_status_idx'),
+            # Keyset pagination order for the attendance report
+            models.Index(fields=['-attendance_date', '-id'], name='attendance_date_id_idx'),
+        ]
         verbose_name_plural = "Attendance Records"
     
     def is_late(self):
-        """Check if check-in is after 9:00 AM"""
+        """Check if check-in is at or after the late threshold (9:30 AM by default)"""
         if self.check_in_time:
-            late_hour = self.check_in_time.hour == 9 and self.check_in_time.minute >= 30
-            return self.check_in_time.hour > 9 or late_hour
+            local_day = timezone.localtime(self.check_in_time, attendance_timezone()).date()
+            return self.check_in_time >= late_threshold(local_day)
         return False
     
     def is_missing_checkout(self):
@@ -63,4 +81,29 @@ class AttendanceEmailLog(models.Model):
     
     class Meta:
         ordering = ['-sent_at']
+        indexes = [
+            models.Index(fields=['sent_at', 'status'], name='attendance_log_sent_idx'),
+        ]
         verbose_name_plural = "Attendance Email Logs"
+
+
+class AttendanceDailyRollup(models.Model):
+    """Per-day attendance counts for one department and role, kept in step with AttendanceRecord"""
+    date = models.DateField()
+    department = models.CharField(max_length=100, blank=True)
+    role = models.CharField(max_length=20, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    half_day = models.PositiveIntegerField(default=0)
+    checked_out = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.date} - {self.department or 'No department'} ({self.role})"
+    
+    class Meta:
+        unique_together = ('date', 'department', 'role')
+        ordering = ['-date', 'department', 'role']
+        verbose_name_plural = "Attendance Daily Rollups"
@@ -0,0 +1,121 @@
+"""
+Daily attendance rollups.
+
+``AttendanceDailyRollup`` holds one row of status counts per date,
+department and role. Check-in/check-out apply small deltas with ``bump`` so
+summaries stay current without touching raw records; ``rebuild`` recomputes
+a date range from ``AttendanceRecord`` and is what the nightly reconcile
+task uses to repair drift (admin edits, department changes, lost updates).
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import AttendanceDailyRollup, AttendanceRecord
+
+STATUSES = ('present', 'late', 'absent', 'half_day')
+COUNT_FIELDS = ('total',) + STATUSES + ('checked_out',)
+
+
+def _group(employee):
+    role_profile = getattr(employee, 'role_profile', None)
+    if role_profile is None:
+        return '', ''
+    return role_profile.department, role_profile.role
+
+
+def bump(day, employee, **deltas):
+    """Add ``deltas`` (e.g. ``present=1, absent=-1``) to the employee's rollup row for ``day``"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    department, role = _group(employee)
+    with transaction.atomic():
+        AttendanceDailyRollup.objects.bulk_create(
+            [AttendanceDailyRollup(date=day, department=department, role=role)],
+            ignore_conflicts=True,
+        )
+        AttendanceDailyRollup.objects.filter(date=day, department=department, role=role).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+
+
+def record_check_in(record, previous_status=None):
+    """Count a check-in; ``previous_status`` is set when the record already existed"""
+    deltas = {record.status: 1}
+    if previous_status is None:
+        deltas['total'] = 1
+    else:
+        deltas[previous_status] = deltas.get(previous_status, 0) - 1
+    bump(record.attendance_date, record.employee, **deltas)
+
+
+def record_check_out(record):
+    """Count a check-out"""
+    bump(record.attendance_date, record.employee, checked_out=1)
+
+
+def rebuild(start, end):
+    """Recompute rollups for ``start``..``end`` (inclusive) from raw records; return rows written"""
+    grouped = (
+        AttendanceRecord.objects
+        .filter(attendance_date__range=(start, end))
+        .order_by()
+        .values(
+            'attendance_date',
+            group_department=Coalesce('employee__role_profile__department', Value('')),
+            group_role=Coalesce('employee__role_profile__role', Value('')),
+        )
+        .annotate(
+            total=Count('id'),
+            checked_out=Count('id', filter=Q(check_out_time__isnull=False)),
+            **{status: Count('id', filter=Q(status=status)) for status in STATUSES},
+        )
+    )
+    rollups = [
+        AttendanceDailyRollup(
+            date=row['attendance_date'],
+            department=row['group_department'],
+            role=row['group_role'],
+            **{field: row[field] for field in COUNT_FIELDS},
+        )
+        for row in grouped
+    ]
+    with transaction.atomic():
+        AttendanceDailyRollup.objects.filter(date__range=(start, end)).delete()
+        AttendanceDailyRollup.objects.bulk_create(rollups, batch_size=500)
+    return len(rollups)
+
+
+def _period_stats(queryset, aggregates, periods):
+    totals = queryset.aggregate(**aggregates)
+    return {
+        name: {field: totals[f'{name}_{field}'] for field in ('total',) + STATUSES}
+        for name in periods
+    }
+
+
+def summarize(rollups, **periods):
+    """
+    Sum status counts over ``rollups`` for each named period in one query.
+
+    ``periods`` maps a name to its first date, e.g. ``month=month_start``;
+    returns ``{name: {'total': .., 'present': .., ...}}``.
+    """
+    aggregates = {
+        f'{name}_{field}': Coalesce(Sum(field, filter=Q(date__gte=since)), 0)
+        for name, since in periods.items()
+        for field in ('total',) + STATUSES
+    }
+    return _period_stats(rollups, aggregates, periods)
+
+
+def count_records(records, **periods):
+    """Same shape as ``summarize``, counted from raw ``AttendanceRecord`` rows"""
+    aggregates = {}
+    for name, since in periods.items():
+        in_period = Q(attendance_date__gte=since)
+        aggregates[f'{name}_total'] = Count('id', filter=in_period)
+        for status in STATUSES:
+            aggregates[f'{name}_{status}'] = Count('id', filter=in_period & Q(status=status))
+    return _period_stats(records, aggregates, periods)
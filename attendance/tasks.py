@@ -1,63 +1,120 @@
 from celery import shared_task
-from django.core.mail import send_mail, EmailMessage
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db.models import Count, Exists, OuterRef, Q
 from django.utils import timezone
-from django.template.loader import render_to_string
+from django.utils.dateformat import time_format
+from collections import defaultdict
 from datetime import date, timedelta
-from .models import AttendanceRecord, AttendanceEmailLog
+from .models import AttendanceRecord, AttendanceEmailLog, late_threshold
 from users.models import UserRole, EmployeeProfile
+from holidays.workdays import is_working_day
+from . import rollups
+from notifications.delivery import EmailBatch, build_email, html_email
+from notifications.fanout import fan_out
+from notifications.idempotency import Claim, notification_key, run_token
+from notifications.logbuffer import write_log
+from notifications.rendering import Broadcast, render
+
+
+def _reminder_chunk_size():
+    return getattr(settings, 'ATTENDANCE_REMINDER_CHUNK_SIZE', 2000)
+
+
+def employees_without_checkin(day):
+    """Employees with no check-in on ``day``, as a single anti-join query"""
+    checked_in = AttendanceRecord.objects.filter(
+        employee=OuterRef('pk'),
+        attendance_date=day,
+        check_in_time__isnull=False
+    )
+    return (
+        User.objects.filter(role_profile__role='employee')
+        .exclude(Exists(checked_in))
+        .only('id', 'username', 'first_name', 'last_name', 'email')
+        .order_by('id')
+    )
+
+
+def checkouts_missing(day):
+    """Records checked in on ``day`` but not checked out"""
+    return AttendanceRecord.objects.filter(
+        attendance_date=day,
+        check_in_time__isnull=False,
+        check_out_time__isnull=True
+    )
 
 
 @shared_task
 def send_morning_checkin_reminder():
     """Send morning reminder at 9:00 AM to employees who haven't checked in"""
     today = date.today()
+    if not is_working_day(today):
+        # Nobody is absent on a weekend or public holiday
+        return {'chunks': 0}
+    return fan_out(send_morning_checkin_reminder_chunk, employees_without_checkin(today), today.isoformat())
+
+
+@shared_task(bind=True)
+def send_morning_checkin_reminder_chunk(self, first_id, last_id, day):
+    """Morning reminders for one range of employee ids"""
+    employees = employees_without_checkin(date.fromisoformat(day)).filter(id__range=(first_id, last_id))
+    by_key = {
+        notification_key('morning_reminder', employee.id, day): employee
+        for employee in employees.iterator(chunk_size=_reminder_chunk_size())
+    }
     
-    # fet all active employees
-    employees = User.objects.filter(role_profile__role='employee')
+    reminder = Broadcast('emails/checkin_reminder.html', fields=['employee_name'])
     
-    for employee in employees:
-        # check if employee has checked in today
-        has_checkin = AttendanceRecord.objects.filter(
-            employee=employee,
-            attendance_date=today,
-            check_in_time__isnull=False
-        ).exists()
-        
-        if not has_checkin:
-            send_checkin_reminder_email(employee)
+    # only keys no other run has claimed or sent today
+    with Claim(by_key, run_token(self)) as claim, EmailBatch(claim=claim) as batch:
+        for key in claim:
+            send_checkin_reminder_email(by_key[key], batch, reminder, key=key)
+    return {'sent': batch.sent, 'failed': batch.failed}
 
 
-@shared_task
-def send_late_checkin_alert():
+@shared_task(bind=True)
+def send_late_checkin_alert(self):
     """Send late check-in alert at 9:30 AM"""
     today = date.today()
+    if not is_working_day(today):
+        return
     
-    # get all late check in
+    # get only the late check ins, with employee and manager in the same query
     late_checkins = AttendanceRecord.objects.filter(
         attendance_date=today,
-        check_in_time__isnull=False
-    ).exclude(check_in_time__hour=8)  
+        check_in_time__gte=late_threshold(today)
+    ).select_related('employee', 'employee__role_profile__manager')
+    by_key = {notification_key('late_alert', record.employee_id, today): record for record in late_checkins}
     
-    for record in late_checkins:
-        if record.is_late():
-            send_late_checkin_email(record)
+    with Claim(by_key, run_token(self)) as claim, EmailBatch(claim=claim) as batch:
+        for key in claim:
+            send_late_checkin_email(by_key[key], batch, key=key)
+
 
-  # get all employees with check-in but no checkouts
 @shared_task
 def send_missing_checkout_reminder():
     """Send missing check-out reminder at 6:00 PM"""
     today = date.today()
+    if not is_working_day(today):
+        return {'chunks': 0}
+    return fan_out(send_missing_checkout_reminder_chunk, checkouts_missing(today), today.isoformat())
+
+
+@shared_task(bind=True)
+def send_missing_checkout_reminder_chunk(self, first_id, last_id, day):
+    """Check-out reminders for one range of attendance record ids"""
+    missing_checkouts = checkouts_missing(date.fromisoformat(day)).filter(
+        id__range=(first_id, last_id)
+    ).select_related('employee')
+    by_key = {notification_key('checkout_reminder', record.employee_id, day): record for record in missing_checkouts}
     
-  
-    missing_checkouts = AttendanceRecord.objects.filter(
-        attendance_date=today,
-        check_in_time__isnull=False,
-        check_out_time__isnull=True
-    )
+    reminder = Broadcast('emails/checkout_reminder.html', fields=['employee_name', 'check_in_time'])
     
-    for record in missing_checkouts:
-        send_checkout_reminder_email(record)
+    with Claim(by_key, run_token(self)) as claim, EmailBatch(claim=claim) as batch:
+        for key in claim:
+            send_checkout_reminder_email(by_key[key], batch, reminder, key=key)
+    return {'sent': batch.sent, 'failed': batch.failed}
 
 
 @shared_task
@@ -67,25 +124,27 @@ def send_weekly_attendance_report():
     week_start = today - timedelta(days=today.weekday())
     week_end = week_start + timedelta(days=6)
     
-    # get all managers
-    managers = User.objects.filter(role_profile__role='manager')
+    # get the whole week's attendance for every managed employee in one query
+    attendance_records = AttendanceRecord.objects.filter(
+        attendance_date__gte=week_start,
+        attendance_date__lte=week_end,
+        employee__role_profile__role='employee',
+        employee__role_profile__manager__role_profile__role='manager'
+    ).select_related('employee', 'employee__role_profile__manager').order_by('-attendance_date')
+    
+    # group by manager in memory
+    managers = {}
+    records_by_manager = defaultdict(list)
+    for record in attendance_records:
+        manager = record.employee.role_profile.manager
+        managers[manager.id] = manager
+        records_by_manager[manager.id].append(record)
     
-    for manager in managers:
-        # get subordinates
-        subordinates = User.objects.filter(
-            role_profile__manager=manager,
-            role_profile__role='employee'
-        )
-        
-        # get attendance records for the week
-        attendance_records = AttendanceRecord.objects.filter(
-            employee__in=subordinates,
-            attendance_date__gte=week_start,
-            attendance_date__lte=week_end
-        ).order_by('-attendance_date')
-        
-        if manager.email and attendance_records.exists():
-            send_weekly_report_email(manager, attendance_records, week_start, week_end)
+    with EmailBatch() as batch:
+        for manager_id in sorted(records_by_manager):
+            manager = managers[manager_id]
+            if manager.email:
+                send_weekly_report_email(manager, records_by_manager[manager_id], week_start, week_end, batch)
 
 
 @shared_task
@@ -100,63 +159,76 @@ def send_monthly_attendance_report():
     else:
         month_end = date(today.year, today.month + 1, 1) - timedelta(days=1)
     
+    # get all employees' attendance records for the month
+    attendance_records = AttendanceRecord.objects.filter(
+        employee__role_profile__role='employee',
+        attendance_date__gte=month_start,
+        attendance_date__lte=month_end
+    )
+    
+    # calculate every statistic in a single query
+    stats = attendance_records.aggregate(
+        total_records=Count('id'),
+        present_count=Count('id', filter=Q(status='present')),
+        late_count=Count('id', filter=Q(status='late')),
+        absent_count=Count('id', filter=Q(status='absent')),
+    )
+    if not stats['total_records']:
+        return
+    
+    # the email only shows the latest 20 records
+    latest_records = list(
+        attendance_records.select_related('employee').order_by('-attendance_date')[:20]
+    )
+    
     # get all HR users
-    hr_users = User.objects.filter(role_profile__role='hr')
+    hr_users = User.objects.filter(role_profile__role='hr').exclude(email='')
     
-    for hr_user in hr_users:
-        # get all employees
-        employees = User.objects.filter(role_profile__role='employee')
-        
-        # get attendance records for the month
-        attendance_records = AttendanceRecord.objects.filter(
-            employee__in=employees,
-            attendance_date__gte=month_start,
-            attendance_date__lte=month_end
-        ).order_by('-attendance_date')
-        
-        if hr_user.email and attendance_records.exists():
-            send_monthly_report_email(hr_user, attendance_records, month_start, month_end)
+    with EmailBatch() as batch:
+        send_monthly_report_email(hr_users, latest_records, stats, month_start, month_end, batch)
+
+
+@shared_task
+def reconcile_attendance_rollups(days=None):
+    """Rebuild the last few days of attendance rollups from raw records at 1:00 AM"""
+    days = days or getattr(settings, 'ATTENDANCE_ROLLUP_RECONCILE_DAYS', 7)
+    today = date.today()
+    start = today - timedelta(days=days)
+    return rollups.rebuild(start, today)
 
 
 # Helper functions for sending emails
 
-def send_checkin_reminder_email(employee):
+def _log_email(employee, email_type, recipient_email, status='sent'):
+    write_log(AttendanceEmailLog(
+        employee=employee,
+        email_type=email_type,
+        recipient_email=recipient_email,
+        status=status
+    ))
+
+
+def _queue_email(batch, message, employee, email_type, key=None):
+    """Add message to the batch and log the outcome once it is delivered"""
+    recipient_email = ','.join(message.to)
+    batch.add(
+        message,
+        on_sent=lambda: _log_email(employee, email_type, recipient_email),
+        on_failed=lambda exc: _log_email(employee, email_type, recipient_email, status='failed'),
+        key=key,
+    )
+
+
+def send_checkin_reminder_email(employee, batch, reminder, key=None):
     """Send check-in reminder to employee"""
     subject = "Morning Check-in Reminder"
-    context = {
-        'employee_name': employee.get_full_name() or employee.username,
-    }
-    
-    html_message = render_to_string('emails/checkin_reminder.html', context)
+    html_message = reminder.render(employee_name=employee.get_full_name() or employee.username)
     
-    email = EmailMessage(
-        subject=subject,
-        body=html_message,
-        from_email='noreply@emailintegration.com',
-        to=[employee.email],
-    )
-    email.content_subtype = 'html'
-    
-    try:
-        email.send(fail_silently=False)
-        
-        # Log the email
-        AttendanceEmailLog.objects.create(
-            employee=employee,
-            email_type='morning_reminder',
-            recipient_email=employee.email,
-            status='sent'
-        )
-    except Exception as e:
-        AttendanceEmailLog.objects.create(
-            employee=employee,
-            email_type='morning_reminder',
-            recipient_email=employee.email,
-            status='failed'
-        )
-
-
-def send_late_checkin_email(record):
+    message = html_email(subject, html_message, [employee.email])
+    _queue_email(batch, message, employee, 'morning_reminder', key=key)
+
+
+def send_late_checkin_email(record, batch, key=None):
     """Send late check-in alert to employee and manager"""
     employee = record.employee
     manager = employee.role_profile.manager
@@ -167,78 +239,29 @@ def send_late_checkin_email(record):
         'check_in_time': record.check_in_time,
     }
     
-    html_message = render_to_string('emails/late_checkin_alert.html', context)
-    
     recipients = [employee.email]
     if manager and manager.email:
         recipients.append(manager.email)
     
-    email = EmailMessage(
-        subject=subject,
-        body=html_message,
-        from_email='noreply@emailintegration.com',
-        to=recipients,
-    )
-    email.content_subtype = 'html'
-    
-    try:
-        email.send(fail_silently=False)
-        
-        # Log the email
-        AttendanceEmailLog.objects.create(
-            employee=employee,
-            email_type='late_alert',
-            recipient_email=','.join(recipients),
-            status='sent'
-        )
-    except Exception as e:
-        AttendanceEmailLog.objects.create(
-            employee=employee,
-            email_type='late_alert',
-            recipient_email=','.join(recipients),
-            status='failed'
-        )
-
-
-def send_checkout_reminder_email(record):
+    message = build_email(subject, 'emails/late_checkin_alert.html', context, recipients)
+    _queue_email(batch, message, employee, 'late_alert', key=key)
+
+
+def send_checkout_reminder_email(record, batch, reminder, key=None):
     """Send check-out reminder to employee"""
     employee = record.employee
     
     subject = "Missing Check-out Reminder"
-    context = {
-        'employee_name': employee.get_full_name() or employee.username,
-        'check_in_time': record.check_in_time,
-    }
-    
-    html_message = render_to_string('emails/checkout_reminder.html', context)
-    
-    email = EmailMessage(
-        subject=subject,
-        body=html_message,
-        from_email='noreply@emailintegration.com',
-        to=[employee.email],
+    html_message = reminder.render(
+        employee_name=employee.get_full_name() or employee.username,
+        check_in_time=time_format(timezone.localtime(record.check_in_time), 'H:i:s'),
     )
-    email.content_subtype = 'html'
     
-    try:
-        email.send(fail_silently=False)
-        
-        AttendanceEmailLog.objects.create(
-            employee=employee,
-            email_type='checkout_reminder',
-            recipient_email=employee.email,
-            status='sent'
-        )
-    except Exception as e:
-        AttendanceEmailLog.objects.create(
-            employee=employee,
-            email_type='checkout_reminder',
-            recipient_email=employee.email,
-            status='failed'
-        )
-
-
-def send_weekly_report_email(manager, records, week_start, week_end):
+    message = html_email(subject, html_message, [employee.email])
+    _queue_email(batch, message, employee, 'checkout_reminder', key=key)
+
+
+def send_weekly_report_email(manager, records, week_start, week_end, batch):
     """Send weekly attendance report to manager"""
     subject = f"Weekly Attendance Report - {week_start} to {week_end}"
     context = {
@@ -248,78 +271,24 @@ def send_weekly_report_email(manager, records, week_start, week_end):
         'week_end': week_end,
     }
     
-    html_message = render_to_string('emails/weekly_report.html', context)
-    
-    email = EmailMessage(
-        subject=subject,
-        body=html_message,
-        from_email='noreply@emailintegration.com',
-        to=[manager.email],
-    )
-    email.content_subtype = 'html'
-    
-    try:
-        email.send(fail_silently=False)
-        
-        AttendanceEmailLog.objects.create(
-            employee=manager,
-            email_type='weekly_report',
-            recipient_email=manager.email,
-            status='sent'
-        )
-    except Exception as e:
-        AttendanceEmailLog.objects.create(
-            employee=manager,
-            email_type='weekly_report',
-            recipient_email=manager.email,
-            status='failed'
-        )
-
-
-def send_monthly_report_email(hr_user, records, month_start, month_end):
-    """Send monthly attendance report to HR"""
+    message = build_email(subject, 'emails/weekly_report.html', context, [manager.email])
+    _queue_email(batch, message, manager, 'weekly_report')
+
+
+def send_monthly_report_email(hr_users, records, stats, month_start, month_end, batch):
+    """Render the monthly attendance report once and send it to every HR user"""
     subject = f"Monthly Attendance Report - {month_start.strftime('%B %Y')}"
     
-    # Calculate statistics
-    total_records = records.count()
-    present_count = records.filter(status='present').count()
-    late_count = records.filter(status='late').count()
-    absent_count = records.filter(status='absent').count()
-    
     context = {
-        'hr_name': hr_user.get_full_name() or hr_user.username,
+        'hr_name': 'HR Team',
         'records': records,
         'month_start': month_start,
         'month_end': month_end,
-        'total_records': total_records,
-        'present_count': present_count,
-        'late_count': late_count,
-        'absent_count': absent_count,
+        **stats,
     }
     
-    html_message = render_to_string('emails/monthly_report.html', context)
-    
-    email = EmailMessage(
-        subject=subject,
-        body=html_message,
-        from_email='noreply@emailintegration.com',
-        to=[hr_user.email],
-    )
-    email.content_subtype = 'html'
+    html_message = render('emails/monthly_report.html', context)
     
-    try:
-        email.send(fail_silently=False)
-        
-        AttendanceEmailLog.objects.create(
-            employee=hr_user,
-            email_type='monthly_report',
-            recipient_email=hr_user.email,
-            status='sent'
-        )
-    except Exception as e:
-        AttendanceEmailLog.objects.create(
-            employee=hr_user,
-            email_type='monthly_report',
-            recipient_email=hr_user.email,
-            status='failed'
-        )
+    for hr_user in hr_users:
+        message = html_email(subject, html_message, [hr_user.email])
+        _queue_email(batch, message, hr_user, 'monthly_report')
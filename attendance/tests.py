@@ -1,3 +1,64 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from email_integration_system.pagination import KeysetPaginator
+from .models import AttendanceRecord
+
+MONDAY = date(2030, 6, 3)
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        # Several records share each date, so pages split on the id tiebreak
+        employees = [User.objects.create(username=f'emp{number}') for number in range(3)]
+        AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(employee=employee, attendance_date=MONDAY + timedelta(days=day), status='present')
+            for day in range(9) for employee in employees
+        ])
+        self.expected = list(AttendanceRecord.objects.order_by('-attendance_date', '-id').values_list('id', flat=True))
+        self.paginator = KeysetPaginator(AttendanceRecord.objects.all(), ('-attendance_date', '-id'), 10)
+
+    def ids(self, page):
+        return [record.id for record in page]
+
+    def test_next_cursors_walk_every_row_once(self):
+        page = self.paginator.get_page()
+        self.assertFalse(page.has_previous())
+        seen = self.ids(page)
+        while page.has_next():
+            page = self.paginator.get_page(page.next_cursor)
+            self.assertTrue(page.has_previous())
+            seen += self.ids(page)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(page), 7)
+
+    def test_previous_cursor_returns_the_page_before(self):
+        first = self.paginator.get_page()
+        second = self.paginator.get_page(first.next_cursor)
+        third = self.paginator.get_page(second.next_cursor)
+        self.assertEqual(self.ids(self.paginator.get_page(third.previous_cursor)), self.ids(second))
+        back = self.paginator.get_page(second.previous_cursor)
+        self.assertEqual(self.ids(back), self.expected[:10])
+        self.assertFalse(back.has_previous())
+
+    def test_last_cursor_returns_the_final_rows(self):
+        last = self.paginator.get_page(self.paginator.get_page().last_cursor)
+        self.assertEqual(self.ids(last), self.expected[-10:])
+        self.assertFalse(last.has_next())
+        self.assertTrue(last.has_previous())
+
+    def test_invalid_cursor_means_the_first_page(self):
+        for cursor in ('not-a-cursor', 'eyJkIjoic2lkZXdheXMiLCJ2IjpudWxsfQ'):
+            with self.subTest(cursor=cursor):
+                page = self.paginator.get_page(cursor)
+                self.assertEqual(self.ids(page), self.expected[:10])
+                self.assertFalse(page.has_previous())
+
+    def test_a_short_result_has_no_other_pages(self):
+        paginator = KeysetPaginator(AttendanceRecord.objects.filter(attendance_date=MONDAY), ('-attendance_date', '-id'), 10)
+        page = paginator.get_page()
+        self.assertEqual(len(page), 3)
+        self.assertFalse(page.has_other_pages())
+        self.assertIsNone(page.next_cursor)
@@ -1,10 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 from django.utils import timezone
 from datetime import date, timedelta
-from .models import AttendanceRecord
+from .models import AttendanceRecord, AttendanceDailyRollup
+from . import rollups
 from users.models import UserRole
+from email_integration_system.pagination import KeysetPaginator
 import json
 
 
@@ -26,22 +29,25 @@ def check_in(request):
         else:
             now = timezone.now()
             
-            if not attendance:
-                attendance = AttendanceRecord.objects.create(
-                    employee=user,
-                    attendance_date=today,
-                    check_in_time=now
-                )
-            else:
-                attendance.check_in_time = now
+            with transaction.atomic():
+                if not attendance:
+                    previous_status = None
+                    attendance = AttendanceRecord(
+                        employee=user,
+                        attendance_date=today,
+                        check_in_time=now
+                    )
+                else:
+                    previous_status = attendance.status
+                    attendance.check_in_time = now
+                
+                # Determine status
+                if attendance.is_late():
+                    attendance.status = 'late'
+                else:
+                    attendance.status = 'present'
                 attendance.save()
-            
-            # Determine status
-            if now.hour > 9 or (now.hour == 9 and now.minute >= 30):
-                attendance.status = 'late'
-            else:
-                attendance.status = 'present'
-            attendance.save()
+                rollups.record_check_in(attendance, previous_status)
             
             messages.success(request, f'Check-in recorded at {now.strftime("%H:%M:%S")}')
             return redirect('employee_dashboard')
@@ -73,7 +79,9 @@ def check_out(request):
         else:
             now = timezone.now()
             attendance.check_out_time = now
-            attendance.save()
+            with transaction.atomic():
+                attendance.save()
+                rollups.record_check_out(attendance)
             
             messages.success(request, f'Check-out recorded at {now.strftime("%H:%M:%S")}')
             return redirect('employee_dashboard')
@@ -125,11 +133,9 @@ def attendance_report(request):
     if to_date:
         records = records.filter(attendance_date__lte=to_date)
     
-    # Paginate
-    from django.core.paginator import Paginator
-    paginator = Paginator(records, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginate by (date, id) so later pages cost the same as the first
+    paginator = KeysetPaginator(records.select_related('employee'), ('-attendance_date', '-id'), 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'page_obj': page_obj,
@@ -151,58 +157,34 @@ def attendance_summary(request):
     year_start = today.replace(month=1, day=1)
     
     if role_profile.role == 'employee':
-        # Employee summary
-        month_records = AttendanceRecord.objects.filter(
-            employee=user,
-            attendance_date__gte=month_start
-        )
-        year_records = AttendanceRecord.objects.filter(
+        # Employee summary - a single employee's rows are cheap to count directly
+        records = AttendanceRecord.objects.filter(
             employee=user,
             attendance_date__gte=year_start
         )
-    elif role_profile.role == 'manager':
-        # Manager summary - show team members from same department
-        if role_profile.department:
-            team_members = UserRole.objects.filter(
+        stats = rollups.count_records(records, month=month_start, year=year_start)
+        month_stats, year_stats = stats['month'], stats['year']
+    elif role_profile.role in ('manager', 'hr'):
+        if role_profile.role == 'manager':
+            # Manager summary - show team members from same department
+            daily = AttendanceDailyRollup.objects.filter(
                 department=role_profile.department,
                 role='employee'
-            ).values_list('user', flat=True)
-            month_records = AttendanceRecord.objects.filter(
-                employee__in=team_members,
-                attendance_date__gte=month_start
-            )
-            year_records = AttendanceRecord.objects.filter(
-                employee__in=team_members,
-                attendance_date__gte=year_start
-            )
+            ) if role_profile.department else AttendanceDailyRollup.objects.none()
         else:
-            month_records = AttendanceRecord.objects.none()
-            year_records = AttendanceRecord.objects.none()
-    elif role_profile.role == 'hr':
-        # HR summary
-        month_records = AttendanceRecord.objects.filter(attendance_date__gte=month_start)
-        year_records = AttendanceRecord.objects.filter(attendance_date__gte=year_start)
+            # HR summary
+            daily = AttendanceDailyRollup.objects.all()
+        
+        stats = rollups.summarize(
+            daily.filter(date__gte=year_start),
+            month=month_start,
+            year=year_start
+        )
+        month_stats, year_stats = stats['month'], stats['year']
     else:
         messages.error(request, 'You are not authorized to view this page.')
         return redirect('profile')
     
-    # Calculate statistics
-    month_stats = {
-        'total': month_records.count(),
-        'present': month_records.filter(status='present').count(),
-        'late': month_records.filter(status='late').count(),
-        'absent': month_records.filter(status='absent').count(),
-        'half_day': month_records.filter(status='half_day').count(),
-    }
-    
-    year_stats = {
-        'total': year_records.count(),
-        'present': year_records.filter(status='present').count(),
-        'late': year_records.filter(status='late').count(),
-        'absent': year_records.filter(status='absent').count(),
-        'half_day': year_records.filter(status='half_day').count(),
-    }
-    
     context = {
         'month_stats': month_stats,
         'year_stats': year_stats,
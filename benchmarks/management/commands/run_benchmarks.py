@@ -0,0 +1,95 @@
+import io
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks.runner import benchmark_callable, compare, load_baseline, measure, save_baseline
+from benchmarks.suite import BENCHMARKS, prepare
+
+PREFIX = 'bench'
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic organization in a test database and benchmark every scheduled task and dashboard view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=300, help='Employees in the generated organization')
+        parser.add_argument('--years', type=int, default=1, help='Years of generated history')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark; the best is kept')
+        parser.add_argument('--only', nargs='+', metavar='NAME', help='Run only these benchmarks')
+        parser.add_argument(
+            '--baseline', default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'),
+            help='JSON baseline to compare against (and write with --update)',
+        )
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown before flagging')
+        parser.add_argument('--update', action='store_true', help='Write the results as the new baseline')
+
+    def handle(self, *args, **options):
+        selected = BENCHMARKS
+        if options['only']:
+            unknown = set(options['only']) - {name for name, _, _ in BENCHMARKS}
+            if unknown:
+                raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+            selected = [entry for entry in BENCHMARKS if entry[0] in options['only']]
+
+        meta = {
+            'employees': options['employees'],
+            'years': options['years'],
+            'database': connection.vendor,
+        }
+
+        # The test environment swaps in the locmem email backend and the
+        # test database keeps the real one untouched
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Seeding {options['employees']} employees, {options['years']} year(s) of history...")
+            call_command(
+                'generate_org', employees=options['employees'], years=options['years'],
+                prefix=PREFIX, stdout=io.StringIO(),
+            )
+            user = prepare(PREFIX)
+
+            results = {}
+            self.stdout.write(f"\n{'benchmark':<32} {'seconds':>8} {'queries':>8} {'peak KB':>8} {'emails':>7}")
+            for name, kind, target in selected:
+                result = measure(benchmark_callable(kind, target, user), repeat=options['repeat'])
+                results[name] = result
+                self.stdout.write(
+                    f"{name:<32} {result['seconds']:>8.3f} {result['queries']:>8} "
+                    f"{result['peak_kb']:>8} {result['emails']:>7}"
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['update']:
+            previous = load_baseline(options['baseline'])
+            if previous and previous['meta'] == meta and options['only']:
+                results = {**previous['results'], **results}
+            save_baseline(options['baseline'], dict(meta, recorded=datetime.now().isoformat(timespec='seconds')), results)
+            self.stdout.write(self.style.SUCCESS(f"\n✓ Baseline written to {options['baseline']}"))
+            return
+
+        baseline = load_baseline(options['baseline'])
+        if baseline is None:
+            self.stdout.write(self.style.WARNING('\nNo baseline yet; run again with --update to record one.'))
+            return
+        recorded = {key: value for key, value in baseline['meta'].items() if key != 'recorded'}
+        if recorded != meta:
+            self.stdout.write(self.style.WARNING(
+                f'\nBaseline was recorded with {recorded}, not {meta}; skipping comparison.'
+            ))
+            return
+
+        regressions = compare(results, baseline['results'], options['tolerance'])
+        if regressions:
+            for name, reasons in regressions.items():
+                self.stdout.write(self.style.ERROR(f"✗ {name}: {'; '.join(reasons)}"))
+            raise CommandError(f'{len(regressions)} benchmark(s) regressed against {options["baseline"]}')
+        self.stdout.write(self.style.SUCCESS(f'\n✓ No regressions against the baseline recorded {baseline["meta"].get("recorded")}'))
@@ -0,0 +1,128 @@
+"""
+Measure benchmarks and compare them with a saved baseline.
+
+Every run happens inside a transaction that is rolled back, so each
+benchmark (and each repeat) sees exactly the seeded data no matter what the
+previous one sent or flagged.
+"""
+import json
+import time
+import tracemalloc
+
+from django.core import mail
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+# Differences below these are noise, whatever the relative change
+MIN_SECONDS = 0.05
+MIN_PEAK_KB = 256
+
+
+class QueryCounter:
+    """
+    Count statements through an execute wrapper.
+
+    ``CaptureQueriesContext`` reads ``connection.queries``, which the test
+    client clears at the start of every request.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # The savepoints wrapped around each run are not the benchmark's
+        if not sql.startswith(('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _rolled_back(func):
+    with transaction.atomic():
+        mail.outbox = []
+        func()
+        transaction.set_rollback(True)
+
+
+def benchmark_callable(kind, target, user):
+    """Return a no-argument callable that runs one benchmark"""
+    if kind == 'task':
+        task = import_string(target)
+        return task
+
+    client = Client()
+    client.force_login(user)
+    url = reverse(target)
+
+    def fetch():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'GET {url} returned {response.status_code}')
+    return fetch
+
+
+def measure(func, repeat=1):
+    """Best wall time of ``repeat`` runs, plus query count, peak traced memory and emails sent"""
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        started = time.perf_counter()
+        _rolled_back(func)
+        timings = [time.perf_counter() - started]
+    emails = len(mail.outbox)
+
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        _rolled_back(func)
+        timings.append(time.perf_counter() - started)
+
+    # Memory gets its own run: tracing allocations slows everything down
+    tracemalloc.start()
+    try:
+        _rolled_back(func)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds': round(min(timings), 4),
+        'queries': queries.count,
+        'peak_kb': round(peak / 1024),
+        'emails': emails,
+    }
+
+
+def load_baseline(path):
+    try:
+        with open(path) as baseline:
+            return json.load(baseline)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, meta, results):
+    with open(path, 'w') as baseline:
+        json.dump({'meta': meta, 'results': results}, baseline, indent=2, sort_keys=True)
+        baseline.write('\n')
+
+
+def compare(results, baseline, tolerance):
+    """Return ``{name: [reason, ...]}`` for every benchmark that regressed"""
+    regressions = {}
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        reasons = []
+        # Query counts are deterministic for the same data, so any growth counts
+        if result['queries'] > previous['queries']:
+            reasons.append(f"queries {previous['queries']} → {result['queries']}")
+        if (result['seconds'] > previous['seconds'] * (1 + tolerance)
+                and result['seconds'] - previous['seconds'] > MIN_SECONDS):
+            reasons.append(f"time {previous['seconds']:.3f}s → {result['seconds']:.3f}s")
+        if (result['peak_kb'] > previous['peak_kb'] * (1 + tolerance)
+                and result['peak_kb'] - previous['peak_kb'] > MIN_PEAK_KB):
+            reasons.append(f"memory {previous['peak_kb']}KB → {result['peak_kb']}KB")
+        if reasons:
+            regressions[name] = reasons
+    return regressions
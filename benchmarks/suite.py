@@ -0,0 +1,124 @@
+"""
+What the benchmark suite runs.
+
+``prepare`` tops up a generated organization with today's activity so every
+task has work to do, and ``BENCHMARKS`` lists each scheduled task and
+dashboard view as a ``(name, kind, target)`` entry: ``kind`` is ``'task'``
+for a Celery task called in-process, or ``'view'`` for a URL fetched by the
+test client as an HR user.
+"""
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.models import User
+
+from attendance.models import AttendanceRecord, attendance_timezone
+from attendance.rollups import rebuild
+from holidays.models import HolidayCalendar
+from holidays.workdays import default_region
+from leave.models import LeaveRequest
+from notifications.models import OutboundEmail
+from onboarding.models import Onboarding
+from performance.models import PerformanceReview, PerformanceGoal
+
+BENCHMARKS = [
+    # attendance
+    ('send_morning_checkin_reminder', 'task', 'attendance.tasks.send_morning_checkin_reminder'),
+    ('send_late_checkin_alert', 'task', 'attendance.tasks.send_late_checkin_alert'),
+    ('send_missing_checkout_reminder', 'task', 'attendance.tasks.send_missing_checkout_reminder'),
+    ('send_weekly_attendance_report', 'task', 'attendance.tasks.send_weekly_attendance_report'),
+    ('send_monthly_attendance_report', 'task', 'attendance.tasks.send_monthly_attendance_report'),
+    ('reconcile_attendance_rollups', 'task', 'attendance.tasks.reconcile_attendance_rollups'),
+    # leave
+    ('send_leave_reminder_before', 'task', 'leave.tasks.send_leave_reminder_before'),
+    ('send_leave_reminder_after', 'task', 'leave.tasks.send_leave_reminder_after'),
+    # onboarding
+    ('send_day_3_checklist', 'task', 'onboarding.tasks.send_day_3_checklist'),
+    ('send_day_5_checklist', 'task', 'onboarding.tasks.send_day_5_checklist'),
+    ('send_day_7_checklist', 'task', 'onboarding.tasks.send_day_7_checklist'),
+    # performance
+    ('process_review_notifications', 'task', 'performance.tasks.process_review_notifications'),
+    ('process_goal_notifications', 'task', 'performance.tasks.process_goal_notifications'),
+    ('send_quarterly_goal_reminders', 'task', 'performance.tasks.send_quarterly_goal_reminders'),
+    # outbox
+    ('dispatch_outbox', 'task', 'notifications.tasks.dispatch_outbox'),
+    # views
+    ('hr_dashboard', 'view', 'hr_dashboard'),
+    ('attendance_report', 'view', 'attendance_report'),
+    ('attendance_summary', 'view', 'attendance_summary'),
+    ('leave_requests', 'view', 'leave_requests'),
+    ('leave_calendar', 'view', 'leave_calendar'),
+]
+
+
+def prepare(prefix, seed=42):
+    """
+    Add today's activity on top of ``generate_org`` data.
+
+    generate_org stops at yesterday, so without this the daily tasks would
+    find nothing to send. Returns the HR user the views are fetched as.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    # The attendance tasks stand down on days off and review reminders count
+    # working days, so the benchmark org works every day of the week: the
+    # same work is measured on a Saturday as on a Tuesday
+    HolidayCalendar.objects.update_or_create(
+        region=default_region(), defaults={'name': 'Benchmark', 'weekend': ''}
+    )
+    zone = attendance_timezone()
+    employees = list(
+        User.objects.filter(username__startswith=f'{prefix}_', role_profile__role='employee')
+        .order_by('id').values_list('id', flat=True)
+    )
+
+    # 70% have checked in, an eighth of them late and a fifth not yet out
+    checked_in = rng.sample(employees, int(len(employees) * 0.7))
+    records = []
+    for employee_id in checked_in:
+        late = rng.random() < 0.125
+        check_in = datetime.combine(today, time(9, 45) if late else time(8, 50), tzinfo=zone)
+        records.append(AttendanceRecord(
+            employee_id=employee_id,
+            attendance_date=today,
+            check_in_time=check_in,
+            check_out_time=None if rng.random() < 0.2 else check_in + timedelta(hours=8),
+            status='late' if late else 'present',
+        ))
+    AttendanceRecord.objects.bulk_create(records, batch_size=2000)
+    rebuild(today, today)
+
+    # Leave starting tomorrow and ending yesterday for 2% of employees each
+    sample = rng.sample(employees, max(1, len(employees) // 25))
+    half = len(sample) // 2
+    LeaveRequest.objects.filter(employee_id__in=sample[:half], status='pending').update(
+        status='approved', start_date=today + timedelta(days=1), end_date=today + timedelta(days=3)
+    )
+    LeaveRequest.objects.filter(employee_id__in=sample[half:], status='approved', end_date__lt=today).update(
+        start_date=today - timedelta(days=3), end_date=today - timedelta(days=1)
+    )
+
+    # New joiners on day 3, 5 and 7 of onboarding (start_date is auto_now_add)
+    joiners = rng.sample(employees, min(len(employees), 30))
+    Onboarding.objects.bulk_create(Onboarding(employee_id=employee_id) for employee_id in joiners)
+    for offset, day in enumerate((3, 5, 7)):
+        Onboarding.objects.filter(employee_id__in=joiners[offset::3]).update(start_date=today - timedelta(days=day))
+
+    # Open reviews due in 7 days, and goals awaiting a notice
+    open_reviews = PerformanceReview.objects.filter(status='pending', employee__username__startswith=f'{prefix}_')
+    open_reviews.update(submission_deadline=today + timedelta(days=7))
+    PerformanceGoal.objects.filter(review__in=open_reviews, status='on_track').update(status='completed')
+
+    # A backlog of outbound email for the dispatcher
+    OutboundEmail.objects.bulk_create(
+        OutboundEmail(
+            email_type='benchmark',
+            subject='Benchmark message',
+            body='<p>Benchmark</p>',
+            from_email='noreply@emailintegration.com',
+            recipients=[f'{prefix}_{number}@example.com'],
+        )
+        for number in range(500)
+    )
+
+    return User.objects.get(username=f'{prefix}_hr_0')
@@ -1,10 +1,53 @@
 import os
 from celery import Celery
+from kombu import Queue
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'email_integration_system.settings')
 
 app = Celery('email_integration_system')
 app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Emails a person is waiting on (leave decisions, welcome and exit mails, the
+# outbox dispatcher that delivers them) run on their own queue so they never
+# sit behind a scheduled reminder burst. Each queue gets its own workers:
+#
+#   celery -A email_integration_system worker -Q transactional -n transactional@%h -c 4 --prefetch-multiplier 1
+#   celery -A email_integration_system worker -Q bulk,celery -n bulk@%h -c 8 --prefetch-multiplier 4
+#
+# Transactional tasks are short and bursty, so workers take one message per
+# process and an idle process is always free for the next approval. Bulk
+# chunks are uniform and long, so a small prefetch saves broker round trips.
+# Add bulk workers (or raise -c) to shorten the 9:00 burst; per-queue wait
+# times are reported by ``manage.py check_queue_latency``.
+TRANSACTIONAL_QUEUE = 'transactional'
+BULK_QUEUE = 'bulk'
+
+app.conf.task_default_queue = 'celery'
+app.conf.task_queues = (
+    Queue('celery'),
+    Queue(TRANSACTIONAL_QUEUE),
+    Queue(BULK_QUEUE),
+)
+app.conf.task_routes = {
+    # exact names win over the patterns below
+    'notifications.tasks.dispatch_outbox': {'queue': TRANSACTIONAL_QUEUE},
+    'leave.tasks.send_leave_request_notification': {'queue': TRANSACTIONAL_QUEUE},
+    'leave.tasks.send_leave_approval_notification': {'queue': TRANSACTIONAL_QUEUE},
+    'leave.tasks.send_leave_rejection_notification': {'queue': TRANSACTIONAL_QUEUE},
+    'onboarding.tasks.send_welcome_email': {'queue': TRANSACTIONAL_QUEUE},
+    'onboarding.tasks.send_exit_process_email': {'queue': TRANSACTIONAL_QUEUE},
+    'onboarding.tasks.send_farewell_email': {'queue': TRANSACTIONAL_QUEUE},
+    'performance.tasks.launch_cycle_emails': {'queue': TRANSACTIONAL_QUEUE},
+    'performance.tasks.send_appreciation_email_task': {'queue': TRANSACTIONAL_QUEUE},
+    # scheduled jobs, their fan-out chunks and the chord callback
+    'notifications.tasks.collect_fanout': {'queue': BULK_QUEUE},
+    'attendance.tasks.*': {'queue': BULK_QUEUE},
+    'leave.tasks.*': {'queue': BULK_QUEUE},
+    'onboarding.tasks.*': {'queue': BULK_QUEUE},
+    'performance.tasks.*': {'queue': BULK_QUEUE},
+    'retention.tasks.*': {'queue': BULK_QUEUE},
+}
+
 app.autodiscover_tasks()
 
 
@@ -0,0 +1,150 @@
+"""
+Keyset (seek) pagination.
+
+``Paginator`` pages with ``COUNT(*)`` and ``OFFSET``, both of which get
+slower the further into a large table you go. ``KeysetPaginator`` instead
+remembers the ordering values of the first/last row on the page in an
+opaque cursor and asks for the rows just before/after them, so every page
+costs the same indexed range read. There are no page numbers or totals;
+templates get First/Previous/Next/Last links instead.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+
+class KeysetPage:
+    """One page of rows plus the cursors needed to link to its neighbours"""
+
+    def __init__(self, object_list, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self.paginator.encode_cursor('before', self.object_list[0])
+        return None
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self.paginator.encode_cursor('after', self.object_list[-1])
+        return None
+
+    @property
+    def last_cursor(self):
+        return self.paginator.encode_cursor('before', None)
+
+
+class KeysetPaginator:
+    """
+    Page ``queryset`` by ``ordering``, e.g. ``('-attendance_date', '-id')``.
+
+    The ordering must end in a unique field (normally ``id``) so every row
+    has a distinct position; it should match an index for the seek to be
+    cheap.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def encode_cursor(self, direction, obj):
+        values = None
+        if obj is not None:
+            values = [
+                self.queryset.model._meta.get_field(name).value_to_string(obj)
+                for name in self.fields
+            ]
+        payload = json.dumps({'d': direction, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return ``(direction, values)``; an invalid cursor means the first page"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, raw_values = payload['d'], payload['v']
+            if direction not in ('after', 'before'):
+                raise ValueError(direction)
+            if raw_values is None:
+                return direction, None
+            if len(raw_values) != len(self.fields):
+                raise ValueError(raw_values)
+            values = [
+                self.queryset.model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, raw_values)
+            ]
+        except Exception:
+            return 'after', None
+        return direction, values
+
+    def _seek(self, values, forward):
+        # Rows strictly past ``values`` in the (possibly reversed) ordering:
+        # (a > x) OR (a = x AND b > y) OR ..., with > flipped for descending keys
+        condition = Q()
+        equal = Q()
+        lookups = []
+        for name, ordering, value in zip(self.fields, self.ordering, values):
+            lookup = 'lt' if ordering.startswith('-') == forward else 'gt'
+            lookups.append(lookup)
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        # The redundant a >= x bound lets the database seek the index range
+        # instead of testing the OR against every row
+        leading = Q(**{f'{self.fields[0]}__{lookups[0]}e': values[0]})
+        return leading & condition
+
+    def page_queryset(self, cursor=None):
+        """
+        Return ``(queryset, forward, seeking)`` for the page at ``cursor``.
+
+        The queryset is already sliced to one row more than a page, which
+        tells ``get_page`` whether another page follows.
+        """
+        direction, values = self.decode_cursor(cursor) if cursor else ('after', None)
+        forward = direction == 'after'
+        if forward:
+            ordering = self.ordering
+        else:
+            ordering = tuple(name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering)
+
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward))
+        return queryset[:self.per_page + 1], forward, values is not None
+
+    def get_page(self, cursor=None):
+        queryset, forward, seeking = self.page_queryset(cursor)
+        rows = list(queryset)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if forward:
+            return KeysetPage(rows, self, has_previous=seeking, has_next=has_more)
+        rows.reverse()
+        return KeysetPage(rows, self, has_previous=has_more, has_next=seeking)
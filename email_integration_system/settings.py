@@ -46,9 +46,15 @@ INSTALLED_APPS = [
     'leave',
     'onboarding',
     'performance',
+    'notifications',
+    'monitoring',
+    'retention',
+    'holidays',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,8 +70,16 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
+        'APP_DIRS': False,
         'OPTIONS': {
+            # Compiled templates are kept per process; email tasks render the
+            # same few templates thousands of times
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -147,6 +161,19 @@ CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Cache shared by every web and worker process. The leave overlap index and
+# compiled holiday calendars are kept per process and notice changes made
+# elsewhere through version counters stored here, so with separate processes
+# it has to be Redis; the per-process default is only enough for runserver
+# with eager tasks
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Use console for development
 # For production, use: 'django.core.mail.backends.smtp.EmailBackend'
@@ -157,10 +184,99 @@ EMAIL_HOST_USER = 'your-email@gmail.com'
 EMAIL_HOST_PASSWORD = 'your-app-password'
 DEFAULT_FROM_EMAIL = 'noreply@emailintegration.com'
 
+# Pooled delivery (notifications.delivery): open SMTP sessions kept per worker
+# process, messages per batch, and seconds before an idle session is recycled
+EMAIL_POOL_SIZE = 4
+EMAIL_BATCH_SIZE = 100
+EMAIL_POOL_IDLE_TIMEOUT = 60
+
+# Email-log rows written per bulk INSERT while a batch is running
+EMAIL_LOG_BATCH_SIZE = 500
+
+# Transactional outbox (notifications.outbox): rows claimed per dispatcher
+# batch, delivery attempts before giving up, and seconds before a claim held
+# by a dead worker is released
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_CLAIM_TIMEOUT = 600
+OUTBOX_MAX_BATCHES_PER_RUN = 50
+
+# Seconds before a scheduled notification claimed by a run that never sent it
+# (its worker died) may be claimed again (notifications.idempotency)
+NOTIFICATION_CLAIM_TIMEOUT = 600
+
+# Rows fetched per round trip when streaming reminder recipients
+ATTENDANCE_REMINDER_CHUNK_SIZE = 2000
+
+# Recipients per worker subtask when a large periodic email job (morning and
+# check-out reminders, quarterly goal reminders) is fanned out as a chord
+EMAIL_FANOUT_CHUNK_SIZE = 500
+
+# Check-ins at or after this local time count as late; the time zone defaults
+# to TIME_ZONE and can be set separately for the office
+ATTENDANCE_LATE_THRESHOLD = '09:30'
+ATTENDANCE_TIME_ZONE = TIME_ZONE
+
+# Days of daily attendance rollups recomputed from raw records each night
+ATTENDANCE_ROLLUP_RECONCILE_DAYS = 7
+
+# Share of a department that may be on approved leave on the same day;
+# the approval page warns before a request would go past it
+LEAVE_MAX_ABSENT_SHARE = 0.25
+
+# Holiday calendar (holidays.HolidayCalendar.region) that decides working
+# days for leave durations, attendance reminders and review deadlines
+HOLIDAY_REGION = 'default'
+
+# Per-view request metrics (query count, duplicates, DB/template time,
+# latency) for a sample of requests; report at /monitoring/requests/
+MONITORING_ENABLED = False
+MONITORING_SAMPLE_RATE = 0.1
+MONITORING_WINDOW = 500
+MONITORING_CACHE = 'default'
+
+# Celery task telemetry (duration, emails sent/failed, queue lag) stored as
+# TaskRunMetric rows; Prometheus text at /monitoring/metrics/, which accepts
+# ``Authorization: Bearer <token>`` when a token is set, otherwise HR login
+TASK_METRICS_ENABLED = True
+MONITORING_METRICS_TOKEN = ''
+
+# Months of rows kept in the database per model before retention moves them
+# to gzip NDJSON archives (one file per month) under RETENTION_ARCHIVE_ROOT;
+# models left out are kept indefinitely. The archives hold personal data, so
+# they stay outside MEDIA_ROOT, which is served publicly. Rows move
+# RETENTION_BATCH_SIZE at a time with RETENTION_BATCH_PAUSE seconds between
+# batches
+RETENTION_MONTHS = {
+    'attendance.AttendanceRecord': 24,
+    'attendance.AttendanceEmailLog': 12,
+    'leave.LeaveEmailLog': 12,
+    'onboarding.OnboardingEmailLog': 12,
+    'performance.PerformanceEmailLog': 24,
+    'notifications.EmailDeliveryLog': 12,
+    'notifications.OutboundEmail': 3,
+    'monitoring.TaskRunMetric': 3,
+    'notifications.NotificationKey': 6,
+}
+RETENTION_ARCHIVE_ROOT = BASE_DIR / 'archive'
+RETENTION_BATCH_SIZE = 1000
+RETENTION_BATCH_PAUSE = 0.1
+
+# Seconds a task may wait in each Celery queue (95th percentile) before
+# check_queue_latency fails; bulk covers finishing the 9:00 burst by 9:30
+TASK_QUEUE_LAG_BUDGETS = {
+    'transactional': 30,
+    'bulk': 1800,
+}
+
 # Celery Beat Schedule
 from celery.schedules import crontab
 
 CELERY_BEAT_SCHEDULE = {
+    'outbox-dispatch': {
+        'task': 'notifications.tasks.dispatch_outbox',
+        'schedule': 60.0,
+    },
     'morning-checkin-reminder': {
         'task': 'attendance.tasks.send_morning_checkin_reminder',
         'schedule': crontab(hour=9, minute=0),
@@ -181,6 +297,10 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'attendance.tasks.send_monthly_attendance_report',
         'schedule': crontab(day_of_month=1, hour=9, minute=0),
     },
+    'attendance-rollup-reconcile': {
+        'task': 'attendance.tasks.reconcile_attendance_rollups',
+        'schedule': crontab(hour=1, minute=0),
+    },
     'performance-review-notifications': {
         'task': 'performance.tasks.process_review_notifications',
         'schedule': crontab(hour=7, minute=0),
@@ -193,4 +313,8 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'performance.tasks.send_quarterly_goal_reminders',
         'schedule': crontab(month_of_year='1,4,7,10', day_of_month=1, hour=10, minute=0),
     },
+    'retention-archive': {
+        'task': 'retention.tasks.apply_retention_policies',
+        'schedule': crontab(hour=2, minute=30),
+    },
 }
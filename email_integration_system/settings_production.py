@@ -41,9 +41,14 @@ INSTALLED_APPS = [
     'leave',
     'onboarding',
     'performance',
+    'notifications',
+    'monitoring',
+    'retention',
+    'holidays',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,8 +64,16 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
+        'APP_DIRS': False,
         'OPTIONS': {
+            # Compiled templates are kept per process; email tasks render the
+            # same few templates thousands of times
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -125,6 +138,91 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Pooled delivery (notifications.delivery): open SMTP sessions kept per worker
+# process, messages per batch, and seconds before an idle session is recycled
+EMAIL_POOL_SIZE = int(os.getenv('EMAIL_POOL_SIZE', 4))
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', 100))
+EMAIL_POOL_IDLE_TIMEOUT = 60
+
+# Email-log rows written per bulk INSERT while a batch is running
+EMAIL_LOG_BATCH_SIZE = int(os.getenv('EMAIL_LOG_BATCH_SIZE', 500))
+
+# Transactional outbox (notifications.outbox): rows claimed per dispatcher
+# batch, delivery attempts before giving up, and seconds before a claim held
+# by a dead worker is released
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_CLAIM_TIMEOUT = 600
+OUTBOX_MAX_BATCHES_PER_RUN = 50
+
+# Seconds before a scheduled notification claimed by a run that never sent it
+# (its worker died) may be claimed again (notifications.idempotency)
+NOTIFICATION_CLAIM_TIMEOUT = 600
+
+# Rows fetched per round trip when streaming reminder recipients
+ATTENDANCE_REMINDER_CHUNK_SIZE = 2000
+
+# Recipients per worker subtask when a large periodic email job (morning and
+# check-out reminders, quarterly goal reminders) is fanned out as a chord
+EMAIL_FANOUT_CHUNK_SIZE = int(os.getenv('EMAIL_FANOUT_CHUNK_SIZE', '500'))
+
+# Check-ins at or after this local time count as late; the time zone defaults
+# to TIME_ZONE and can be set separately for the office
+ATTENDANCE_LATE_THRESHOLD = '09:30'
+ATTENDANCE_TIME_ZONE = TIME_ZONE
+
+# Days of daily attendance rollups recomputed from raw records each night
+ATTENDANCE_ROLLUP_RECONCILE_DAYS = 7
+
+# Share of a department that may be on approved leave on the same day;
+# the approval page warns before a request would go past it
+LEAVE_MAX_ABSENT_SHARE = float(os.getenv('LEAVE_MAX_ABSENT_SHARE', '0.25'))
+
+# Holiday calendar (holidays.HolidayCalendar.region) that decides working
+# days for leave durations, attendance reminders and review deadlines
+HOLIDAY_REGION = os.getenv('HOLIDAY_REGION', 'default')
+
+# Per-view request metrics (query count, duplicates, DB/template time,
+# latency) for a sample of requests; report at /monitoring/requests/
+MONITORING_ENABLED = os.getenv('MONITORING_ENABLED', 'False') == 'True'
+MONITORING_SAMPLE_RATE = float(os.getenv('MONITORING_SAMPLE_RATE', '0.1'))
+MONITORING_WINDOW = 500
+MONITORING_CACHE = 'default'
+
+# Celery task telemetry (duration, emails sent/failed, queue lag) stored as
+# TaskRunMetric rows; Prometheus text at /monitoring/metrics/, which accepts
+# ``Authorization: Bearer <token>`` when a token is set, otherwise HR login
+TASK_METRICS_ENABLED = os.getenv('TASK_METRICS_ENABLED', 'True') == 'True'
+MONITORING_METRICS_TOKEN = os.getenv('MONITORING_METRICS_TOKEN', '')
+
+# Months of rows kept in the database per model before retention moves them
+# to gzip NDJSON archives (one file per month) under RETENTION_ARCHIVE_ROOT;
+# models left out are kept indefinitely. The archives hold personal data, so
+# they stay outside MEDIA_ROOT, which is served publicly. Rows move
+# RETENTION_BATCH_SIZE at a time with RETENTION_BATCH_PAUSE seconds between
+# batches
+RETENTION_MONTHS = {
+    'attendance.AttendanceRecord': 24,
+    'attendance.AttendanceEmailLog': 12,
+    'leave.LeaveEmailLog': 12,
+    'onboarding.OnboardingEmailLog': 12,
+    'performance.PerformanceEmailLog': 24,
+    'notifications.EmailDeliveryLog': 12,
+    'notifications.OutboundEmail': 3,
+    'monitoring.TaskRunMetric': 3,
+    'notifications.NotificationKey': 6,
+}
+RETENTION_ARCHIVE_ROOT = os.getenv('RETENTION_ARCHIVE_ROOT', str(BASE_DIR / 'archive'))
+RETENTION_BATCH_SIZE = 1000
+RETENTION_BATCH_PAUSE = 0.1
+
+# Seconds a task may wait in each Celery queue (95th percentile) before
+# check_queue_latency fails; bulk covers finishing the 9:00 burst by 9:30
+TASK_QUEUE_LAG_BUDGETS = {
+    'transactional': 30,
+    'bulk': 1800,
+}
+
 # Celery Configuration
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://127.0.0.1:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://127.0.0.1:6379/0')
@@ -139,6 +237,17 @@ CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_ALWAYS_EAGER = False if not DEBUG else True
 CELERY_EAGER_PROPAGATES_EXCEPTIONS = True
 
+# Cache shared by every web and worker process. The leave overlap index and
+# compiled holiday calendars are kept per process and notice changes made
+# elsewhere through version counters stored here, so it must not be a
+# per-process cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_URL', 'redis://127.0.0.1:6379/1'),
+    }
+}
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -28,6 +28,7 @@ urlpatterns = [
     path('leave/', include('leave.urls')),
     path('onboarding/', include('onboarding.urls')),
     path('performance/', include('performance.urls')),
+    path('monitoring/', include('monitoring.urls')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,21 @@
+from django.contrib import admin
+from .models import HolidayCalendar, Holiday
+
+
+class HolidayInline(admin.TabularInline):
+    model = Holiday
+    extra = 1
+
+
+@admin.register(HolidayCalendar)
+class HolidayCalendarAdmin(admin.ModelAdmin):
+    list_display = ['region', 'name', 'weekend', 'updated_at']
+    search_fields = ['region', 'name']
+    inlines = [HolidayInline]
+
+
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+    list_display = ['date', 'name', 'calendar']
+    list_filter = ['calendar', 'date']
+    search_fields = ['name']
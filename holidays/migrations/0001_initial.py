@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HolidayCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(help_text="Code used in HOLIDAY_REGION, e.g. 'default' or 'IN-KA'", max_length=50, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('weekend', models.CharField(default='5,6', help_text='Weekday numbers off every week, Monday=0 ... Sunday=6', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Holiday Calendars',
+            },
+        ),
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('name', models.CharField(max_length=100)),
+                ('calendar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='holidays.holidaycalendar')),
+            ],
+            options={
+                'verbose_name_plural': 'Holidays',
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('calendar', 'date'), name='holiday_calendar_date_uniq')],
+            },
+        ),
+    ]
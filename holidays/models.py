@@ -0,0 +1,52 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+
+
+class HolidayCalendar(models.Model):
+    """Public holidays and weekend days of one region"""
+    region = models.CharField(max_length=50, unique=True, help_text="Code used in HOLIDAY_REGION, e.g. 'default' or 'IN-KA'")
+    name = models.CharField(max_length=100)
+    weekend = models.CharField(max_length=20, default='5,6', help_text="Weekday numbers off every week, Monday=0 ... Sunday=6")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.region})"
+    
+    @property
+    def weekend_days(self):
+        return parse_weekend(self.weekend)
+    
+    def clean(self):
+        try:
+            parse_weekend(self.weekend)
+        except ValueError:
+            raise ValidationError({'weekend': "Use comma-separated weekday numbers from 0 (Monday) to 6 (Sunday)."})
+    
+    class Meta:
+        verbose_name_plural = "Holiday Calendars"
+
+
+class Holiday(models.Model):
+    """A day off for everyone in a calendar's region"""
+    calendar = models.ForeignKey(HolidayCalendar, on_delete=models.CASCADE, related_name='holidays')
+    date = models.DateField()
+    name = models.CharField(max_length=100)
+    
+    def __str__(self):
+        return f"{self.name} ({self.date})"
+    
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['calendar', 'date'], name='holiday_calendar_date_uniq'),
+        ]
+        verbose_name_plural = "Holidays"
+
+
+def parse_weekend(value):
+    """``'5,6'`` -> ``frozenset({5, 6})``; raises ``ValueError`` for anything else"""
+    days = frozenset(int(part) for part in value.split(',') if part.strip())
+    if not days <= set(range(7)):
+        raise ValueError(value)
+    return days
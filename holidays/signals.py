@@ -0,0 +1,27 @@
+from celery.signals import task_prerun
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import workdays
+from .models import Holiday, HolidayCalendar
+
+
+@receiver([post_save, post_delete], sender=HolidayCalendar)
+def calendar_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: workdays.invalidate(instance.region))
+
+
+@receiver([post_save, post_delete], sender=Holiday)
+def holiday_changed(sender, instance, **kwargs):
+    region = HolidayCalendar.objects.filter(pk=instance.calendar_id).values_list('region', flat=True).first()
+    if region:
+        transaction.on_commit(lambda: workdays.invalidate(region))
+
+
+@receiver(request_started)
+@task_prerun.connect
+def recheck_calendars(**kwargs):
+    """Pick up calendar changes from other processes once per request or task"""
+    workdays.recheck()
@@ -0,0 +1,92 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.test import TestCase
+
+from . import workdays
+from .models import Holiday, HolidayCalendar
+
+MONDAY = date(2030, 6, 3)
+
+
+def brute_force(start, end, weekend, holidays):
+    days = 0
+    day = start
+    while day <= end:
+        if day.weekday() not in weekend and day not in holidays:
+            days += 1
+        day += timedelta(days=1)
+    return days
+
+
+class WorkingDaysTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        workdays._calendars.clear()
+        workdays.recheck()
+
+    def add_calendar(self, weekend='5,6', holidays=()):
+        with self.captureOnCommitCallbacks(execute=True):
+            calendar = HolidayCalendar.objects.create(region='default', name='Head office', weekend=weekend)
+            for day in holidays:
+                Holiday.objects.create(calendar=calendar, date=day, name='Holiday')
+        return calendar
+
+    def test_saturday_and_sunday_are_off_without_a_calendar(self):
+        self.assertEqual(workdays.working_days(MONDAY, MONDAY + timedelta(days=6)), 5)
+        self.assertTrue(workdays.is_working_day(MONDAY + timedelta(days=4)))
+        self.assertFalse(workdays.is_working_day(MONDAY + timedelta(days=5)))
+
+    def test_holidays_are_not_counted(self):
+        self.add_calendar(holidays=[MONDAY, MONDAY + timedelta(days=2)])
+        self.assertEqual(workdays.working_days(MONDAY, MONDAY + timedelta(days=6)), 3)
+        self.assertFalse(workdays.is_working_day(MONDAY))
+
+    def test_counts_across_years_match_a_day_by_day_count(self):
+        holidays = {date(2029, 12, 25), date(2030, 1, 1), date(2031, 1, 1), date(2031, 5, 1)}
+        self.add_calendar(holidays=holidays)
+        start = date(2029, 12, 20)
+        for end in (date(2029, 12, 31), date(2030, 1, 2), date(2031, 1, 1), date(2031, 6, 30)):
+            with self.subTest(end=end):
+                self.assertEqual(workdays.working_days(start, end), brute_force(start, end, {5, 6}, holidays))
+
+    def test_regional_weekend(self):
+        self.add_calendar(weekend='4,5')
+        self.assertEqual(workdays.working_days(MONDAY, MONDAY + timedelta(days=6)), 5)
+        self.assertFalse(workdays.is_working_day(MONDAY + timedelta(days=4)))
+        self.assertTrue(workdays.is_working_day(MONDAY + timedelta(days=6)))
+
+    def test_empty_weekend_works_every_day(self):
+        self.add_calendar(weekend='')
+        self.assertEqual(workdays.working_days(MONDAY, MONDAY + timedelta(days=6)), 7)
+
+    def test_reversed_range_is_zero(self):
+        self.assertEqual(workdays.working_days(MONDAY, MONDAY - timedelta(days=1)), 0)
+
+    def test_due_in_includes_the_days_off_after_the_working_day(self):
+        friday = MONDAY + timedelta(days=4)
+        calendar = workdays.get_calendar()
+        # One working day after Thursday is Friday, then the weekend up to Sunday
+        self.assertEqual(
+            calendar.due_in(friday - timedelta(days=1), 1),
+            [friday, friday + timedelta(days=1), friday + timedelta(days=2)],
+        )
+        self.assertEqual(calendar.due_in(friday, 1), [MONDAY + timedelta(days=7)])
+
+    def test_holiday_saved_here_applies_at_once(self):
+        calendar = self.add_calendar()
+        self.assertTrue(workdays.is_working_day(MONDAY))
+        with self.captureOnCommitCallbacks(execute=True):
+            Holiday.objects.create(calendar=calendar, date=MONDAY, name='Holiday')
+        self.assertFalse(workdays.is_working_day(MONDAY))
+
+    def test_change_from_another_process_applies_from_the_next_request(self):
+        calendar = self.add_calendar()
+        self.assertTrue(workdays.is_working_day(MONDAY))
+        # Another process adds a holiday: no signal here, only the shared version moves
+        Holiday.objects.bulk_create([Holiday(calendar=calendar, date=MONDAY, name='Holiday')])
+        cache.incr('holidays:calendar:default')
+        self.assertTrue(workdays.is_working_day(MONDAY))
+        request_started.send(sender=None)
+        self.assertFalse(workdays.is_working_day(MONDAY))
@@ -0,0 +1,175 @@
+"""
+Working-day arithmetic over regional holiday calendars.
+
+Each year of a region is compiled once into a ``WorkingYear``: a bitmap with
+one bit per day of the year set for working days, and a running count of
+working days so far. Whether a day is worked is a bit test, and the number
+of working days between two dates of the same year is the difference of two
+counts, whatever the distance.
+
+Compiled years are kept in process memory per region. ``holidays.signals``
+bumps a version in the default cache whenever a region's calendar or
+holidays change, and every process recompiles on next use. Web processes and
+Celery workers only see each other's changes when that cache is shared
+(Redis, see ``CACHES``).
+
+The version is read from the cache once per request or Celery task (the
+signals clear ``_checked`` when one starts), and at least every
+``VERSION_CHECK_SECONDS`` in anything longer-running. Every other lookup is
+answered from process memory.
+"""
+import secrets
+import time
+from array import array
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Holiday, HolidayCalendar, parse_weekend
+
+# Weekend of a region without a HolidayCalendar row: Saturday and Sunday
+DEFAULT_WEEKEND = frozenset({5, 6})
+
+# Seconds a confirmed version is trusted outside a request or task
+VERSION_CHECK_SECONDS = 60
+
+# region -> WorkingCalendar
+_calendars = {}
+# region -> time.monotonic() its version was last read from the cache
+_checked = {}
+
+
+def default_region():
+    return getattr(settings, 'HOLIDAY_REGION', 'default')
+
+
+class WorkingYear:
+    """Working days of one calendar year as a bitmap and prefix counts"""
+
+    def __init__(self, year, weekend, holidays):
+        self.first = date(year, 1, 1)
+        days = (date(year + 1, 1, 1) - self.first).days
+        weekday = self.first.weekday()
+        bitmap = 0
+        # prefix[i]: working days among the first i days of the year
+        prefix = array('H', [0])
+        for offset in range(days):
+            if (weekday + offset) % 7 not in weekend and self.first + timedelta(days=offset) not in holidays:
+                bitmap |= 1 << offset
+            prefix.append(prefix[-1] + (bitmap >> offset & 1))
+        self.bitmap = bitmap
+        self.prefix = prefix
+
+    def is_working(self, day):
+        return bool(self.bitmap >> (day - self.first).days & 1)
+
+    def count(self, start, end):
+        """Working days from ``start`` to ``end`` inclusive, both in this year"""
+        return self.prefix[(end - self.first).days + 1] - self.prefix[(start - self.first).days]
+
+    @property
+    def total(self):
+        return self.prefix[-1]
+
+
+class WorkingCalendar:
+    """Working days of one region, compiled a year at a time"""
+
+    def __init__(self, region, weekend, version):
+        self.region = region
+        self.weekend = weekend
+        self.version = version
+        self._years = {}
+
+    def year(self, year):
+        working_year = self._years.get(year)
+        if working_year is None:
+            holidays = set(Holiday.objects.filter(
+                calendar__region=self.region,
+                date__gte=date(year, 1, 1),
+                date__lte=date(year, 12, 31),
+            ).values_list('date', flat=True))
+            working_year = self._years[year] = WorkingYear(year, self.weekend, holidays)
+        return working_year
+
+    def is_working_day(self, day):
+        return self.year(day.year).is_working(day)
+
+    def working_days(self, start, end):
+        """Working days from ``start`` to ``end`` inclusive; 0 if ``end`` is earlier"""
+        if end < start:
+            return 0
+        if start.year == end.year:
+            return self.year(start.year).count(start, end)
+        days = self.year(start.year).count(start, date(start.year, 12, 31))
+        for year in range(start.year + 1, end.year):
+            days += self.year(year).total
+        return days + self.year(end.year).count(date(end.year, 1, 1), end)
+
+    def due_in(self, today, working_days):
+        """
+        Dates after ``today`` with exactly ``working_days`` working days from
+        tomorrow up to and including them: the working day itself plus any
+        weekend or holidays straight after it.
+        """
+        dates = []
+        count = 0
+        # Bounded in case a calendar has no working days at all
+        for offset in range(1, 2 * 366):
+            day = today + timedelta(days=offset)
+            if self.is_working_day(day):
+                count += 1
+                if count > working_days:
+                    break
+            if count == working_days:
+                dates.append(day)
+        return dates
+
+
+def _version(region):
+    # Start from an arbitrary number so a counter lost from the cache never
+    # comes back equal to a version some process still holds
+    return cache.get_or_set(f'holidays:calendar:{region}', lambda: secrets.randbits(48), None)
+
+
+def get_calendar(region=None):
+    """The ``WorkingCalendar`` for ``region`` (``HOLIDAY_REGION`` by default)"""
+    region = region or default_region()
+    working_calendar = _calendars.get(region)
+    checked = _checked.get(region)
+    if working_calendar is not None and checked is not None and time.monotonic() - checked < VERSION_CHECK_SECONDS:
+        return working_calendar
+    version = _version(region)
+    _checked[region] = time.monotonic()
+    if working_calendar is None or working_calendar.version != version:
+        weekend = HolidayCalendar.objects.filter(region=region).values_list('weekend', flat=True).first()
+        # An empty weekend is a calendar that works every day, not a missing one
+        working_calendar = WorkingCalendar(
+            region, DEFAULT_WEEKEND if weekend is None else parse_weekend(weekend), version
+        )
+        _calendars[region] = working_calendar
+    return working_calendar
+
+
+def working_days(start, end, region=None):
+    return get_calendar(region).working_days(start, end)
+
+
+def is_working_day(day, region=None):
+    return get_calendar(region).is_working_day(day)
+
+
+def recheck():
+    """Read every region's version from the cache again on next use"""
+    _checked.clear()
+
+
+def invalidate(region):
+    """Make every process recompile ``region`` on next use"""
+    _calendars.pop(region, None)
+    _checked.pop(region, None)
+    try:
+        cache.incr(f'holidays:calendar:{region}')
+    except ValueError:
+        pass
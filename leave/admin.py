@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import LeaveType, LeaveRequest, LeaveBalance, LeaveEmailLog
+from .models import LeaveType, LeaveRequest, LeaveBalance, LeaveLedgerEntry, LeaveEmailLog
 
 
 @admin.register(LeaveType)
@@ -24,6 +24,24 @@ class LeaveBalanceAdmin(admin.ModelAdmin):
     search_fields = ['employee__username']
 
 
+@admin.register(LeaveLedgerEntry)
+class LeaveLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ['employee', 'leave_type', 'year', 'kind', 'days', 'leave_request', 'created_at']
+    list_filter = ['kind', 'leave_type', 'year']
+    search_fields = ['employee__username', 'note']
+    raw_id_fields = ['employee', 'leave_request', 'reverses', 'created_by']
+
+    # Append-only: entries are posted by leave.ledger, never edited here
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(LeaveEmailLog)
 class LeaveEmailLogAdmin(admin.ModelAdmin):
     list_display = ['leave_request', 'email_type', 'recipient_email', 'sent_at', 'status']
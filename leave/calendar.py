@@ -0,0 +1,92 @@
+"""
+Approved leave shown a window of dates at a time.
+
+A leave overlaps the window ``[start, end]`` when ``start_date <= end`` and
+``end_date >= start``. The second half alone cannot use an index on
+``start_date``, so the query also bounds how early an overlapping leave can
+have started: no earlier than ``start`` minus the longest approved leave on
+record, read from the ``(status, span_days)`` index. A month view then reads
+a narrow slice of ``leave_status_start_idx`` however much history there is.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.db.models import Max
+
+from .models import LeaveRequest
+
+# Longest window a single page will draw
+MAX_WINDOW_DAYS = 366
+
+
+def month_window(year, month):
+    last = calendar.monthrange(year, month)[1]
+    return date(year, month, 1), date(year, month, last)
+
+
+def parse_window(params, today):
+    """
+    ``(start, end)`` from ``?month=YYYY-MM`` or ``?start=YYYY-MM-DD&end=YYYY-MM-DD``.
+
+    Defaults to the month containing ``today``; raises ``ValueError`` for
+    dates that do not parse, a reversed range, or one longer than
+    ``MAX_WINDOW_DAYS``.
+    """
+    try:
+        if params.get('start') or params.get('end'):
+            start = date.fromisoformat(params.get('start', ''))
+            end = date.fromisoformat(params.get('end', ''))
+        elif params.get('month'):
+            first = date.fromisoformat(params['month'] + '-01')
+            return month_window(first.year, first.month)
+        else:
+            return month_window(today.year, today.month)
+    except ValueError:
+        raise ValueError("Use YYYY-MM for a month or YYYY-MM-DD for dates.") from None
+    if end < start:
+        raise ValueError("End date is before start date.")
+    if (end - start).days + 1 > MAX_WINDOW_DAYS:
+        raise ValueError(f"Choose a range of at most {MAX_WINDOW_DAYS} days.")
+    return start, end
+
+
+def longest_span():
+    """Calendar days covered by the longest approved leave"""
+    return LeaveRequest.objects.filter(status='approved').aggregate(longest=Max('span_days'))['longest'] or 1
+
+
+def leaves_in_window(queryset, start, end):
+    """Approved leaves from ``queryset`` that overlap ``start``..``end``, by start date"""
+    earliest = start - timedelta(days=longest_span() - 1)
+    return queryset.filter(
+        status='approved',
+        start_date__gte=earliest,
+        start_date__lte=end,
+        end_date__gte=start,
+    ).select_related('employee', 'leave_type').order_by('start_date', 'id')
+
+
+def occupancy(leaves, start, end):
+    """``[(day, people on leave), ...]`` for every day of the window"""
+    days = (end - start).days + 1
+    # +1 where a leave enters the window, -1 the day after it leaves
+    changes = [0] * (days + 1)
+    for leave in leaves:
+        changes[max((leave.start_date - start).days, 0)] += 1
+        changes[min((leave.end_date - start).days, days - 1) + 1] -= 1
+
+    counts = []
+    on_leave = 0
+    for offset in range(days):
+        on_leave += changes[offset]
+        counts.append((start + timedelta(days=offset), on_leave))
+    return counts
+
+
+def weeks(counts):
+    """``counts`` split into Monday-first weeks, padded with ``None``"""
+    if not counts:
+        return []
+    cells = [None] * counts[0][0].weekday() + list(counts)
+    cells += [None] * (-len(cells) % 7)
+    return [cells[i:i + 7] for i in range(0, len(cells), 7)]
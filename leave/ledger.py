@@ -0,0 +1,273 @@
+"""
+Leave balances as an append-only ledger.
+
+Every change to a balance is a ``LeaveLedgerEntry``: an accrual of allowance,
+a debit when leave is approved, or a reversal when approved leave is
+rejected, cancelled or moved. ``LeaveBalance`` stays the place balances are
+read from; each posting moves it by the same amount in the same
+transaction, so reading a balance is still one row. ``reconcile`` recomputes
+balances from the ledger when they need checking.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, When
+
+from .models import LeaveBalance, LeaveLedgerEntry, LeaveRequest
+
+
+def _move_balance(employee_id, leave_type_id, year, total=0, used=0):
+    balance, _ = LeaveBalance.objects.get_or_create(
+        employee_id=employee_id,
+        leave_type_id=leave_type_id,
+        year=year,
+        defaults={'total_balance': 0, 'used_balance': 0},
+    )
+    LeaveBalance.objects.filter(pk=balance.pk).update(
+        total_balance=F('total_balance') + total,
+        used_balance=F('used_balance') + used,
+    )
+
+
+def _post(kind, employee_id, leave_type_id, year, days, **fields):
+    with transaction.atomic():
+        entry = LeaveLedgerEntry.objects.create(
+            employee_id=employee_id, leave_type_id=leave_type_id, year=year, kind=kind, days=days, **fields
+        )
+        if kind == 'accrual':
+            _move_balance(employee_id, leave_type_id, year, total=days)
+        else:
+            _move_balance(employee_id, leave_type_id, year, used=days if kind == 'debit' else -days)
+    return entry
+
+
+def accrue(employee, leave_type, year, days, note='', by=None):
+    """Add ``days`` of allowance to the employee's balance for ``year``"""
+    return _post('accrual', employee.pk, leave_type.pk, year, days, note=note, created_by=by)
+
+
+def debit(leave_request, by=None):
+    """
+    Charge an approved request to its employee's balance, once.
+
+    A balance that does not exist yet is opened with the allowance from the
+    employee's profile, as approving always has.
+    """
+    with transaction.atomic():
+        # Serialise concurrent approvals of the same request
+        LeaveRequest.objects.select_for_update().filter(pk=leave_request.pk).first()
+        if _open_debit(leave_request) is not None:
+            return None
+
+        year = leave_request.start_date.year
+        opened = LeaveBalance.objects.filter(
+            employee_id=leave_request.employee_id, leave_type_id=leave_request.leave_type_id, year=year
+        ).exists()
+        if not opened:
+            profile = getattr(leave_request.employee, 'employee_profile', None)
+            allowance = profile.leave_balance if profile and profile.leave_balance else 0
+            if allowance > 0:
+                _post('accrual', leave_request.employee_id, leave_request.leave_type_id, year, allowance,
+                      note='Opening allowance', created_by=by)
+
+        return _post(
+            'debit', leave_request.employee_id, leave_request.leave_type_id, year,
+            leave_request.get_duration_days(), leave_request=leave_request, created_by=by,
+        )
+
+
+def debit_requests(leave_requests, by=None):
+    """
+    ``debit`` for many just-approved requests with a fixed number of queries.
+
+    Missing balances are opened from the employees' profile allowance,
+    entries go in with one INSERT per kind, and balances move with one
+    UPDATE per distinct number of days. Call inside the transaction that
+    approved the requests; requests already charged are skipped.
+    """
+    from users.models import EmployeeProfile
+
+    charged = set(LeaveLedgerEntry.objects.filter(
+        leave_request__in=leave_requests, kind='debit', reversed_by__isnull=True
+    ).values_list('leave_request_id', flat=True))
+    leave_requests = [leave_request for leave_request in leave_requests if leave_request.pk not in charged]
+    if not leave_requests:
+        return []
+
+    def key(leave_request):
+        return leave_request.employee_id, leave_request.leave_type_id, leave_request.start_date.year
+
+    keys = {key(leave_request) for leave_request in leave_requests}
+    employee_ids = {employee_id for employee_id, _, _ in keys}
+    balances = {
+        (employee_id, leave_type_id, year): balance_id
+        for balance_id, employee_id, leave_type_id, year in LeaveBalance.objects.filter(
+            employee_id__in=employee_ids,
+            leave_type_id__in={leave_type_id for _, leave_type_id, _ in keys},
+            year__in={year for _, _, year in keys},
+        ).values_list('id', 'employee_id', 'leave_type_id', 'year')
+        if (employee_id, leave_type_id, year) in keys
+    }
+
+    missing = sorted(keys - balances.keys())
+    if missing:
+        allowances = dict(EmployeeProfile.objects.filter(
+            user_id__in={employee_id for employee_id, _, _ in missing}
+        ).values_list('user_id', 'leave_balance'))
+        LeaveBalance.objects.bulk_create([
+            LeaveBalance(
+                employee_id=employee_id, leave_type_id=leave_type_id, year=year,
+                total_balance=max(allowances.get(employee_id) or 0, 0), used_balance=0,
+            )
+            for employee_id, leave_type_id, year in missing
+        ])
+        LeaveLedgerEntry.objects.bulk_create([
+            LeaveLedgerEntry(
+                employee_id=employee_id, leave_type_id=leave_type_id, year=year, kind='accrual',
+                days=allowances[employee_id], note='Opening allowance', created_by=by,
+            )
+            for employee_id, leave_type_id, year in missing
+            if (allowances.get(employee_id) or 0) > 0
+        ])
+        # Re-read ids: not every backend returns primary keys from bulk_create
+        balances.update(
+            ((employee_id, leave_type_id, year), balance_id)
+            for balance_id, employee_id, leave_type_id, year in LeaveBalance.objects.filter(
+                employee_id__in={employee_id for employee_id, _, _ in missing},
+                year__in={year for _, _, year in missing},
+            ).values_list('id', 'employee_id', 'leave_type_id', 'year')
+        )
+
+    entries = LeaveLedgerEntry.objects.bulk_create([
+        LeaveLedgerEntry(
+            employee_id=leave_request.employee_id, leave_type_id=leave_request.leave_type_id,
+            year=leave_request.start_date.year, kind='debit', days=leave_request.get_duration_days(),
+            leave_request=leave_request, created_by=by,
+        )
+        for leave_request in leave_requests
+    ])
+
+    used = {}
+    for leave_request in leave_requests:
+        balance_id = balances[key(leave_request)]
+        used[balance_id] = used.get(balance_id, 0) + leave_request.get_duration_days()
+    by_days = {}
+    for balance_id, days in used.items():
+        by_days.setdefault(days, []).append(balance_id)
+    for days, balance_ids in by_days.items():
+        LeaveBalance.objects.filter(id__in=balance_ids).update(used_balance=F('used_balance') + days)
+    return entries
+
+
+def reverse(leave_request, by=None, note='', deleting=False):
+    """
+    Give back the days charged for a request that is no longer approved.
+
+    ``deleting`` leaves the reversal unlinked from the request, which is
+    about to go; it still points at the debit it reverses.
+    """
+    with transaction.atomic():
+        LeaveRequest.objects.select_for_update().filter(pk=leave_request.pk).first()
+        charged = _open_debit(leave_request)
+        if charged is None:
+            return None
+        return _post(
+            'reversal', charged.employee_id, charged.leave_type_id, charged.year, charged.days,
+            leave_request=None if deleting else leave_request, reverses=charged, note=note, created_by=by,
+        )
+
+
+def _open_debit(leave_request):
+    """The request's debit that has not been reversed, if any"""
+    return LeaveLedgerEntry.objects.filter(
+        leave_request=leave_request, kind='debit', reversed_by__isnull=True
+    ).first()
+
+
+def _signed(kind, sign):
+    return When(kind=kind, then=F('days') * sign)
+
+
+def ledger_totals(year=None):
+    """
+    ``(employee_id, leave_type_id, year, total, used)`` summed from the ledger.
+
+    One grouped query in balance order, read as a stream.
+    """
+    entries = LeaveLedgerEntry.objects.all()
+    if year is not None:
+        entries = entries.filter(year=year)
+    return entries.values_list('employee_id', 'leave_type_id', 'year').annotate(
+        total=Sum(Case(_signed('accrual', 1), default=0, output_field=IntegerField())),
+        used=Sum(Case(_signed('debit', 1), _signed('reversal', -1), default=0, output_field=IntegerField())),
+    ).order_by('employee_id', 'leave_type_id', 'year').iterator(chunk_size=5000)
+
+
+def reconcile(year=None, dry_run=False, batch_size=1000):
+    """
+    Make every ``LeaveBalance`` equal the sum of its ledger entries.
+
+    Ledger totals and balances are both read in (employee, leave type, year)
+    order and merged in a single pass; differing balances are rewritten and
+    missing ones created in batches, and balances with no entries at all are
+    zeroed. Returns ``(checked, corrected)``.
+    """
+    balances = LeaveBalance.objects.all()
+    if year is not None:
+        balances = balances.filter(year=year)
+    balances = balances.order_by('employee_id', 'leave_type_id', 'year').values_list(
+        'id', 'employee_id', 'leave_type_id', 'year', 'total_balance', 'used_balance'
+    ).iterator(chunk_size=5000)
+
+    checked = corrected = pending = 0
+    # Corrections grouped by the values they set: balances cluster on a few
+    # (total, used) pairs, so a batch is a handful of UPDATE ... WHERE id IN
+    to_update, to_create = {}, []
+
+    def flush():
+        nonlocal pending
+        if not dry_run:
+            with transaction.atomic():
+                for (total, used), ids in to_update.items():
+                    LeaveBalance.objects.filter(id__in=ids).update(total_balance=total, used_balance=used)
+                LeaveBalance.objects.bulk_create(to_create)
+        to_update.clear()
+        to_create.clear()
+        pending = 0
+
+    def fix(balance_id, key, total, used):
+        nonlocal corrected, pending
+        corrected += 1
+        pending += 1
+        if balance_id is None:
+            employee_id, leave_type_id, year_ = key
+            to_create.append(LeaveBalance(
+                employee_id=employee_id, leave_type_id=leave_type_id, year=year_,
+                total_balance=total, used_balance=used,
+            ))
+        else:
+            to_update.setdefault((total, used), []).append(balance_id)
+        if pending >= batch_size:
+            flush()
+
+    balance = next(balances, None)
+    for employee_id, leave_type_id, year_, total, used in ledger_totals(year):
+        key = (employee_id, leave_type_id, year_)
+        # Balances before this key have no ledger entries
+        while balance is not None and balance[1:4] < key:
+            checked += 1
+            if balance[4] or balance[5]:
+                fix(balance[0], balance[1:4], 0, 0)
+            balance = next(balances, None)
+        checked += 1
+        if balance is not None and balance[1:4] == key:
+            if (balance[4], balance[5]) != (total, used):
+                fix(balance[0], key, total, used)
+            balance = next(balances, None)
+        else:
+            fix(None, key, total, used)
+    while balance is not None:
+        checked += 1
+        if balance[4] or balance[5]:
+            fix(balance[0], balance[1:4], 0, 0)
+        balance = next(balances, None)
+    flush()
+    return checked, corrected
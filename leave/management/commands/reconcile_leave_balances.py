@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from leave.ledger import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Rebuild LeaveBalance rows from the leave ledger in one streaming pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only balances for this leave year')
+        parser.add_argument('--dry-run', action='store_true', help='Count balances that differ without changing them')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        checked, corrected = reconcile(year=options['year'], dry_run=options['dry_run'])
+        elapsed = time.perf_counter() - started
+        verb = 'differ from' if options['dry_run'] else 'were corrected from'
+        self.stdout.write(f'{checked} balances checked in {elapsed:.2f}s; {corrected} {verb} the ledger')
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('✓ Leave balances reconciled'))
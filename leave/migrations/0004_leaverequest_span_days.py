@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_span_days(apps, schema_editor):
+    LeaveRequest = apps.get_model('leave', 'LeaveRequest')
+    for leave in LeaveRequest.objects.only('start_date', 'end_date').iterator(chunk_size=2000):
+        LeaveRequest.objects.filter(pk=leave.pk).update(span_days=(leave.end_date - leave.start_date).days + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0003_leaveemaillog_leave_log_sent_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaverequest',
+            name='span_days',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Calendar days from start to end, inclusive'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['status', 'span_days'], name='leave_status_span_idx'),
+        ),
+        migrations.RunPython(backfill_span_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    """One accrual and one debit per existing balance so the ledger sums to it"""
+    LeaveBalance = apps.get_model('leave', 'LeaveBalance')
+    LeaveLedgerEntry = apps.get_model('leave', 'LeaveLedgerEntry')
+    balances = LeaveBalance.objects.order_by('id').values_list(
+        'employee_id', 'leave_type_id', 'year', 'total_balance', 'used_balance'
+    )
+    entries = []
+    for employee_id, leave_type_id, year, total, used in balances.iterator(chunk_size=2000):
+        for kind, days in (('accrual', total), ('debit', used)):
+            if days > 0:
+                entries.append(LeaveLedgerEntry(
+                    employee_id=employee_id, leave_type_id=leave_type_id, year=year,
+                    kind=kind, days=days, note='Opening balance',
+                ))
+        if len(entries) >= 2000:
+            LeaveLedgerEntry.objects.bulk_create(entries)
+            entries = []
+    LeaveLedgerEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0004_leaverequest_span_days'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('kind', models.CharField(choices=[('accrual', 'Accrual'), ('debit', 'Debit'), ('reversal', 'Reversal')], max_length=10)),
+                ('days', models.PositiveIntegerField()),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_ledger', to=settings.AUTH_USER_MODEL)),
+                ('leave_request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='leave.leaverequest')),
+                ('leave_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='leave.leavetype')),
+                ('reverses', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reversed_by', to='leave.leaveledgerentry')),
+            ],
+            options={
+                'verbose_name_plural': 'Leave Ledger Entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['employee', 'leave_type', 'year', 'id'], name='leave_ledger_balance_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
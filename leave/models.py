@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from holidays.workdays import working_days
 
 
 class LeaveType(models.Model):
@@ -31,6 +32,9 @@ class LeaveRequest(models.Model):
     leave_type = models.ForeignKey(LeaveType, on_delete=models.PROTECT)
     start_date = models.DateField()
     end_date = models.DateField()
+    # Kept in step with the dates on save; bounds how far back a calendar
+    # window has to look for leaves that started before it
+    span_days = models.PositiveIntegerField(default=1, editable=False, help_text="Calendar days from start to end, inclusive")
     reason = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     approved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='approved_leaves')
@@ -47,13 +51,28 @@ class LeaveRequest(models.Model):
         if self.start_date < timezone.now().date():
             raise ValidationError("Start date cannot be in the past.")
     
+    def save(self, *args, **kwargs):
+        # Views pass POSTed dates through as strings
+        for name in ('start_date', 'end_date'):
+            setattr(self, name, self._meta.get_field(name).to_python(getattr(self, name)))
+        if self.start_date and self.end_date:
+            self.span_days = (self.end_date - self.start_date).days + 1
+        super().save(*args, **kwargs)
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'start_date'], name='leave_status_start_idx'),
+            models.Index(fields=['status', 'end_date'], name='leave_status_end_idx'),
+            models.Index(fields=['status', 'span_days'], name='leave_status_span_idx'),
+            # Keyset pagination order for the leave request list
+            models.Index(fields=['-created_at', '-id'], name='leave_created_id_idx'),
+        ]
         verbose_name_plural = "Leave Requests"
     
     def get_duration_days(self):
-        """Calculate leave duration in days"""
-        return (self.end_date - self.start_date).days + 1
+        """Working days the leave takes out of the balance, without weekends and holidays"""
+        return working_days(self.start_date, self.end_date)
 
 
 class LeaveBalance(models.Model):
@@ -78,6 +97,51 @@ class LeaveBalance(models.Model):
         verbose_name_plural = "Leave Balances"
 
 
+class LeaveLedgerEntry(models.Model):
+    """
+    One movement of an employee's leave balance; never changed once written.
+
+    Accruals add to ``total_balance``, debits add to ``used_balance`` and a
+    reversal takes a debit back out. ``LeaveBalance`` is the running sum of
+    these rows, kept in step by ``leave.ledger``.
+    """
+    KIND_CHOICES = [
+        ('accrual', 'Accrual'),
+        ('debit', 'Debit'),
+        ('reversal', 'Reversal'),
+    ]
+    
+    employee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leave_ledger')
+    leave_type = models.ForeignKey(LeaveType, on_delete=models.PROTECT)
+    year = models.IntegerField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    days = models.PositiveIntegerField()
+    leave_request = models.ForeignKey(LeaveRequest, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries')
+    reverses = models.OneToOneField('self', on_delete=models.CASCADE, null=True, blank=True, related_name='reversed_by')
+    note = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.employee.username} {self.kind} {self.days} {self.leave_type.name} ({self.year})"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError("Ledger entries cannot be changed; post a reversal instead.")
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Ledger entries cannot be deleted; post a reversal instead.")
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Balance order: every entry of one balance together, oldest first
+            models.Index(fields=['employee', 'leave_type', 'year', 'id'], name='leave_ledger_balance_idx'),
+        ]
+        verbose_name_plural = "Leave Ledger Entries"
+
+
 class LeaveEmailLog(models.Model):
     """Log for tracking sent leave emails"""
     EMAIL_TYPE_CHOICES = [
@@ -99,4 +163,7 @@ class LeaveEmailLog(models.Model):
     
     class Meta:
         ordering = ['-sent_at']
+        indexes = [
+            models.Index(fields=['sent_at', 'status'], name='leave_log_sent_idx'),
+        ]
         verbose_name_plural = "Leave Email Logs"
@@ -0,0 +1,176 @@
+"""
+How many people of a department are away at once, answered in O(log days).
+
+Each department's approved leave is loaded into a ``DayTree``: a segment tree
+over days that adds one to every day of a leave and keeps, for every node,
+the busiest day beneath it. "Most people away on any day from X to Y" then
+touches two root-to-leaf paths instead of every approved leave.
+
+Trees are built the first time a department is asked about and kept in
+process memory. ``leave.signals`` updates them in place when a request is
+approved, rejected, cancelled or deleted. Every change also bumps a counter
+in the default cache, so other processes notice their copy is stale and
+rebuild it on next use rather than answer from old data. That needs the
+default cache to be shared between processes (Redis, see ``CACHES``).
+"""
+import secrets
+import threading
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+
+from users.models import UserRole
+from .models import LeaveRequest
+
+_lock = threading.RLock()
+# department -> (version, DayTree)
+_trees = {}
+
+
+class DayTree:
+    """Per-day counts with range add and range maximum, nodes made on demand"""
+    ORIGIN = date(1900, 1, 1)
+    SIZE = 1 << 17  # days, to the year 2258
+
+    def __init__(self):
+        # Node 0 is the root, so a child index of 0 means "not made yet".
+        # _add holds what was added to a node's whole range; _peak is the
+        # busiest day under the node including its own _add.
+        self._add = [0]
+        self._peak = [0]
+        self._children = [[0, 0]]
+
+    def _day(self, day):
+        return min(max((day - self.ORIGIN).days, 0), self.SIZE - 1)
+
+    def add(self, start, end, delta=1):
+        self._update(0, 0, self.SIZE - 1, self._day(start), self._day(end), delta)
+
+    def peak(self, start, end):
+        """Highest count on any day from ``start`` to ``end`` inclusive"""
+        return self._query(0, 0, self.SIZE - 1, self._day(start), self._day(end))
+
+    def _update(self, node, left, right, low, high, delta):
+        if low <= left and right <= high:
+            self._add[node] += delta
+            self._peak[node] += delta
+            return
+        middle = (left + right) // 2
+        children = self._children[node]
+        for side, (first, last) in enumerate(((left, middle), (middle + 1, right))):
+            if low <= last and first <= high:
+                if not children[side]:
+                    children[side] = len(self._add)
+                    self._add.append(0)
+                    self._peak.append(0)
+                    self._children.append([0, 0])
+                self._update(children[side], first, last, low, high, delta)
+        self._peak[node] = self._add[node] + max(self._peak[child] if child else 0 for child in children)
+
+    def _query(self, node, left, right, low, high):
+        if low <= left and right <= high:
+            return self._peak[node]
+        middle = (left + right) // 2
+        best = 0
+        for child, first, last in ((self._children[node][0], left, middle), (self._children[node][1], middle + 1, right)):
+            if child and low <= last and first <= high:
+                best = max(best, self._query(child, first, last, low, high))
+        return self._add[node] + best
+
+
+def _version_key(department):
+    return f'leave:overlap:{department}'
+
+
+def _version(department):
+    key = _version_key(department)
+    version = cache.get(key)
+    if version is None:
+        # Start from an arbitrary number so a counter lost from the cache
+        # never comes back equal to a version some process still holds
+        cache.add(key, secrets.randbits(48), None)
+        version = cache.get(key)
+    return version
+
+
+def build(department):
+    """A fresh ``DayTree`` of the department's approved leave"""
+    tree = DayTree()
+    leaves = LeaveRequest.objects.filter(
+        status='approved', employee__role_profile__department=department
+    ).values_list('start_date', 'end_date')
+    for start, end in leaves.iterator(chunk_size=2000):
+        tree.add(start, end)
+    return tree
+
+
+def department_tree(department):
+    """The department's ``DayTree``, rebuilt only if another process changed it"""
+    version = _version(department)
+    with _lock:
+        cached = _trees.get(department)
+        if cached and cached[0] == version:
+            return cached[1]
+    tree = build(department)
+    with _lock:
+        _trees[department] = (version, tree)
+    return tree
+
+
+def peak_absent(department, start, end):
+    """Most people of ``department`` on approved leave on any day from ``start`` to ``end``"""
+    if not department:
+        return 0
+    tree = department_tree(department)
+    with _lock:
+        return tree.peak(start, end)
+
+
+def headcount(department):
+    return UserRole.objects.filter(department=department).count() if department else 0
+
+
+def absence_limit(headcount):
+    """How many of ``headcount`` people may be away on the same day"""
+    return max(1, int(headcount * getattr(settings, 'LEAVE_MAX_ABSENT_SHARE', 0.25)))
+
+
+def record(department, start, end, delta):
+    """
+    Apply one approved leave entering (``delta=1``) or leaving (``-1``) the index.
+
+    Call after the change is committed. The local tree is updated in place
+    when it was current; if another process changed the department since,
+    it is dropped and rebuilt on next use.
+    """
+    record_many(department, [(start, end)], delta)
+
+
+def record_many(department, spans, delta):
+    """``record`` for several ``(start, end)`` spans as one version change"""
+    if not department:
+        return
+    key = _version_key(department)
+    with _lock:
+        cached = _trees.pop(department, None)
+        try:
+            version = cache.incr(key)
+        except ValueError:
+            return
+        if cached and cached[0] == version - 1:
+            for start, end in spans:
+                cached[1].add(start, end, delta)
+            _trees[department] = (version, cached[1])
+
+
+def invalidate(department):
+    """Force every process to rebuild ``department`` on next use"""
+    if not department:
+        return
+    with _lock:
+        _trees.pop(department, None)
+        try:
+            cache.incr(_version_key(department))
+        except ValueError:
+            pass
@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import UserRole
+from . import ledger, overlap
+from .models import LeaveRequest
+
+
+def _approved_span(instance):
+    """(start, end) while ``instance`` counts as approved leave, else None"""
+    # Read from __dict__ so deferred fields are not fetched one row at a time
+    values = instance.__dict__
+    if values.get('status') != 'approved':
+        return None
+    return values.get('start_date'), values.get('end_date')
+
+
+def _department(user_id):
+    return UserRole.objects.filter(user_id=user_id).values_list('department', flat=True).first()
+
+
+@receiver(post_init, sender=LeaveRequest)
+def remember_approved_span(sender, instance, **kwargs):
+    instance._approved_span = _approved_span(instance)
+
+
+@receiver(post_save, sender=LeaveRequest)
+def approval_changed(sender, instance, created, **kwargs):
+    """
+    Charge or refund the balance and move the request in or out of its
+    department's overlap index when it becomes, stops being or moves as
+    approved leave
+    """
+    before = None if created else instance._approved_span
+    after = _approved_span(instance)
+    instance._approved_span = after
+    if before == after:
+        return
+    
+    # In the saving transaction, so the balance moves with the status
+    if before:
+        ledger.reverse(instance, note=f'Leave {instance.status}' if not after else 'Leave dates changed')
+    if after:
+        ledger.debit(instance, by=instance.approved_by)
+    
+    department = _department(instance.employee_id)
+
+    def apply():
+        if before:
+            overlap.record(department, *before, -1)
+        if after:
+            overlap.record(department, *after, 1)
+
+    transaction.on_commit(apply)
+
+
+def _deleting_leave(origin):
+    """Whether a delete started from leave requests rather than cascading from their employee"""
+    if isinstance(origin, QuerySet):
+        return origin.model is LeaveRequest
+    return isinstance(origin, LeaveRequest)
+
+
+@receiver(pre_delete, sender=LeaveRequest)
+def refund_deleted_leave(sender, instance, origin=None, **kwargs):
+    # A cascade from a deleted user takes their ledger with it; a reversal
+    # written now would be left pointing at the deleted user
+    if instance._approved_span and _deleting_leave(origin):
+        ledger.reverse(instance, note='Leave deleted', deleting=True)
+
+
+@receiver(post_delete, sender=LeaveRequest)
+def remove_from_overlap_index(sender, instance, **kwargs):
+    span = instance._approved_span
+    if span:
+        department = _department(instance.employee_id)
+        transaction.on_commit(lambda: overlap.record(department, *span, -1))
+
+
+@receiver(post_init, sender=UserRole)
+def remember_department(sender, instance, **kwargs):
+    instance._overlap_department = instance.__dict__.get('department')
+
+
+@receiver(post_save, sender=UserRole)
+def move_department(sender, instance, **kwargs):
+    """Someone changing department moves their leave between two indexes"""
+    before, after = instance._overlap_department, instance.department
+    instance._overlap_department = after
+    if before != after:
+        transaction.on_commit(lambda: (overlap.invalidate(before), overlap.invalidate(after)))
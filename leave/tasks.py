@@ -1,148 +1,147 @@
+import logging
+
 from celery import shared_task
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
 from django.utils import timezone
 from datetime import timedelta
 from .models import LeaveRequest, LeaveEmailLog
 from users.models import UserRole
+from notifications.delivery import EmailBatch, build_email
+from notifications.logbuffer import write_log
+from notifications.outbox import enqueue, enqueue_many
+
+logger = logging.getLogger(__name__)
+
+
+def _enqueue(leave_request, message, email_type):
+    """Write the email to the outbox; the dispatcher logs it once delivered"""
+    enqueue(
+        message,
+        email_type,
+        log_model=LeaveEmailLog,
+        log_fields={'leave_request_id': leave_request.id, 'recipient_email': ','.join(message.to)},
+    )
+
+
+def queue_leave_request_notification(leave_request):
+    """Queue the new leave request email to the employee's manager"""
+    employee = leave_request.employee
+    manager = employee.role_profile.manager
+    
+    if not manager or not manager.email:
+        return
+    
+    subject = f"New Leave Request from {employee.get_full_name()}"
+    context = {
+        'manager_name': manager.get_full_name() or manager.username,
+        'employee_name': employee.get_full_name() or employee.username,
+        'leave_type': leave_request.leave_type.name,
+        'start_date': leave_request.start_date,
+        'end_date': leave_request.end_date,
+        'reason': leave_request.reason,
+        'duration': leave_request.get_duration_days(),
+    }
+    
+    message = build_email(subject, 'emails/leave_request_submitted.html', context, [manager.email])
+    _enqueue(leave_request, message, 'request_submitted')
+
+
+def _approval_email(leave_request):
+    employee = leave_request.employee
+    
+    if not employee.email:
+        logger.warning('Employee %s has no email address', employee.username)
+        return None
+    
+    subject = "Your Leave Request Has Been Approved"
+    context = {
+        'employee_name': employee.get_full_name() or employee.username,
+        'leave_type': leave_request.leave_type.name,
+        'start_date': leave_request.start_date,
+        'end_date': leave_request.end_date,
+        'approved_by': leave_request.approved_by.get_full_name() if leave_request.approved_by else 'HR',
+    }
+    
+    return build_email(subject, 'emails/leave_approved.html', context, [employee.email])
+
+
+def _rejection_email(leave_request):
+    employee = leave_request.employee
+    
+    if not employee.email:
+        return None
+    
+    subject = "Your Leave Request Has Been Rejected"
+    context = {
+        'employee_name': employee.get_full_name() or employee.username,
+        'leave_type': leave_request.leave_type.name,
+        'start_date': leave_request.start_date,
+        'end_date': leave_request.end_date,
+        'rejection_reason': leave_request.rejection_reason,
+    }
+    
+    return build_email(subject, 'emails/leave_rejected.html', context, [employee.email])
+
+
+_DECISION_EMAILS = {
+    'approved': _approval_email,
+    'rejected': _rejection_email,
+}
+
+
+def queue_leave_approval_notification(leave_request):
+    """Queue the approval email to the employee"""
+    message = _approval_email(leave_request)
+    if message:
+        _enqueue(leave_request, message, 'approved')
+
+
+def queue_leave_rejection_notification(leave_request):
+    """Queue the rejection email to the employee"""
+    message = _rejection_email(leave_request)
+    if message:
+        _enqueue(leave_request, message, 'rejected')
+
+
+def queue_leave_decision_notifications(leave_requests):
+    """Queue approval or rejection emails for many decided requests in one outbox write"""
+    items = []
+    for leave_request in leave_requests:
+        message = _DECISION_EMAILS[leave_request.status](leave_request)
+        if message:
+            items.append((
+                message,
+                leave_request.status,
+                LeaveEmailLog,
+                {'leave_request_id': leave_request.id, 'recipient_email': ','.join(message.to)},
+            ))
+    enqueue_many(items)
 
 
 @shared_task
 def send_leave_request_notification(leave_request_id):
     """Send email when a leave request is submitted"""
     try:
-        leave_request = LeaveRequest.objects.get(id=leave_request_id)
-        employee = leave_request.employee
-        manager = employee.role_profile.manager
-        
-        if not manager or not manager.email:
-            return
-        
-        subject = f"New Leave Request from {employee.get_full_name()}"
-        context = {
-            'manager_name': manager.get_full_name() or manager.username,
-            'employee_name': employee.get_full_name() or employee.username,
-            'leave_type': leave_request.leave_type.name,
-            'start_date': leave_request.start_date,
-            'end_date': leave_request.end_date,
-            'reason': leave_request.reason,
-            'duration': leave_request.get_duration_days(),
-        }
-        
-        html_message = render_to_string('emails/leave_request_submitted.html', context)
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email='noreply@emailintegration.com',
-            to=[manager.email],
-        )
-        email.content_subtype = 'html'
-        
-        email.send(fail_silently=False)
-        
-        LeaveEmailLog.objects.create(
-            leave_request=leave_request,
-            email_type='request_submitted',
-            recipient_email=manager.email,
-            status='sent'
-        )
-    except Exception as e:
-        print(f"Error sending leave request notification: {e}")
+        queue_leave_request_notification(LeaveRequest.objects.get(id=leave_request_id))
+    except Exception:
+        logger.exception('Error sending leave request notification for %s', leave_request_id)
 
 
 @shared_task
 def send_leave_approval_notification(leave_request_id):
     """Send email when a leave request is approved"""
     try:
-        print(f"\n{'='*60}")
-        print(f"SENDING LEAVE APPROVAL EMAIL FOR REQUEST ID: {leave_request_id}")
-        print(f"{'='*60}\n")
-        
-        leave_request = LeaveRequest.objects.get(id=leave_request_id)
-        employee = leave_request.employee
-        
-        if not employee.email:
-            print(f"ERROR: Employee {employee.username} has no email address!")
-            return
-        
-        subject = "Your Leave Request Has Been Approved"
-        context = {
-            'employee_name': employee.get_full_name() or employee.username,
-            'leave_type': leave_request.leave_type.name,
-            'start_date': leave_request.start_date,
-            'end_date': leave_request.end_date,
-            'approved_by': leave_request.approved_by.get_full_name() if leave_request.approved_by else 'HR',
-        }
-        
-        print(f"Context: {context}")
-        
-        html_message = render_to_string('emails/leave_approved.html', context)
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email='noreply@emailintegration.com',
-            to=[employee.email],
-        )
-        email.content_subtype = 'html'
-        
-        email.send(fail_silently=False)
-        print(f"EMAIL SENT SUCCESSFULLY TO: {employee.email}")
-        
-        LeaveEmailLog.objects.create(
-            leave_request=leave_request,
-            email_type='approved',
-            recipient_email=employee.email,
-            status='sent'
-        )
-        print(f"{'='*60}\n")
-    except Exception as e:
-        print(f"ERROR sending leave approval notification: {e}")
-        import traceback
-        traceback.print_exc()
-        print(f"{'='*60}\n")
+        queue_leave_approval_notification(LeaveRequest.objects.get(id=leave_request_id))
+    except Exception:
+        logger.exception('Error sending leave approval notification for %s', leave_request_id)
 
 
 @shared_task
 def send_leave_rejection_notification(leave_request_id):
     """Send email when a leave request is rejected"""
     try:
-        leave_request = LeaveRequest.objects.get(id=leave_request_id)
-        employee = leave_request.employee
-        
-        if not employee.email:
-            return
-        
-        subject = "Your Leave Request Has Been Rejected"
-        context = {
-            'employee_name': employee.get_full_name() or employee.username,
-            'leave_type': leave_request.leave_type.name,
-            'start_date': leave_request.start_date,
-            'end_date': leave_request.end_date,
-            'rejection_reason': leave_request.rejection_reason,
-        }
-        
-        html_message = render_to_string('emails/leave_rejected.html', context)
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email='noreply@emailintegration.com',
-            to=[employee.email],
-        )
-        email.content_subtype = 'html'
-        
-        email.send(fail_silently=False)
-        
-        LeaveEmailLog.objects.create(
-            leave_request=leave_request,
-            email_type='rejected',
-            recipient_email=employee.email,
-            status='sent'
-        )
-    except Exception as e:
-        print(f"Error sending leave rejection notification: {e}")
+        queue_leave_rejection_notification(LeaveRequest.objects.get(id=leave_request_id))
+    except Exception:
+        logger.exception('Error sending leave rejection notification for %s', leave_request_id)
 
 
 @shared_task
@@ -156,41 +155,27 @@ def send_leave_reminder_before():
         start_date=tomorrow
     )
     
-    for leave_request in upcoming_leaves:
-        employee = leave_request.employee
-        
-        if not employee.email:
-            continue
-        
-        subject = "Leave Starts Tomorrow"
-        context = {
-            'employee_name': employee.get_full_name() or employee.username,
-            'leave_type': leave_request.leave_type.name,
-            'start_date': leave_request.start_date,
-            'end_date': leave_request.end_date,
-        }
-        
-        html_message = render_to_string('emails/leave_reminder_before.html', context)
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email='noreply@emailintegration.com',
-            to=[employee.email],
-        )
-        email.content_subtype = 'html'
-        
-        try:
-            email.send(fail_silently=False)
+    with EmailBatch() as batch:
+        for leave_request in upcoming_leaves:
+            employee = leave_request.employee
+            
+            if not employee.email:
+                continue
             
-            LeaveEmailLog.objects.create(
-                leave_request=leave_request,
-                email_type='reminder_before',
-                recipient_email=employee.email,
-                status='sent'
+            subject = "Leave Starts Tomorrow"
+            context = {
+                'employee_name': employee.get_full_name() or employee.username,
+                'leave_type': leave_request.leave_type.name,
+                'start_date': leave_request.start_date,
+                'end_date': leave_request.end_date,
+            }
+            
+            message = build_email(subject, 'emails/leave_reminder_before.html', context, [employee.email])
+            batch.add(
+                message,
+                on_sent=_logger(leave_request, 'reminder_before', employee.email),
+                on_failed=_logger(leave_request, 'reminder_before', employee.email, status='failed'),
             )
-        except Exception as e:
-            print(f"Error sending leave reminder: {e}")
 
 
 @shared_task
@@ -204,37 +189,34 @@ def send_leave_reminder_after():
         end_date=yesterday
     )
     
-    for leave_request in completed_leaves:
-        employee = leave_request.employee
-        manager = employee.role_profile.manager
-        
-        if not employee.email:
-            continue
-        
-        subject = "Welcome Back!"
-        context = {
-            'employee_name': employee.get_full_name() or employee.username,
-            'leave_type': leave_request.leave_type.name,
-        }
-        
-        html_message = render_to_string('emails/leave_reminder_after.html', context)
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email='noreply@emailintegration.com',
-            to=[employee.email],
-        )
-        email.content_subtype = 'html'
-        
-        try:
-            email.send(fail_silently=False)
+    with EmailBatch() as batch:
+        for leave_request in completed_leaves:
+            employee = leave_request.employee
+            
+            if not employee.email:
+                continue
             
-            LeaveEmailLog.objects.create(
-                leave_request=leave_request,
-                email_type='reminder_after',
-                recipient_email=employee.email,
-                status='sent'
+            subject = "Welcome Back!"
+            context = {
+                'employee_name': employee.get_full_name() or employee.username,
+                'leave_type': leave_request.leave_type.name,
+            }
+            
+            message = build_email(subject, 'emails/leave_reminder_after.html', context, [employee.email])
+            batch.add(
+                message,
+                on_sent=_logger(leave_request, 'reminder_after', employee.email),
+                on_failed=_logger(leave_request, 'reminder_after', employee.email, status='failed'),
             )
-        except Exception as e:
-            print(f"Error sending leave after reminder: {e}")
+
+
+def _logger(leave_request, email_type, recipient_email, status='sent'):
+    """Return a callback that logs an email for this request as delivered or failed"""
+    def log(exc=None):
+        write_log(LeaveEmailLog(
+            leave_request=leave_request,
+            email_type=email_type,
+            recipient_email=recipient_email,
+            status=status
+        ))
+    return log
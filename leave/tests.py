@@ -1,3 +1,250 @@
-from django.test import TestCase
+import random
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from holidays import workdays
+from users.models import EmployeeProfile, UserRole
+from . import ledger, overlap
+from .models import LeaveBalance, LeaveLedgerEntry, LeaveRequest, LeaveType
+
+MONDAY = date(2030, 6, 3)
+
+
+def reset_caches():
+    cache.clear()
+    workdays._calendars.clear()
+    workdays.recheck()
+    overlap._trees.clear()
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.employee = User.objects.create(username='alice', email='alice@example.com')
+        self.vacation = LeaveType.objects.create(name='Vacation')
+        ledger.accrue(self.employee, self.vacation, MONDAY.year, 20)
+
+    def balance(self, leave_type=None):
+        return LeaveBalance.objects.get(employee=self.employee, leave_type=leave_type or self.vacation, year=MONDAY.year)
+
+    def request(self, start=MONDAY, end=MONDAY + timedelta(days=6), status='approved'):
+        return LeaveRequest.objects.create(
+            employee=self.employee, leave_type=self.vacation, start_date=start, end_date=end,
+            reason='Holiday', status=status,
+        )
+
+    def test_accrual_adds_to_the_allowance(self):
+        self.assertEqual((self.balance().total_balance, self.balance().used_balance), (20, 0))
+
+    def test_approving_debits_working_days(self):
+        leave_request = self.request()
+        self.assertEqual(self.balance().used_balance, 5)
+        debit = LeaveLedgerEntry.objects.get(kind='debit')
+        self.assertEqual((debit.leave_request, debit.days), (leave_request, 5))
+
+    def test_a_request_is_debited_once(self):
+        leave_request = self.request()
+        self.assertIsNone(ledger.debit(leave_request))
+        self.assertEqual(self.balance().used_balance, 5)
+
+    def test_rejecting_approved_leave_reverses_its_debit(self):
+        leave_request = self.request()
+        leave_request.status = 'rejected'
+        leave_request.save()
+        self.assertEqual(self.balance().used_balance, 0)
+        reversal = LeaveLedgerEntry.objects.get(kind='reversal')
+        self.assertEqual(reversal.reverses, LeaveLedgerEntry.objects.get(kind='debit'))
+
+    def test_moving_approved_leave_recharges_it(self):
+        leave_request = self.request()
+        leave_request.end_date = MONDAY + timedelta(days=1)
+        leave_request.save()
+        self.assertEqual(self.balance().used_balance, 2)
+
+    def test_deleting_leave_refunds_it(self):
+        self.request().delete()
+        self.assertEqual(self.balance().used_balance, 0)
+        self.assertTrue(LeaveLedgerEntry.objects.filter(kind='reversal', leave_request__isnull=True).exists())
+
+    def test_deleting_the_employee_takes_their_ledger(self):
+        self.request()
+        self.employee.delete()
+        self.assertFalse(LeaveLedgerEntry.objects.exists())
+
+    def test_first_debit_opens_the_balance_from_the_profile_allowance(self):
+        sick = LeaveType.objects.create(name='Sick')
+        EmployeeProfile.objects.create(user=self.employee, employee_id='E1', date_of_joining=MONDAY, leave_balance=12)
+        LeaveRequest.objects.create(
+            employee=self.employee, leave_type=sick, start_date=MONDAY, end_date=MONDAY,
+            reason='Flu', status='approved',
+        )
+        self.assertEqual((self.balance(sick).total_balance, self.balance(sick).used_balance), (12, 1))
+
+    def test_debit_requests_matches_one_by_one_debits(self):
+        other = User.objects.create(username='bob', email='bob@example.com')
+        pending = [
+            self.request(status='pending'),
+            LeaveRequest.objects.create(
+                employee=other, leave_type=self.vacation, start_date=MONDAY, end_date=MONDAY + timedelta(days=1),
+                reason='Trip', status='pending',
+            ),
+        ]
+        ledger.debit_requests(pending)
+        self.assertEqual(self.balance().used_balance, 5)
+        self.assertEqual(LeaveBalance.objects.get(employee=other).used_balance, 2)
+        self.assertEqual(ledger.debit_requests(pending), [])
+
+    def test_entries_cannot_be_changed_or_deleted(self):
+        entry = LeaveLedgerEntry.objects.get(kind='accrual')
+        with self.assertRaises(ValidationError):
+            entry.save()
+        with self.assertRaises(ValidationError):
+            entry.delete()
+
+    def test_reconcile_rewrites_balances_that_drifted_from_the_ledger(self):
+        self.request()
+        sick = LeaveType.objects.create(name='Sick')
+        LeaveBalance.objects.filter(employee=self.employee).update(total_balance=99, used_balance=0)
+        LeaveBalance.objects.create(employee=self.employee, leave_type=sick, year=MONDAY.year, total_balance=3)
+
+        self.assertEqual(ledger.reconcile(dry_run=True), (2, 2))
+        self.assertEqual(self.balance().total_balance, 99)
+
+        self.assertEqual(ledger.reconcile(), (2, 2))
+        self.assertEqual((self.balance().total_balance, self.balance().used_balance), (20, 5))
+        self.assertEqual(self.balance(sick).total_balance, 0)
+        self.assertEqual(ledger.reconcile(), (2, 0))
+
+    def test_reconcile_recreates_missing_balances(self):
+        LeaveBalance.objects.all().delete()
+        self.assertEqual(ledger.reconcile(), (1, 1))
+        self.assertEqual(self.balance().total_balance, 20)
+
+
+class LedgerBackfillMigrationTests(TransactionTestCase):
+    before = [('leave', '0004_leaverequest_span_days')]
+    after = [('leave', '0005_leaveledgerentry')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_opening_entries_sum_to_existing_balances(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old_apps = executor.loader.project_state(self.before).apps
+        OldUser = old_apps.get_model('auth', 'User')
+        OldLeaveType = old_apps.get_model('leave', 'LeaveType')
+        OldLeaveBalance = old_apps.get_model('leave', 'LeaveBalance')
+        employee = OldUser.objects.create(username='alice')
+        vacation = OldLeaveType.objects.create(name='Vacation')
+        sick = OldLeaveType.objects.create(name='Sick')
+        OldLeaveBalance.objects.create(employee=employee, leave_type=vacation, year=2030, total_balance=20, used_balance=3)
+        OldLeaveBalance.objects.create(employee=employee, leave_type=sick, year=2030, total_balance=0, used_balance=0)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+
+        entries = LeaveLedgerEntry.objects.order_by('kind').values_list('leave_type__name', 'kind', 'days')
+        self.assertEqual(list(entries), [('Vacation', 'accrual', 20), ('Vacation', 'debit', 3)])
+        self.assertEqual(ledger.reconcile(), (2, 0))
+
+
+class DayTreeTests(TestCase):
+    def test_peaks_match_a_day_by_day_count(self):
+        rng = random.Random(7)
+        tree = overlap.DayTree()
+        counts = {}
+        added = []
+        for _ in range(200):
+            # Leave only ever leaves the index after entering it
+            if added and rng.random() < 0.3:
+                start, end = added.pop(rng.randrange(len(added)))
+                delta = -1
+            else:
+                start = MONDAY + timedelta(days=rng.randrange(120))
+                end = start + timedelta(days=rng.randrange(15))
+                added.append((start, end))
+                delta = 1
+            tree.add(start, end, delta)
+            day = start
+            while day <= end:
+                counts[day] = counts.get(day, 0) + delta
+                day += timedelta(days=1)
+        for _ in range(200):
+            start = MONDAY + timedelta(days=rng.randrange(130))
+            end = start + timedelta(days=rng.randrange(30))
+            expected = max(
+                [counts.get(start + timedelta(days=offset), 0) for offset in range((end - start).days + 1)] + [0]
+            )
+            self.assertEqual(tree.peak(start, end), expected)
+
+
+class OverlapTests(TestCase):
+    def setUp(self):
+        reset_caches()
+        self.vacation = LeaveType.objects.create(name='Vacation')
+        self.team = []
+        for number in range(4):
+            user = User.objects.create(username=f'eng{number}', email=f'eng{number}@example.com')
+            UserRole.objects.filter(user=user).update(department='Engineering')
+            self.team.append(user)
+
+    def approve(self, employee, start, end):
+        with self.captureOnCommitCallbacks(execute=True):
+            return LeaveRequest.objects.create(
+                employee=employee, leave_type=self.vacation, start_date=start, end_date=end,
+                reason='Holiday', status='approved',
+            )
+
+    def test_peak_absent_counts_overlapping_approved_leave(self):
+        self.approve(self.team[0], MONDAY, MONDAY + timedelta(days=4))
+        self.approve(self.team[1], MONDAY + timedelta(days=3), MONDAY + timedelta(days=8))
+        LeaveRequest.objects.create(
+            employee=self.team[2], leave_type=self.vacation, start_date=MONDAY, end_date=MONDAY,
+            reason='Pending', status='pending',
+        )
+        self.assertEqual(overlap.peak_absent('Engineering', MONDAY, MONDAY + timedelta(days=2)), 1)
+        self.assertEqual(overlap.peak_absent('Engineering', MONDAY, MONDAY + timedelta(days=10)), 2)
+        self.assertEqual(overlap.peak_absent('Engineering', MONDAY + timedelta(days=9), MONDAY + timedelta(days=20)), 0)
+        self.assertEqual(overlap.peak_absent('Sales', MONDAY, MONDAY + timedelta(days=10)), 0)
+
+    def test_approval_and_rejection_update_a_built_index(self):
+        self.assertEqual(overlap.peak_absent('Engineering', MONDAY, MONDAY), 0)
+        leave_request = self.approve(self.team[0], MONDAY, MONDAY)
+        self.assertEqual(overlap.peak_absent('Engineering', MONDAY, MONDAY), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            leave_request.status = 'rejected'
+            leave_request.save()
+        self.assertEqual(overlap.peak_absent('Engineering', MONDAY, MONDAY), 0)
+
+    def test_record_many_updates_a_current_tree_in_place(self):
+        tree = overlap.department_tree('Engineering')
+        spans = [(MONDAY, MONDAY + timedelta(days=2)), (MONDAY + timedelta(days=1), MONDAY + timedelta(days=1))]
+        overlap.record_many('Engineering', spans, 1)
+        self.assertIs(overlap.department_tree('Engineering'), tree)
+        self.assertEqual(overlap.peak_absent('Engineering', MONDAY, MONDAY + timedelta(days=5)), 2)
+        overlap.record_many('Engineering', spans[:1], -1)
+        self.assertEqual(overlap.peak_absent('Engineering', MONDAY, MONDAY + timedelta(days=5)), 1)
+
+    def test_record_many_drops_a_tree_another_process_changed(self):
+        self.approve(self.team[0], MONDAY, MONDAY)
+        stale = overlap.department_tree('Engineering')
+        # Another process records a change: the shared version moves on
+        cache.incr(overlap._version_key('Engineering'))
+        overlap.record_many('Engineering', [(MONDAY, MONDAY)], 1)
+        self.assertIsNot(overlap.department_tree('Engineering'), stale)
+        # Rebuilt from the database, which only holds the one approval
+        self.assertEqual(overlap.peak_absent('Engineering', MONDAY, MONDAY), 1)
+
+    def test_absence_limit(self):
+        self.assertEqual(overlap.headcount('Engineering'), 4)
+        with self.settings(LEAVE_MAX_ABSENT_SHARE=0.5):
+            self.assertEqual(overlap.absence_limit(4), 2)
+        self.assertEqual(overlap.absence_limit(1), 1)
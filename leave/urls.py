@@ -4,8 +4,10 @@ from . import views
 urlpatterns = [
     path('request/', views.request_leave, name='request_leave'),
     path('requests/', views.leave_requests, name='leave_requests'),
+    path('requests/bulk/', views.bulk_leave_action, name='bulk_leave_action'),
     path('approve/<int:leave_id>/', views.approve_leave, name='approve_leave'),
     path('reject/<int:leave_id>/', views.reject_leave, name='reject_leave'),
     path('calendar/', views.leave_calendar, name='leave_calendar'),
+    path('overlap/', views.leave_overlap, name='leave_overlap'),
     path('balance/', views.leave_balance, name='leave_balance'),
 ]
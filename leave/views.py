@@ -2,15 +2,25 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from django.core.paginator import Paginator
-from django.db.models import F
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+from datetime import date, timedelta
 from .models import LeaveRequest, LeaveType, LeaveBalance
+from . import ledger, overlap
+from .calendar import leaves_in_window, month_window, occupancy, parse_window, weeks
 from .tasks import (
-    send_leave_request_notification,
-    send_leave_approval_notification,
-    send_leave_rejection_notification
+    queue_leave_request_notification,
+    queue_leave_approval_notification,
+    queue_leave_rejection_notification,
+    queue_leave_decision_notifications,
 )
 from users.models import UserRole
+from email_integration_system.pagination import KeysetPaginator
+
+# Most requests one bulk approve or reject may decide
+MAX_BULK_DECISIONS = 500
+PAGE_SIZES = ('10', '50', '200')
 
 
 @login_required(login_url='login')
@@ -28,18 +38,19 @@ def request_leave(request):
         try:
             leave_type = LeaveType.objects.get(id=leave_type_id)
             
-            # Create leave request
-            leave_request = LeaveRequest.objects.create(
-                employee=user,
-                leave_type=leave_type,
-                start_date=start_date,
-                end_date=end_date,
-                reason=reason,
-                status='pending'
-            )
-            
-            # Send notification to manager
-            send_leave_request_notification.delay(leave_request.id)
+            with transaction.atomic():
+                # Create leave request
+                leave_request = LeaveRequest.objects.create(
+                    employee=user,
+                    leave_type=leave_type,
+                    start_date=start_date,
+                    end_date=end_date,
+                    reason=reason,
+                    status='pending'
+                )
+                
+                # Notify manager via the outbox, committed with the request
+                queue_leave_request_notification(leave_request)
             
             messages.success(request, 'Leave request submitted successfully.')
             return redirect('leave_requests')
@@ -85,13 +96,22 @@ def leave_requests(request):
     if status_filter:
         leave_requests = leave_requests.filter(status=status_filter)
     
-    # Paginate
-    paginator = Paginator(leave_requests, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Larger pages let managers and HR decide many requests in one go
+    per_page = request.GET.get('per_page')
+    per_page = int(per_page) if per_page in PAGE_SIZES else 10
+    
+    # Paginate by (created_at, id) so later pages cost the same as the first
+    paginator = KeysetPaginator(
+        leave_requests.select_related('employee', 'leave_type'),
+        ('-created_at', '-id'),
+        per_page
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'page_obj': page_obj,
+        'per_page': per_page,
+        'can_decide': role_profile.role in ('manager', 'hr'),
         'status_filter': status_filter,
         'is_pending': status_filter == 'pending',
         'is_approved': status_filter == 'approved',
@@ -123,33 +143,33 @@ def approve_leave(request, leave_id):
             messages.info(request, 'This leave request is already approved.')
             return redirect('leave_requests')
 
-        leave_request.status = 'approved'
-        leave_request.approved_by = user
-        leave_request.save()
-
-        # Update leave balance
-        duration_days = leave_request.get_duration_days()
-        employee_profile = getattr(leave_request.employee, 'employee_profile', None)
-        default_total = employee_profile.leave_balance if employee_profile and employee_profile.leave_balance else 0
+        with transaction.atomic():
+            # Saving as approved debits the leave balance through the
+            # ledger (leave.signals) in this same transaction
+            leave_request.status = 'approved'
+            leave_request.approved_by = user
+            leave_request.save()
 
-        balance, created = LeaveBalance.objects.get_or_create(
-            employee=leave_request.employee,
-            leave_type=leave_request.leave_type,
-            year=leave_request.start_date.year,
-            defaults={'total_balance': default_total, 'used_balance': 0}
-        )
-        LeaveBalance.objects.filter(id=balance.id).update(
-            used_balance=F('used_balance') + duration_days
-        )
-
-        # Send approval notification
-        send_leave_approval_notification.delay(leave_request.id)
+            # Send approval notification
+            queue_leave_approval_notification(leave_request)
         
         messages.success(request, 'Leave request approved.')
         return redirect('leave_requests')
     
+    # Department staffing over the requested dates, with this request added
+    department = leave_request.employee.role_profile.department
+    people = overlap.headcount(department)
+    peak = overlap.peak_absent(department, leave_request.start_date, leave_request.end_date)
+    if leave_request.status != 'approved':
+        peak += 1
+    
     context = {
         'leave_request': leave_request,
+        'department': department,
+        'headcount': people,
+        'peak_absent': peak,
+        'absence_limit': overlap.absence_limit(people),
+        'short_staffed': bool(department) and peak > overlap.absence_limit(people),
     }
     
     return render(request, 'leave/approve_leave.html', context)
@@ -174,12 +194,13 @@ def reject_leave(request, leave_id):
     
     if request.method == 'POST':
         rejection_reason = request.POST.get('rejection_reason', '')
-        leave_request.status = 'rejected'
-        leave_request.rejection_reason = rejection_reason
-        leave_request.save()
-        
-        # Send rejection notification
-        send_leave_rejection_notification.delay(leave_request.id)
+        with transaction.atomic():
+            leave_request.status = 'rejected'
+            leave_request.rejection_reason = rejection_reason
+            leave_request.save()
+            
+            # Send rejection notification
+            queue_leave_rejection_notification(leave_request)
         
         messages.success(request, 'Leave request rejected.')
         return redirect('leave_requests')
@@ -191,18 +212,103 @@ def reject_leave(request, leave_id):
     return render(request, 'leave/reject_leave.html', context)
 
 
+@login_required(login_url='login')
+@require_http_methods(['POST'])
+def bulk_leave_action(request):
+    """Approve or reject many pending leave requests at once"""
+    user = request.user
+    role_profile = get_object_or_404(UserRole, user=user)
+    
+    if role_profile.role not in ('manager', 'hr'):
+        messages.error(request, 'You are not authorized to approve leave requests.')
+        return redirect('leave_requests')
+    
+    action = request.POST.get('action')
+    try:
+        leave_ids = sorted({int(leave_id) for leave_id in request.POST.getlist('leave_ids')})
+    except ValueError:
+        leave_ids = []
+    if action not in ('approve', 'reject') or not leave_ids:
+        messages.error(request, 'Select at least one leave request and an action.')
+        return redirect('leave_requests')
+    if len(leave_ids) > MAX_BULK_DECISIONS:
+        messages.error(request, f'Decide at most {MAX_BULK_DECISIONS} leave requests at a time.')
+        return redirect('leave_requests')
+    
+    status = 'approved' if action == 'approve' else 'rejected'
+    rejection_reason = request.POST.get('rejection_reason', '')
+    skipped = 0
+    with transaction.atomic():
+        # One query authorizes, locks and loads the whole selection
+        selected = list(
+            LeaveRequest.objects.select_for_update(of=('self',))
+            .filter(id__in=leave_ids)
+            .select_related('employee', 'employee__role_profile', 'leave_type')
+        )
+        if role_profile.role == 'manager':
+            outside = [
+                leave for leave in selected
+                if getattr(leave.employee, 'role_profile', None) is None
+                or leave.employee.role_profile.department != role_profile.department
+            ]
+            if outside or not role_profile.department:
+                messages.error(request, 'You are not authorized to decide some of the selected requests.')
+                return redirect('leave_requests')
+        
+        decided = [leave for leave in selected if leave.status == 'pending']
+        skipped = len(leave_ids) - len(decided)
+        if decided:
+            now = timezone.now()
+            changes = {'status': status, 'updated_at': now}
+            if status == 'approved':
+                changes['approved_by'] = user
+            else:
+                changes['rejection_reason'] = rejection_reason
+            updated = LeaveRequest.objects.filter(
+                id__in=[leave.id for leave in decided], status='pending'
+            ).update(**changes)
+            if updated != len(decided):
+                # Someone else decided part of the selection meanwhile
+                transaction.set_rollback(True)
+                messages.error(request, 'Some requests changed while you were deciding them. Please try again.')
+                return redirect('leave_requests')
+            
+            for leave in decided:
+                for field, value in changes.items():
+                    setattr(leave, field, value)
+            
+            # Queryset updates skip leave.signals, so do its work here
+            if status == 'approved':
+                ledger.debit_requests(decided, by=user)
+                spans = {}
+                for leave in decided:
+                    profile = getattr(leave.employee, 'role_profile', None)
+                    spans.setdefault(profile.department if profile else '', []).append((leave.start_date, leave.end_date))
+                
+                def index_approved():
+                    for department, department_spans in spans.items():
+                        overlap.record_many(department, department_spans, 1)
+                
+                transaction.on_commit(index_approved)
+            
+            queue_leave_decision_notifications(decided)
+    
+    if decided:
+        messages.success(request, f'{len(decided)} leave request(s) {status}.')
+    if skipped:
+        messages.info(request, f'{skipped} selected request(s) were no longer pending and were skipped.')
+    return redirect('leave_requests')
+
+
 @login_required(login_url='login')
 def leave_calendar(request):
-    """View team leave calendar"""
+    """View team leave calendar for one window of dates"""
     user = request.user
     role_profile = get_object_or_404(UserRole, user=user)
     
     if role_profile.role == 'employee':
         # Employee can see their own leaves
-        leaves = LeaveRequest.objects.filter(
-            employee=user,
-            status='approved'
-        )
+        leaves = LeaveRequest.objects.filter(employee=user)
     elif role_profile.role == 'manager':
         # Manager can see team leaves from same department
         if role_profile.department:
@@ -210,29 +316,34 @@ def leave_calendar(request):
                 department=role_profile.department,
                 role='employee'
             ).values_list('user', flat=True)
-            leaves = LeaveRequest.objects.filter(
-                employee__in=team_members,
-                status='approved'
-            )
+            leaves = LeaveRequest.objects.filter(employee__in=team_members)
         else:
             leaves = LeaveRequest.objects.none()
     elif role_profile.role == 'hr':
         # HR can see all leaves
-        leaves = LeaveRequest.objects.filter(status='approved')
+        leaves = LeaveRequest.objects.all()
     else:
         messages.error(request, 'You are not authorized to view this page.')
         return redirect('profile')
     
-    # Add duration calculation to each leave
-    from datetime import timedelta
-    leaves_with_duration = []
-    for leave in leaves:
-        duration = (leave.end_date - leave.start_date).days + 1  # +1 to include both start and end dates
-        leave.duration = duration
-        leaves_with_duration.append(leave)
+    today = timezone.now().date()
+    try:
+        start, end = parse_window(request.GET, today)
+    except ValueError as e:
+        messages.error(request, f'Invalid calendar range: {e}')
+        start, end = month_window(today.year, today.month)
+    
+    leaves = list(leaves_in_window(leaves, start, end))
+    previous_month = start.replace(day=1) - timedelta(days=1)
+    next_month = end.replace(day=28) + timedelta(days=4)
     
     context = {
-        'leaves': leaves_with_duration,
+        'leaves': leaves,
+        'window_start': start,
+        'window_end': end,
+        'weeks': weeks(occupancy(leaves, start, end)),
+        'previous_month': previous_month.strftime('%Y-%m'),
+        'next_month': next_month.strftime('%Y-%m'),
     }
     
     return render(request, 'leave/calendar.html', context)
@@ -261,3 +372,56 @@ def leave_balance(request):
     }
     
     return render(request, 'leave/balance.html', context)
+
+
+@login_required(login_url='login')
+@require_http_methods(['GET'])
+def leave_overlap(request):
+    """
+    Peak department absence over several date windows, as JSON.
+
+    ``?window=2025-07-01:2025-07-14&window=...`` (up to 100); HR picks the
+    department with ``?department=``, managers always get their own.
+    """
+    role_profile = get_object_or_404(UserRole, user=request.user)
+    if role_profile.role == 'manager':
+        department = role_profile.department
+    elif role_profile.role == 'hr':
+        department = request.GET.get('department', '')
+    else:
+        return JsonResponse({'error': 'You are not authorized to view leave planning.'}, status=403)
+    
+    if not department:
+        return JsonResponse({'error': 'A department is required.'}, status=400)
+    windows = request.GET.getlist('window')
+    if not windows or len(windows) > 100:
+        return JsonResponse({'error': 'Give between 1 and 100 window parameters.'}, status=400)
+    
+    try:
+        ranges = []
+        for window in windows:
+            start, end = (date.fromisoformat(value) for value in window.split(':'))
+            if end < start:
+                raise ValueError
+            ranges.append((start, end))
+    except ValueError:
+        return JsonResponse({'error': 'Windows look like YYYY-MM-DD:YYYY-MM-DD.'}, status=400)
+    
+    people = overlap.headcount(department)
+    limit = overlap.absence_limit(people)
+    results = []
+    for start, end in ranges:
+        peak = overlap.peak_absent(department, start, end)
+        results.append({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'peak_absent': peak,
+            'can_approve': max(limit - peak, 0),
+        })
+    
+    return JsonResponse({
+        'department': department,
+        'headcount': people,
+        'absence_limit': limit,
+        'windows': results,
+    })
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import TaskRunMetric
+
+
+@admin.register(TaskRunMetric)
+class TaskRunMetricAdmin(admin.ModelAdmin):
+    list_display = ['task_name', 'started_at', 'state', 'duration_ms', 'queue_lag_ms', 'emails_sent', 'emails_failed']
+    list_filter = ['state', 'task_name', 'queue', 'started_at']
+    search_fields = ['task_name', 'task_id']
+    date_hierarchy = 'started_at'
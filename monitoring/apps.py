@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from django.conf import settings
+        if getattr(settings, 'MONITORING_ENABLED', False):
+            from .instrumentation import instrument_templates
+            instrument_templates()
+        if getattr(settings, 'TASK_METRICS_ENABLED', False):
+            import monitoring.telemetry  # noqa: F401
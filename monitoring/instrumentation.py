@@ -0,0 +1,69 @@
+"""
+Per-request measurement hooks used by ``RequestMetricsMiddleware``.
+
+Nothing here costs anything for requests that are not sampled: the query
+wrapper is only installed around sampled requests, and the template hook
+returns straight away unless a sample is active in the current context.
+"""
+import time
+from contextvars import ContextVar
+
+from django.template.base import Template
+
+_active = ContextVar('monitoring_sample', default=None)
+
+
+class RequestSample:
+    """Counters for one sampled request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.duplicates = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self._template_depth = 0
+        self._seen_sql = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Execute wrapper: the same SQL text issued again with any parameters
+        # is counted as a duplicate, the signature of an N+1 lookup
+        if sql in self._seen_sql:
+            self.duplicates += 1
+        else:
+            self._seen_sql.add(sql)
+        self.queries += 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+
+    def activate(self):
+        return _active.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _active.reset(token)
+
+
+def instrument_templates():
+    """Time top-level ``Template.render`` calls; included templates count towards their parent"""
+    if getattr(Template.render, '_monitoring', False):
+        return
+    original = Template.render
+
+    def render(self, context):
+        sample = _active.get()
+        if sample is None:
+            return original(self, context)
+        sample._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            sample._template_depth -= 1
+            if not sample._template_depth:
+                sample.template_seconds += time.perf_counter() - started
+
+    render._monitoring = True
+    Template.render = render
@@ -0,0 +1,53 @@
+"""
+Per-queue wait times from recorded task runs.
+
+Only runs that came through a broker have a queue and a lag; eager runs in
+development leave both empty and are ignored here.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import TaskRunMetric
+from .store import percentile
+
+QUANTILES = (50, 95, 99)
+
+
+def lag_budgets():
+    """``{queue: seconds}`` a task may wait before its queue counts as backed up"""
+    return getattr(settings, 'TASK_QUEUE_LAG_BUDGETS', {})
+
+
+def queue_lag(minutes=15):
+    """``{queue: {'runs': n, 'p50': s, 'p95': s, 'p99': s, 'max': s}}`` over the last ``minutes``"""
+    since = timezone.now() - timedelta(minutes=minutes)
+    lags = {}
+    runs = (
+        TaskRunMetric.objects.filter(started_at__gte=since, queue_lag_ms__isnull=False)
+        .exclude(queue='')
+        .values_list('queue', 'queue_lag_ms')
+    )
+    for queue, lag_ms in runs.iterator():
+        lags.setdefault(queue, []).append(lag_ms / 1000)
+
+    report = {}
+    for queue, values in sorted(lags.items()):
+        values.sort()
+        stats = {'runs': len(values)}
+        for pct in QUANTILES:
+            stats[f'p{pct}'] = round(percentile(values, pct), 3)
+        stats['max'] = round(values[-1], 3)
+        report[queue] = stats
+    return report
+
+
+def over_budget(report, budgets=None):
+    """Queues whose 95th percentile wait exceeds their budget, as ``{queue: (p95, budget)}``"""
+    budgets = lag_budgets() if budgets is None else budgets
+    return {
+        queue: (stats['p95'], budgets[queue])
+        for queue, stats in report.items()
+        if queue in budgets and stats['p95'] > budgets[queue]
+    }
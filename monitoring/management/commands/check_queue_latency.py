@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.latency import lag_budgets, over_budget, queue_lag
+
+
+class Command(BaseCommand):
+    help = 'Report how long tasks waited in each Celery queue and fail if a queue is over its budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=15, help='Look at task runs started in the last N minutes')
+
+    def handle(self, *args, **options):
+        report = queue_lag(options['minutes'])
+        if not report:
+            self.stdout.write(f"No queued task runs in the last {options['minutes']} minutes.")
+            return
+
+        budgets = lag_budgets()
+        self.stdout.write(f"{'queue':<16}{'runs':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'budget':>10}")
+        for queue, stats in report.items():
+            budget = budgets.get(queue)
+            self.stdout.write(
+                f"{queue:<16}{stats['runs']:>8}{stats['p50']:>9.2f}s{stats['p95']:>9.2f}s"
+                f"{stats['p99']:>9.2f}s{stats['max']:>9.2f}s{(f'{budget}s' if budget else '-'):>10}"
+            )
+
+        late = over_budget(report, budgets)
+        if late:
+            raise CommandError('Queues over their wait budget: ' + ', '.join(
+                f'{queue} (p95 {p95:.2f}s > {budget}s)' for queue, (p95, budget) in late.items()
+            ))
+        self.stdout.write(self.style.SUCCESS('✓ All queues within budget'))
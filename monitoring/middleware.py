@@ -0,0 +1,54 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import store
+from .instrumentation import RequestSample
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, duplicate queries, DB time, template render time and
+    total latency per URL name for a sample of requests.
+
+    Off unless ``MONITORING_ENABLED``; when off Django drops the middleware
+    at startup. ``MONITORING_SAMPLE_RATE`` of requests are measured and the
+    rest pass straight through. Template time includes any queries the
+    templates trigger (lazy relations), which DB time also counts.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'MONITORING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'MONITORING_SAMPLE_RATE', 0.1)
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        sample = RequestSample()
+        token = sample.activate()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample))
+                response = self.get_response(request)
+        finally:
+            sample.deactivate(token)
+        total = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        store.record(match.view_name if match else '<unresolved>', {
+            'queries': sample.queries,
+            'duplicates': sample.duplicates,
+            'db_ms': round(sample.db_seconds * 1000, 2),
+            'template_ms': round(sample.template_seconds * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        })
+        return response
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskRunMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_name', models.CharField(max_length=200)),
+                ('task_id', models.CharField(blank=True, max_length=255)),
+                ('queue', models.CharField(blank=True, max_length=100)),
+                ('state', models.CharField(choices=[('success', 'Success'), ('failure', 'Failure'), ('retry', 'Retry')], default='success', max_length=20)),
+                ('started_at', models.DateTimeField()),
+                ('duration_ms', models.FloatField()),
+                ('queue_lag_ms', models.FloatField(blank=True, help_text='Time between enqueue and start; empty for eager runs', null=True)),
+                ('emails_attempted', models.PositiveIntegerField(default=0)),
+                ('emails_sent', models.PositiveIntegerField(default=0)),
+                ('emails_failed', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Task Run Metrics',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['task_name', 'started_at'], name='taskrun_name_started_idx'), models.Index(fields=['started_at'], name='taskrun_started_idx')],
+            },
+        ),
+    ]
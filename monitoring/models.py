@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class TaskRunMetric(models.Model):
+    """Timing and email throughput of one Celery task run"""
+    STATE_CHOICES = [
+        ('success', 'Success'),
+        ('failure', 'Failure'),
+        ('retry', 'Retry'),
+    ]
+
+    task_name = models.CharField(max_length=200)
+    task_id = models.CharField(max_length=255, blank=True)
+    queue = models.CharField(max_length=100, blank=True)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='success')
+    started_at = models.DateTimeField()
+    duration_ms = models.FloatField()
+    queue_lag_ms = models.FloatField(null=True, blank=True, help_text="Time between enqueue and start; empty for eager runs")
+    emails_attempted = models.PositiveIntegerField(default=0)
+    emails_sent = models.PositiveIntegerField(default=0)
+    emails_failed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.task_name} at {self.started_at:%Y-%m-%d %H:%M} ({self.state})"
+
+    @property
+    def emails_per_second(self):
+        if not self.duration_ms:
+            return 0.0
+        return self.emails_sent / (self.duration_ms / 1000)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['task_name', 'started_at'], name='taskrun_name_started_idx'),
+            models.Index(fields=['started_at'], name='taskrun_started_idx'),
+        ]
+        verbose_name_plural = "Task Run Metrics"
@@ -0,0 +1,77 @@
+"""
+Rolling per-view request samples kept in the cache.
+
+Each URL name holds its last ``MONITORING_WINDOW`` samples, so percentiles
+describe recent traffic rather than everything since the last deploy. With
+the default local-memory cache every worker process keeps its own window;
+point ``MONITORING_CACHE`` at a shared cache (Redis, Memcached) to pool them.
+Updates are read-modify-write, so concurrent writers can occasionally drop a
+sample, which is acceptable for sampled diagnostics.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+METRICS = ('queries', 'duplicates', 'db_ms', 'template_ms', 'total_ms')
+PERCENTILES = (50, 90, 99)
+
+_INDEX_KEY = 'monitoring:views'
+# Samples outlive quiet periods but do not pile up forever
+_TIMEOUT = 7 * 24 * 3600
+
+
+def _cache():
+    return caches[getattr(settings, 'MONITORING_CACHE', 'default')]
+
+
+def _window():
+    return getattr(settings, 'MONITORING_WINDOW', 500)
+
+
+def _key(view_name):
+    return f'monitoring:view:{view_name}'
+
+
+def record(view_name, sample):
+    """Append ``sample`` (a dict keyed by ``METRICS``) to ``view_name``'s window"""
+    cache = _cache()
+    samples = cache.get(_key(view_name), [])
+    samples.append(tuple(sample[metric] for metric in METRICS))
+    cache.set(_key(view_name), samples[-_window():], _TIMEOUT)
+
+    views = cache.get(_INDEX_KEY, set())
+    if view_name not in views:
+        views.add(view_name)
+        cache.set(_INDEX_KEY, views, _TIMEOUT)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    rank = max(1, -(-pct * len(values) // 100))
+    return values[rank - 1]
+
+
+def summary():
+    """``{view_name: {'samples': n, metric: {'p50': .., 'p90': .., 'p99': .., 'max': ..}}}``"""
+    cache = _cache()
+    views = sorted(cache.get(_INDEX_KEY, set()))
+    windows = cache.get_many([_key(view_name) for view_name in views])
+    report = {}
+    for view_name in views:
+        samples = windows.get(_key(view_name))
+        if not samples:
+            continue
+        stats = {'samples': len(samples)}
+        for position, metric in enumerate(METRICS):
+            values = sorted(sample[position] for sample in samples)
+            stats[metric] = {f'p{pct}': percentile(values, pct) for pct in PERCENTILES}
+            stats[metric]['max'] = values[-1]
+        report[view_name] = stats
+    return report
+
+
+def clear():
+    cache = _cache()
+    views = cache.get(_INDEX_KEY, set())
+    cache.delete_many([_key(view_name) for view_name in views] + [_INDEX_KEY])
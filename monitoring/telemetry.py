@@ -0,0 +1,111 @@
+"""
+Celery signal receivers that record every task run as a ``TaskRunMetric``.
+
+Publishing stamps an ``enqueued_at`` header so the worker can work out how
+long the message waited in the queue; eager runs are never published and
+leave the lag empty. Emails are counted from ``emails_delivered``, which the
+delivery layer sends after every attempt, and are credited to the innermost
+task running in the current context, so a dispatch task kicked eagerly from
+inside another task keeps its own counts.
+"""
+import logging
+import time
+import traceback
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+
+from celery.signals import before_task_publish, task_failure, task_postrun, task_prerun
+from django.dispatch import receiver
+
+from notifications.delivery import emails_delivered
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('monitoring_task_run', default=None)
+_runs = {}
+
+_STATES = {'SUCCESS': 'success', 'FAILURE': 'failure', 'RETRY': 'retry'}
+
+
+class TaskRun:
+    """Counters for one task run in progress"""
+
+    def __init__(self, enqueued_at=None):
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.queue_lag_ms = None
+        if enqueued_at:
+            self.queue_lag_ms = max(0.0, round((self.started_at - float(enqueued_at)) * 1000, 2))
+        self.sent = 0
+        self.failed = 0
+        self.error = ''
+        self.token = None
+
+
+def _enqueued_at(task):
+    request = task.request
+    value = getattr(request, 'enqueued_at', None)
+    if value is None:
+        value = (getattr(request, 'headers', None) or {}).get('enqueued_at')
+    return value
+
+
+@before_task_publish.connect
+def stamp_enqueued_at(sender=None, headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault('enqueued_at', time.time())
+
+
+@task_prerun.connect
+def start_run(sender=None, task_id=None, task=None, **kwargs):
+    run = TaskRun(_enqueued_at(task))
+    run.token = _current.set(run)
+    _runs[task_id] = run
+
+
+@receiver(emails_delivered)
+def count_emails(sender, sent=0, failed=0, **kwargs):
+    run = _current.get()
+    if run is not None:
+        run.sent += sent
+        run.failed += failed
+
+
+@task_failure.connect
+def note_failure(sender=None, task_id=None, exception=None, einfo=None, **kwargs):
+    run = _runs.get(task_id)
+    if run is not None:
+        run.error = str(einfo) if einfo else ''.join(traceback.format_exception_only(exception))
+
+
+@task_postrun.connect
+def finish_run(sender=None, task_id=None, task=None, state=None, **kwargs):
+    run = _runs.pop(task_id, None)
+    if run is None:
+        return
+    duration_ms = round((time.perf_counter() - run.started) * 1000, 2)
+    try:
+        _current.reset(run.token)
+    except ValueError:
+        # Reset from a different context than the one prerun ran in
+        _current.set(None)
+
+    from .models import TaskRunMetric
+    delivery_info = getattr(task.request, 'delivery_info', None) or {}
+    try:
+        TaskRunMetric.objects.create(
+            task_name=task.name,
+            task_id=task_id or '',
+            queue=delivery_info.get('routing_key') or '',
+            state=_STATES.get(state, 'failure'),
+            started_at=datetime.fromtimestamp(run.started_at, tz=dt_timezone.utc),
+            duration_ms=duration_ms,
+            queue_lag_ms=run.queue_lag_ms,
+            emails_attempted=run.sent + run.failed,
+            emails_sent=run.sent,
+            emails_failed=run.failed,
+            error=run.error[:5000],
+        )
+    except Exception as e:
+        # Telemetry must never take a task down with it
+        logger.warning('Could not record metrics for %s: %s', task.name, e)
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('requests/', views.request_metrics, name='request_metrics'),
+    path('metrics/', views.task_metrics, name='task_metrics'),
+]
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_http_methods
+
+from users.models import UserRole
+from . import store
+from .latency import QUANTILES, queue_lag
+from .models import TaskRunMetric
+
+
+@login_required(login_url='login')
+@require_http_methods(['GET', 'DELETE'])
+def request_metrics(request):
+    """Rolling per-view request percentiles as JSON; DELETE clears the window"""
+    role_profile = get_object_or_404(UserRole, user=request.user)
+    if role_profile.role != 'hr' and not request.user.is_staff:
+        messages.error(request, 'You are not authorized to view this page.')
+        return redirect('profile')
+    
+    if request.method == 'DELETE':
+        store.clear()
+        return JsonResponse({'cleared': True})
+    
+    # Slowest views first, by their 90th percentile latency
+    report = store.summary()
+    views = sorted(report.items(), key=lambda item: item[1]['total_ms']['p90'], reverse=True)
+    return JsonResponse({'views': dict(views)})
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _metric_lines(name, kind, help_text, samples):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    for labels, value in samples:
+        rendered = ','.join(f'{key}="{_label(val)}"' for key, val in labels.items())
+        lines.append(f'{name}{{{rendered}}} {value}')
+    return lines
+
+
+def _authorized_scrape(request):
+    token = getattr(settings, 'MONITORING_METRICS_TOKEN', '')
+    if not token:
+        return False
+    supplied = request.headers.get('Authorization', '')
+    return constant_time_compare(supplied, f'Bearer {token}')
+
+
+@require_http_methods(['GET'])
+def task_metrics(request):
+    """Celery task telemetry in the Prometheus text exposition format"""
+    if not _authorized_scrape(request):
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), login_url='login')
+        role_profile = get_object_or_404(UserRole, user=request.user)
+        if role_profile.role != 'hr' and not request.user.is_staff:
+            messages.error(request, 'You are not authorized to view this page.')
+            return redirect('profile')
+    
+    runs = TaskRunMetric.objects.values('task_name', 'state').annotate(runs=Count('id')).order_by('task_name', 'state')
+    totals = TaskRunMetric.objects.values('task_name').annotate(
+        runs=Count('id'),
+        seconds=Sum('duration_ms') / 1000,
+        sent=Sum('emails_sent'),
+        failed=Sum('emails_failed'),
+    ).order_by('task_name')
+    latest = TaskRunMetric.objects.filter(id=Subquery(
+        TaskRunMetric.objects.filter(task_name=OuterRef('task_name')).order_by('-started_at', '-id').values('id')[:1]
+    )).order_by('task_name')
+    
+    lines = []
+    lines += _metric_lines('hrms_task_runs_total', 'counter', 'Task runs by final state.',
+                           [({'task': row['task_name'], 'state': row['state']}, row['runs']) for row in runs])
+    lines += _metric_lines('hrms_task_emails_total', 'counter', 'Emails attempted by tasks, by outcome.',
+                           [({'task': row['task_name'], 'outcome': outcome}, row[outcome])
+                            for row in totals for outcome in ('sent', 'failed')])
+    lines += _metric_lines('hrms_task_duration_seconds_sum', 'counter', 'Total task run time.',
+                           [({'task': row['task_name']}, round(row['seconds'], 3)) for row in totals])
+    lines += _metric_lines('hrms_task_duration_seconds_count', 'counter', 'Task runs timed.',
+                           [({'task': row['task_name']}, row['runs']) for row in totals])
+    lines += _metric_lines('hrms_task_last_duration_seconds', 'gauge', 'Run time of the most recent run.',
+                           [({'task': run.task_name}, round(run.duration_ms / 1000, 3)) for run in latest])
+    lines += _metric_lines('hrms_task_last_emails_per_second', 'gauge', 'Emails sent per second in the most recent run.',
+                           [({'task': run.task_name}, round(run.emails_per_second, 2)) for run in latest])
+    lines += _metric_lines('hrms_task_last_queue_lag_seconds', 'gauge', 'Wait between enqueue and start of the most recent queued run.',
+                           [({'task': run.task_name}, round(run.queue_lag_ms / 1000, 3))
+                            for run in latest if run.queue_lag_ms is not None])
+    lines += _metric_lines('hrms_task_last_finished_timestamp_seconds', 'gauge', 'When the most recent run finished.',
+                           [({'task': run.task_name}, round(run.started_at.timestamp() + run.duration_ms / 1000, 3))
+                            for run in latest])
+    lines += _metric_lines('hrms_queue_lag_seconds', 'gauge', 'Wait between enqueue and start over the last 15 minutes, by queue.',
+                           [({'queue': queue, 'quantile': pct / 100}, stats[f'p{pct}'])
+                            for queue, stats in queue_lag().items() for pct in QUANTILES])
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,26 @@
+from django.contrib import admin
+from .models import EmailDeliveryLog, NotificationKey, OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['email_type', 'subject', 'status', 'attempts', 'available_at', 'sent_at']
+    list_filter = ['status', 'email_type', 'created_at']
+    search_fields = ['subject', 'recipients']
+    readonly_fields = ['created_at', 'sent_at', 'claimed_at', 'claim_token']
+
+
+@admin.register(EmailDeliveryLog)
+class EmailDeliveryLogAdmin(admin.ModelAdmin):
+    list_display = ['sent_at', 'source', 'email_type', 'status', 'recipients']
+    list_filter = ['source', 'status', 'email_type', 'month']
+    search_fields = ['recipients']
+    raw_id_fields = ['recipient']
+    date_hierarchy = 'sent_at'
+
+
+@admin.register(NotificationKey)
+class NotificationKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'claimed_at', 'sent_at', 'run_token']
+    search_fields = ['key']
+    readonly_fields = ['claimed_at', 'sent_at', 'run_token']
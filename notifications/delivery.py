@@ -0,0 +1,229 @@
+"""
+Shared email delivery engine.
+
+Every app's tasks.py builds its messages with ``build_email`` and hands them
+to an ``EmailBatch`` (bulk runs) or ``send_email`` (one-off notifications).
+Both check connections out of a per-process pool, so a run of reminders
+reuses a handful of SMTP sessions instead of doing a TLS handshake per email.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.signals import setting_changed
+from django.dispatch import Signal, receiver
+
+from .logbuffer import LogBuffer
+from .rendering import render
+
+logger = logging.getLogger(__name__)
+
+EMAIL_FROM = 'noreply@emailintegration.com'
+
+# Sent after every delivery attempt with ``sent`` and ``failed`` counts, so
+# callers such as task telemetry can tally emails without wrapping batches
+emails_delivered = Signal()
+
+
+def _pool_size():
+    return getattr(settings, 'EMAIL_POOL_SIZE', 4)
+
+
+def _batch_size():
+    return getattr(settings, 'EMAIL_BATCH_SIZE', 100)
+
+
+def _idle_timeout():
+    return getattr(settings, 'EMAIL_POOL_IDLE_TIMEOUT', 60)
+
+
+class ConnectionPool:
+    """Keep up to ``size`` open email backend connections for reuse."""
+
+    def __init__(self, size=None, backend=None):
+        self.size = size or _pool_size()
+        self.backend = backend
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        with self._lock:
+            while self._idle:
+                connection, last_used = self._idle.pop()
+                if time.monotonic() - last_used < _idle_timeout():
+                    return connection, True
+                self._close(connection)
+        connection = get_connection(self.backend, fail_silently=False)
+        connection.open()
+        return connection, False
+
+    def _checkin(self, connection):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        self._close(connection)
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            logger.debug('Ignoring error while closing email connection', exc_info=True)
+
+    def send(self, messages):
+        """
+        Send ``messages`` over pooled connections.
+
+        Returns a list of ``(message, error)`` pairs in input order, ``error``
+        being ``None`` for delivered messages. A failed message does not abort
+        the rest of the batch; the connection is replaced and sending resumes.
+        """
+        results = []
+        pending = list(messages)
+        while pending:
+            try:
+                connection, reused = self._checkout()
+            except Exception as exc:
+                results.extend((message, exc) for message in pending)
+                break
+            failed_at = None
+            for index, message in enumerate(pending):
+                try:
+                    connection.send_messages([message])
+                except Exception as exc:
+                    failed_at = index
+                    # An idle pooled connection may have been dropped by the
+                    # server; retry the message on another connection.
+                    if not (reused and index == 0):
+                        results.append((message, exc))
+                        failed_at += 1
+                    break
+                results.append((message, None))
+            if failed_at is None:
+                self._checkin(connection)
+                break
+            self._close(connection)
+            pending = pending[failed_at:]
+        return results
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._close(connection)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+@receiver(setting_changed)
+def _reset_pool(setting, **kwargs):
+    global _pool
+    if setting.startswith('EMAIL_') and _pool is not None:
+        _pool.close_all()
+        _pool = None
+
+
+def html_email(subject, html_message, recipients, from_email=EMAIL_FROM, attachments=None):
+    """Wrap already rendered HTML in an ``EmailMessage``"""
+    email = EmailMessage(
+        subject=subject,
+        body=html_message,
+        from_email=from_email,
+        to=list(recipients),
+    )
+    email.content_subtype = 'html'
+    for attachment in attachments or []:
+        if attachment:
+            email.attach_file(attachment)
+    return email
+
+
+def build_email(subject, template, context, recipients, from_email=EMAIL_FROM, attachments=None):
+    """Render ``template`` and return an HTML ``EmailMessage`` ready to send."""
+    html_message = render(template, context)
+    return html_email(subject, html_message, recipients, from_email=from_email, attachments=attachments)
+
+
+def send_email(message):
+    """Send a single message over a pooled connection, raising on failure."""
+    [(message, error)] = get_pool().send([message])
+    emails_delivered.send(sender=send_email, sent=int(error is None), failed=int(error is not None))
+    if error is not None:
+        raise error
+
+
+class EmailBatch:
+    """
+    Collect messages and deliver them in batches over pooled connections.
+
+    Callbacks run after each message is attempted: ``on_sent()`` on success
+    and ``on_failed(exc)`` on failure. Use as a context manager so whatever
+    is left in the buffer is flushed when the block exits; email logs the
+    callbacks write with ``write_log`` are buffered for the same block. With
+    a ``claim``, messages added with an idempotency ``key`` stamp or release
+    that key once attempted.
+    """
+
+    def __init__(self, batch_size=None, pool=None, claim=None):
+        self.batch_size = batch_size or _batch_size()
+        self.pool = pool or get_pool()
+        self.claim = claim
+        self.sent = 0
+        self.failed = 0
+        self._buffer = []
+        self.logs = LogBuffer()
+
+    def __enter__(self):
+        self.logs.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.flush()
+        finally:
+            self.logs.__exit__(exc_type, exc, tb)
+        return False
+
+    def add(self, message, on_sent=None, on_failed=None, key=None):
+        self._buffer.append((message, on_sent, on_failed, key))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        buffer, self._buffer = self._buffer, []
+        if not buffer:
+            return
+        results = self.pool.send([message for message, _, _, _ in buffer])
+        failed = sum(1 for _, error in results if error is not None)
+        emails_delivered.send(sender=EmailBatch, sent=len(results) - failed, failed=failed)
+        for (message, on_sent, on_failed, key), (_, error) in zip(buffer, results):
+            if error is None:
+                self.sent += 1
+                if key and self.claim:
+                    self.claim.mark_sent(key)
+                if on_sent:
+                    on_sent()
+            else:
+                self.failed += 1
+                logger.warning('Failed to send "%s" to %s: %s', message.subject, message.to, error)
+                if key and self.claim:
+                    self.claim.mark_failed(key)
+                if on_failed:
+                    on_failed(error)
+        if self.claim:
+            self.claim.settle()
@@ -0,0 +1,49 @@
+"""
+Split large periodic email jobs into chunks that run on any number of workers.
+
+A coordinator task picks the rows to work on, cuts their ids into contiguous
+ranges of ``EMAIL_FANOUT_CHUNK_SIZE`` and starts one chunk task per range as
+a chord; ``collect_fanout`` adds up the sent and failed counts the chunks
+return. Chunk tasks re-apply the coordinator's filter inside their range, so
+a row that stopped qualifying after the split is skipped rather than emailed.
+"""
+from celery import chord
+from django.conf import settings
+
+from .tasks import collect_fanout
+
+
+def chunk_size():
+    return getattr(settings, 'EMAIL_FANOUT_CHUNK_SIZE', 500)
+
+
+def id_ranges(queryset, size=None):
+    """``[(first_id, last_id), ...]`` covering every row of ``queryset`` in chunks of ``size``"""
+    size = size or chunk_size()
+    ranges = []
+    first = last = None
+    count = 0
+    for pk in queryset.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=10000):
+        if first is None:
+            first = pk
+        last = pk
+        count += 1
+        if count == size:
+            ranges.append((first, last))
+            first, count = None, 0
+    if first is not None:
+        ranges.append((first, last))
+    return ranges
+
+
+def fan_out(task, queryset, *args, size=None):
+    """
+    Run ``task(first_id, last_id, *args)`` for every id range of ``queryset``.
+
+    Chunk tasks must return ``{'sent': n, 'failed': n}``. Returns the number
+    of chunks started; the totals arrive in ``collect_fanout``.
+    """
+    ranges = id_ranges(queryset, size)
+    if ranges:
+        chord(task.s(first, last, *args) for first, last in ranges)(collect_fanout.s(task.name))
+    return {'chunks': len(ranges)}
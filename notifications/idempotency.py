@@ -0,0 +1,108 @@
+"""
+Idempotency keys for scheduled notifications.
+
+Every logical notification gets a deterministic key such as
+``morning_reminder:42:2026-03-02``. Before delivering, a run claims all of
+its keys with one ``bulk_create(ignore_conflicts=True)`` against the unique
+index and sends only the keys it now holds, so a beat schedule that fires
+twice or two overlapping chunks never email the same person twice.
+
+Claims carry the run's token (the Celery task id, which a retry keeps), so a
+retried task picks up exactly the keys it claimed but did not get to send.
+Sent keys are stamped after every delivered batch; keys whose send failed,
+or that were still unsent when the run raised, are released for the next
+run. A claim left unsent by a worker that died is taken over once it is
+older than ``NOTIFICATION_CLAIM_TIMEOUT`` seconds.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import NotificationKey
+
+
+def _claim_timeout():
+    return getattr(settings, 'NOTIFICATION_CLAIM_TIMEOUT', 600)
+
+
+def notification_key(email_type, subject_id, period):
+    """``email_type:subject_id:period``, e.g. one employee's reminder for one day"""
+    return f'{email_type}:{subject_id}:{period}'
+
+
+def run_token(task=None):
+    """The task's id when called through Celery, otherwise a fresh token"""
+    task_id = getattr(getattr(task, 'request', None), 'id', None)
+    return task_id or uuid.uuid4().hex
+
+
+class Claim:
+    """
+    Keys this run may send, in the order they were asked for.
+
+    Iterate it for the keys to deliver; ``EmailBatch(claim=...)`` reports each
+    outcome and calls ``settle`` after every flush.
+    """
+
+    def __init__(self, keys, token):
+        self.token = token
+        self.keys = _claim(list(keys), token)
+        self._sent = []
+        self._failed = []
+        self._settled = set()
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.settle()
+        if exc_type is not None:
+            self.release(key for key in self.keys if key not in self._settled)
+        return False
+
+    def mark_sent(self, key):
+        self._sent.append(key)
+
+    def mark_failed(self, key):
+        self._failed.append(key)
+
+    def settle(self):
+        """Stamp sent keys and release failed ones"""
+        sent, self._sent = self._sent, []
+        failed, self._failed = self._failed, []
+        if sent:
+            NotificationKey.objects.filter(key__in=sent, run_token=self.token).update(sent_at=timezone.now())
+        if failed:
+            self.release(failed)
+        self._settled.update(sent)
+        self._settled.update(failed)
+
+    def release(self, keys):
+        keys = list(keys)
+        if keys:
+            NotificationKey.objects.filter(key__in=keys, run_token=self.token, sent_at__isnull=True).delete()
+
+
+def _claim(keys, token):
+    if not keys:
+        return []
+    now = timezone.now()
+    NotificationKey.objects.bulk_create(
+        [NotificationKey(key=key, run_token=token, claimed_at=now) for key in keys],
+        ignore_conflicts=True,
+    )
+    NotificationKey.objects.filter(
+        key__in=keys,
+        sent_at__isnull=True,
+        claimed_at__lt=now - timedelta(seconds=_claim_timeout()),
+    ).update(run_token=token, claimed_at=now)
+    owned = set(
+        NotificationKey.objects.filter(key__in=keys, run_token=token, sent_at__isnull=True)
+        .values_list('key', flat=True)
+    )
+    return [key for key in keys if key in owned]
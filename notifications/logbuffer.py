@@ -0,0 +1,77 @@
+"""
+Buffered email-log writes.
+
+Bulk runs log one row per email. Saved one at a time, every row is its own
+INSERT and, outside a transaction, its own commit; on SQLite each of those
+takes the database write lock. Inside a ``LogBuffer`` (every ``EmailBatch``
+opens one) ``write_log`` collects the rows instead and writes them with
+``bulk_create`` every ``EMAIL_LOG_BATCH_SIZE`` rows and when the block exits,
+including when it exits with an error, so emails that did go out are still
+logged.
+"""
+import logging
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .deliverylog import delivery_log_for
+
+logger = logging.getLogger(__name__)
+
+_active = ContextVar('email_log_buffer', default=None)
+
+
+def _batch_size():
+    return getattr(settings, 'EMAIL_LOG_BATCH_SIZE', 500)
+
+
+class LogBuffer:
+    """Collect unsaved log rows and write them per model with ``bulk_create``"""
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or _batch_size()
+        self._rows = {}
+        self._count = 0
+        self._token = None
+
+    def __enter__(self):
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.flush()
+        except Exception as flush_error:
+            if exc_type is None:
+                raise
+            # Keep the original error; it is the one worth seeing
+            logger.warning('Could not write %d buffered email logs: %s', self._count, flush_error)
+        finally:
+            _active.reset(self._token)
+        return False
+
+    def add(self, row):
+        self._rows.setdefault(type(row), []).append(row)
+        self._count += 1
+        if self._count >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        rows, self._rows, self._count = self._rows, {}, 0
+        for model, instances in rows.items():
+            model.objects.bulk_create(instances, batch_size=self.batch_size)
+
+
+def write_log(row):
+    """Save an email-log row and its unified delivery log now, or hand both to the active ``LogBuffer``"""
+    rows = [row]
+    unified = delivery_log_for(row)
+    if unified is not None:
+        rows.append(unified)
+
+    buffer = _active.get()
+    for instance in rows:
+        if buffer is None:
+            instance.save()
+        else:
+            buffer.add(instance)
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of notifications.models.EMAIL_TYPES: (source, email_type) -> code
+TYPE_CODES = {
+    (1, 'morning_reminder'): 101, (1, 'late_alert'): 102, (1, 'checkout_reminder'): 103,
+    (1, 'weekly_report'): 104, (1, 'monthly_report'): 105,
+    (2, 'request_submitted'): 201, (2, 'approved'): 202, (2, 'rejected'): 203,
+    (2, 'reminder_before'): 204, (2, 'reminder_after'): 205,
+    (3, 'welcome'): 301, (3, 'day_3'): 302, (3, 'day_5'): 303, (3, 'day_7'): 304,
+    (3, 'exit_process'): 305, (3, 'farewell'): 306,
+    (4, 'announcement'): 401, (4, 'upcoming'): 402, (4, 'self_assessment'): 403, (4, 'guidelines'): 404,
+    (4, 'reminder_7'): 405, (4, 'reminder_3'): 406, (4, 'reminder_1'): 407, (4, 'overdue'): 408,
+    (4, 'meeting_confirmation'): 409, (4, 'review_summary'): 410, (4, 'goal_setting'): 411,
+    (4, 'appreciation'): 412, (4, 'goal_quarter'): 413, (4, 'goal_achievement'): 414,
+    (4, 'course_correction'): 415,
+}
+
+# (app, model, source, recipient user id field, addresses field)
+LOG_MODELS = [
+    ('attendance', 'AttendanceEmailLog', 1, 'employee_id', 'recipient_email'),
+    ('leave', 'LeaveEmailLog', 2, None, 'recipient_email'),
+    ('onboarding', 'OnboardingEmailLog', 3, None, 'recipient_email'),
+    ('performance', 'PerformanceEmailLog', 4, None, 'recipient_list'),
+]
+
+
+def backfill_delivery_log(apps, schema_editor):
+    EmailDeliveryLog = apps.get_model('notifications', 'EmailDeliveryLog')
+    for app_label, model_name, source, recipient_field, recipients_field in LOG_MODELS:
+        fields = ['email_type', 'status', 'sent_at', recipients_field] + ([recipient_field] if recipient_field else [])
+        rows = apps.get_model(app_label, model_name).objects.order_by('id').values(*fields)
+        EmailDeliveryLog.objects.bulk_create(
+            (
+                EmailDeliveryLog(
+                    source=source,
+                    email_type=TYPE_CODES.get((source, row['email_type']), source * 100),
+                    status=1 if row['status'] == 'sent' else 2,
+                    recipient_id=row[recipient_field] if recipient_field else None,
+                    recipients=row[recipients_field],
+                    month=row['sent_at'].year * 100 + row['sent_at'].month,
+                    sent_at=row['sent_at'],
+                )
+                for row in rows.iterator(chunk_size=2000)
+            ),
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        ('attendance', '0004_attendance_date_default'),
+        ('leave', '0003_leaveemaillog_leave_log_sent_idx_and_more'),
+        ('onboarding', '0002_onboardingemaillog_onboarding_log_sent_idx'),
+        ('performance', '0003_performanceemaillog_performance_log_sent_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailDeliveryLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.PositiveSmallIntegerField(choices=[(1, 'Attendance'), (2, 'Leave'), (3, 'Onboarding'), (4, 'Performance')])),
+                ('email_type', models.PositiveSmallIntegerField(choices=[(100, 'Other Attendance'), (200, 'Other Leave'), (300, 'Other Onboarding'), (400, 'Other Performance'), (101, 'Morning Check-in Reminder'), (102, 'Late Check-in Alert'), (103, 'Missing Check-out Reminder'), (104, 'Weekly Attendance Report'), (105, 'Monthly Attendance Report'), (201, 'Leave Request Submitted'), (202, 'Leave Approved'), (203, 'Leave Rejected'), (204, 'Reminder Before Leave'), (205, 'Reminder After Leave'), (301, 'Welcome Email'), (302, 'Day 3 Checklist'), (303, 'Day 5 Checklist'), (304, 'Day 7 Checklist'), (305, 'Exit Process'), (306, 'Farewell Email'), (401, 'Review Period Announcement'), (402, 'Upcoming Review Notification'), (403, 'Self-Assessment Link'), (404, 'Guidelines & Criteria'), (405, '7 Day Reminder'), (406, '3 Day Reminder'), (407, '1 Day Reminder'), (408, 'Overdue Notification'), (409, 'Meeting Confirmation'), (410, 'Review Summary'), (411, 'Goal Setting'), (412, 'Appreciation Email'), (413, 'Quarterly Goal Reminder'), (414, 'Goal Achievement'), (415, 'Course Correction Suggestion')])),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'Sent'), (2, 'Failed')], default=1)),
+                ('recipients', models.TextField(help_text='Comma-separated addresses')),
+                ('month', models.PositiveIntegerField(help_text='Partition key: year * 100 + month of sent_at')),
+                ('sent_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('recipient', models.ForeignKey(blank=True, db_index=False, help_text='The user the email was for, when the sending app knows it', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='email_deliveries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Email Delivery Logs',
+                'ordering': ['-sent_at'],
+                'indexes': [models.Index(fields=['month', 'source', 'email_type', 'status'], name='delivery_month_type_idx'), models.Index(fields=['sent_at'], name='delivery_sent_idx'), models.Index(fields=['recipient', 'sent_at'], name='delivery_recipient_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_delivery_log, migrations.RunPython.noop),
+    ]
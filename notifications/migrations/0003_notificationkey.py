@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_emaildeliverylog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=150, unique=True)),
+                ('run_token', models.CharField(max_length=64)),
+                ('claimed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Notification Keys',
+                'ordering': ['-claimed_at'],
+                'indexes': [models.Index(fields=['claimed_at'], name='notification_key_claimed_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,154 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+class OutboundEmail(models.Model):
+    """Email written inside a business transaction and delivered by the dispatcher"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    email_type = models.CharField(max_length=50)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    attachments = models.JSONField(default=list, blank=True)
+    log_model = models.CharField(max_length=100, blank=True, help_text="App log model written once the email is delivered")
+    log_fields = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.email_type} - {', '.join(self.recipients)} ({self.status})"
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+            models.Index(fields=['claim_token'], name='outbox_claim_token_idx'),
+        ]
+        verbose_name_plural = "Outbound Emails"
+
+
+
+class NotificationKey(models.Model):
+    """One logical notification (what, to whom, for which period) claimed by a run and then sent"""
+    key = models.CharField(max_length=150, unique=True)
+    run_token = models.CharField(max_length=64)
+    claimed_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.key} ({'sent' if self.sent_at else 'claimed'})"
+
+    class Meta:
+        ordering = ['-claimed_at']
+        indexes = [
+            models.Index(fields=['claimed_at'], name='notification_key_claimed_idx'),
+        ]
+        verbose_name_plural = "Notification Keys"
+
+# (code, source, app email_type, label) for every email the apps send. Codes
+# are stored instead of strings; the hundreds digit is the source, so new
+# types take the next free code in their block and codes are never reused.
+EMAIL_TYPES = [
+    (101, 1, 'morning_reminder', 'Morning Check-in Reminder'),
+    (102, 1, 'late_alert', 'Late Check-in Alert'),
+    (103, 1, 'checkout_reminder', 'Missing Check-out Reminder'),
+    (104, 1, 'weekly_report', 'Weekly Attendance Report'),
+    (105, 1, 'monthly_report', 'Monthly Attendance Report'),
+    (201, 2, 'request_submitted', 'Leave Request Submitted'),
+    (202, 2, 'approved', 'Leave Approved'),
+    (203, 2, 'rejected', 'Leave Rejected'),
+    (204, 2, 'reminder_before', 'Reminder Before Leave'),
+    (205, 2, 'reminder_after', 'Reminder After Leave'),
+    (301, 3, 'welcome', 'Welcome Email'),
+    (302, 3, 'day_3', 'Day 3 Checklist'),
+    (303, 3, 'day_5', 'Day 5 Checklist'),
+    (304, 3, 'day_7', 'Day 7 Checklist'),
+    (305, 3, 'exit_process', 'Exit Process'),
+    (306, 3, 'farewell', 'Farewell Email'),
+    (401, 4, 'announcement', 'Review Period Announcement'),
+    (402, 4, 'upcoming', 'Upcoming Review Notification'),
+    (403, 4, 'self_assessment', 'Self-Assessment Link'),
+    (404, 4, 'guidelines', 'Guidelines & Criteria'),
+    (405, 4, 'reminder_7', '7 Day Reminder'),
+    (406, 4, 'reminder_3', '3 Day Reminder'),
+    (407, 4, 'reminder_1', '1 Day Reminder'),
+    (408, 4, 'overdue', 'Overdue Notification'),
+    (409, 4, 'meeting_confirmation', 'Meeting Confirmation'),
+    (410, 4, 'review_summary', 'Review Summary'),
+    (411, 4, 'goal_setting', 'Goal Setting'),
+    (412, 4, 'appreciation', 'Appreciation Email'),
+    (413, 4, 'goal_quarter', 'Quarterly Goal Reminder'),
+    (414, 4, 'goal_achievement', 'Goal Achievement'),
+    (415, 4, 'course_correction', 'Course Correction Suggestion'),
+]
+
+
+class EmailDeliveryLog(models.Model):
+    """Every email any app sent or failed to send, in one compact table"""
+    SOURCE_CHOICES = [
+        (1, 'Attendance'),
+        (2, 'Leave'),
+        (3, 'Onboarding'),
+        (4, 'Performance'),
+    ]
+    STATUS_SENT = 1
+    STATUS_FAILED = 2
+    STATUS_CHOICES = [
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    # An unknown type is stored as its source's block, e.g. 100 for attendance
+    EMAIL_TYPE_CHOICES = [(source * 100, f'Other {label}') for source, label in SOURCE_CHOICES] + [
+        (code, label) for code, _, _, label in EMAIL_TYPES
+    ]
+
+    source = models.PositiveSmallIntegerField(choices=SOURCE_CHOICES)
+    email_type = models.PositiveSmallIntegerField(choices=EMAIL_TYPE_CHOICES)
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=STATUS_SENT)
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name='email_deliveries',
+        help_text="The user the email was for, when the sending app knows it",
+    )
+    recipients = models.TextField(help_text="Comma-separated addresses")
+    month = models.PositiveIntegerField(help_text="Partition key: year * 100 + month of sent_at")
+    sent_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.get_email_type_display()} to {self.recipients} ({self.get_status_display()})"
+
+    @staticmethod
+    def month_key(moment):
+        return moment.year * 100 + moment.month
+
+    def save(self, *args, **kwargs):
+        if not self.month:
+            self.month = self.month_key(self.sent_at)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ['-sent_at']
+        indexes = [
+            models.Index(fields=['month', 'source', 'email_type', 'status'], name='delivery_month_type_idx'),
+            models.Index(fields=['sent_at'], name='delivery_sent_idx'),
+            models.Index(fields=['recipient', 'sent_at'], name='delivery_recipient_idx'),
+        ]
+        verbose_name_plural = "Email Delivery Logs"
@@ -0,0 +1,227 @@
+"""
+Transactional email outbox.
+
+Views and tasks call ``enqueue`` inside the same transaction as the change
+that triggers the email, so the row commits (or rolls back) with it and the
+request never waits on SMTP. ``dispatch`` claims pending rows in batches and
+delivers them; any number of dispatcher workers can run side by side because
+a row is only ever claimed by one of them.
+"""
+import uuid
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import connection, transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .delivery import EmailBatch
+from .logbuffer import write_log
+from .models import OutboundEmail
+
+# Sent once a dispatched batch's outcomes are saved, with ``rows``: the
+# OutboundEmail rows that were delivered. Apps that flag their records as
+# notified listen here, so a flag never claims an email that has not gone out
+outbound_sent = Signal()
+
+
+def _batch_size():
+    return getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+
+
+def _max_attempts():
+    return getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+
+
+def _claim_timeout():
+    return getattr(settings, 'OUTBOX_CLAIM_TIMEOUT', 600)
+
+
+def enqueue(message, email_type, log_model=None, log_fields=None, attachments=None):
+    """
+    Write ``message`` to the outbox and schedule a dispatch after commit.
+
+    ``log_model``/``log_fields`` describe the app's email log row, written by
+    the dispatcher with ``email_type`` and the final ``status`` once the email
+    is sent or has failed for good. ``attachments`` are file paths attached at
+    delivery time.
+    """
+    outbound = _outbound(message, email_type, log_model, log_fields, attachments)
+    outbound.save()
+    # robust: a broker hiccup must not fail the already committed request;
+    # the periodic dispatcher still picks the row up
+    transaction.on_commit(_kick_dispatcher, robust=True)
+    return outbound
+
+
+def enqueue_many(items):
+    """
+    Write many emails to the outbox in one INSERT and schedule one dispatch.
+
+    ``items`` are ``(message, email_type, log_model, log_fields)`` tuples,
+    with the same meaning as ``enqueue``'s arguments.
+    """
+    rows = [_outbound(*item) for item in items]
+    if not rows:
+        return []
+    OutboundEmail.objects.bulk_create(rows, batch_size=_batch_size())
+    transaction.on_commit(_kick_dispatcher, robust=True)
+    return rows
+
+
+def _outbound(message, email_type, log_model=None, log_fields=None, attachments=None):
+    return OutboundEmail(
+        email_type=email_type,
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email,
+        recipients=list(message.to),
+        attachments=[path for path in attachments or [] if path],
+        log_model=log_model._meta.label if log_model else '',
+        log_fields=log_fields or {},
+    )
+
+
+def _kick_dispatcher():
+    from .tasks import dispatch_outbox
+    dispatch_outbox.delay()
+
+
+def release_stale_claims():
+    """Return rows held by a dispatcher that died mid-batch to the queue"""
+    cutoff = timezone.now() - timedelta(seconds=_claim_timeout())
+    return OutboundEmail.objects.filter(status='sending', claimed_at__lt=cutoff).update(
+        status='pending',
+        claim_token='',
+        claimed_at=None,
+    )
+
+
+def claim_batch(limit=None):
+    """
+    Atomically claim up to ``limit`` due rows for this worker.
+
+    On backends with ``SKIP LOCKED`` concurrent dispatchers skip each other's
+    rows instead of waiting. Elsewhere (SQLite) the conditional UPDATE on
+    ``status='pending'`` is the guard: only rows this call actually flipped
+    carry its claim token.
+    """
+    limit = limit or _batch_size()
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(status='pending', available_at__lte=now).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        OutboundEmail.objects.filter(id__in=ids, status='pending').update(
+            status='sending',
+            claim_token=token,
+            claimed_at=now,
+        )
+    return list(OutboundEmail.objects.filter(claim_token=token, status='sending'))
+
+
+def _to_message(outbound):
+    email = EmailMessage(
+        subject=outbound.subject,
+        body=outbound.body,
+        from_email=outbound.from_email,
+        to=outbound.recipients,
+    )
+    email.content_subtype = 'html'
+    for path in outbound.attachments:
+        email.attach_file(path)
+    return email
+
+
+def _write_log(outbound, status, error=''):
+    if not outbound.log_model:
+        return
+    model = apps.get_model(outbound.log_model)
+    fields = dict(outbound.log_fields, email_type=outbound.email_type, status=status)
+    if error and any(field.name == 'error_message' for field in model._meta.fields):
+        fields['error_message'] = error
+    write_log(model(**fields))
+
+
+class _Outcomes:
+    """
+    Delivery outcomes of one claimed batch, written back together.
+
+    Sent rows take one UPDATE; failed rows take one per distinct (attempt,
+    error) pair, which for a batch that failed on the same SMTP error is one.
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.failed = {}
+
+    def mark_sent(self, outbound):
+        self.sent.append(outbound)
+        _write_log(outbound, 'sent')
+
+    def mark_failed(self, outbound, exc):
+        attempts = outbound.attempts + 1
+        error = str(exc)
+        if attempts >= _max_attempts():
+            _write_log(outbound, 'failed', error=error)
+        self.failed.setdefault((attempts, error), []).append(outbound.pk)
+
+    def save(self):
+        now = timezone.now()
+        if self.sent:
+            OutboundEmail.objects.filter(pk__in=[outbound.pk for outbound in self.sent]).update(
+                status='sent', sent_at=now, attempts=F('attempts') + 1, last_error='',
+            )
+        for (attempts, error), ids in self.failed.items():
+            fields = {'attempts': attempts, 'last_error': error, 'claim_token': ''}
+            if attempts >= _max_attempts():
+                fields['status'] = 'failed'
+            else:
+                # Back off 1, 2, 4, 8... minutes before the next attempt
+                fields['status'] = 'pending'
+                fields['available_at'] = now + timedelta(minutes=2 ** (attempts - 1))
+            OutboundEmail.objects.filter(pk__in=ids).update(**fields)
+        if self.sent:
+            outbound_sent.send(sender=OutboundEmail, rows=self.sent)
+
+
+def deliver(rows):
+    """Send claimed rows over pooled connections and record the outcomes in a few UPDATEs"""
+    outcomes = _Outcomes()
+    with EmailBatch(batch_size=len(rows) or None) as batch:
+        for outbound in rows:
+            try:
+                message = _to_message(outbound)
+            except Exception as exc:
+                outcomes.mark_failed(outbound, exc)
+                continue
+            batch.add(
+                message,
+                on_sent=lambda outbound=outbound: outcomes.mark_sent(outbound),
+                on_failed=lambda exc, outbound=outbound: outcomes.mark_failed(outbound, exc),
+            )
+    outcomes.save()
+    return batch.sent, batch.failed
+
+
+def dispatch(max_batches=None):
+    """Claim and deliver batches until the outbox is drained; return (sent, failed)"""
+    release_stale_claims()
+    sent = failed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = claim_batch()
+        if not rows:
+            break
+        batch_sent, batch_failed = deliver(rows)
+        sent += batch_sent
+        failed += batch_failed
+        batches += 1
+    return sent, failed
@@ -0,0 +1,60 @@
+"""
+Email rendering that compiles each template once per worker process.
+
+``render`` goes through the cached template loader both settings files
+configure, so a burst of reminders parses ``emails/checkin_reminder.html``
+once instead of once per recipient, and runserver's template autoreload
+still picks up edits.
+
+``Broadcast`` goes further for emails that differ between recipients only by
+a few values: the template is rendered once with marker strings in place of
+those fields, and each recipient's copy is stitched together from the static
+pieces and their escaped values. Fields must be printed as plain variables;
+if a filter or tag swallows a marker, ``Broadcast`` quietly falls back to a
+full render per recipient.
+"""
+import re
+import uuid
+
+from django.template import loader
+from django.utils.html import conditional_escape
+
+
+def render(template_name, context=None):
+    return loader.get_template(template_name).render(context)
+
+
+class Broadcast:
+    """One template rendered once and personalised per recipient by substitution"""
+
+    def __init__(self, template_name, context=None, fields=()):
+        self.template_name = template_name
+        self.context = dict(context or {})
+        self.fields = tuple(fields)
+
+        token = uuid.uuid4().hex
+        markers = {f'__broadcast_{token}_{field}__': field for field in self.fields}
+        html = render(template_name, {**self.context, **{field: marker for marker, field in markers.items()}})
+
+        self._segments = None
+        if all(marker in html for marker in markers):
+            # [(static html, field printed after it or None), ...]
+            segments = []
+            position = 0
+            if markers:
+                pattern = re.compile('|'.join(re.escape(marker) for marker in markers))
+                for match in pattern.finditer(html):
+                    segments.append((html[position:match.start()], markers[match.group()]))
+                    position = match.end()
+            segments.append((html[position:], None))
+            self._segments = segments
+
+    def render(self, **values):
+        if self._segments is None:
+            return render(self.template_name, {**self.context, **values})
+        parts = []
+        for static, field in self._segments:
+            parts.append(static)
+            if field is not None:
+                parts.append(conditional_escape(values.get(field, '')))
+        return ''.join(parts)
@@ -0,0 +1,27 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from .outbox import dispatch
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def dispatch_outbox():
+    """Deliver pending outbox emails; safe to run on any number of workers"""
+    sent, failed = dispatch(max_batches=getattr(settings, 'OUTBOX_MAX_BATCHES_PER_RUN', 50))
+    return {'sent': sent, 'failed': failed}
+
+
+@shared_task
+def collect_fanout(results, task_name):
+    """Chord callback: total the sent and failed counts of a fanned-out job"""
+    sent = sum(result['sent'] for result in results)
+    failed = sum(result['failed'] for result in results)
+    if failed:
+        logger.warning('%s: %d chunks sent %d emails, %d failed', task_name, len(results), sent, failed)
+    else:
+        logger.info('%s: %d chunks sent %d emails', task_name, len(results), sent)
+    return {'task': task_name, 'chunks': len(results), 'sent': sent, 'failed': failed}
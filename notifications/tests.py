@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .idempotency import Claim, notification_key
+from .models import NotificationKey
+
+KEYS = [notification_key('morning_reminder', employee_id, '2030-06-03') for employee_id in (1, 2, 3)]
+
+
+class ClaimTests(TestCase):
+    def test_a_run_holds_every_fresh_key_in_order(self):
+        with Claim(reversed(KEYS), 'run-a') as claim:
+            self.assertEqual(list(claim), list(reversed(KEYS)))
+
+    def test_keys_held_by_another_run_are_skipped(self):
+        with Claim(KEYS[:2], 'run-a'):
+            with Claim(KEYS, 'run-b') as claim:
+                self.assertEqual(list(claim), KEYS[2:])
+
+    def test_sent_keys_are_never_claimed_again(self):
+        with Claim(KEYS, 'run-a') as claim:
+            claim.mark_sent(KEYS[0])
+        self.assertIsNotNone(NotificationKey.objects.get(key=KEYS[0]).sent_at)
+        with Claim(KEYS, 'run-a') as retry:
+            self.assertEqual(list(retry), KEYS[1:])
+
+    def test_failed_keys_are_released_for_the_next_run(self):
+        with Claim(KEYS, 'run-a') as claim:
+            claim.mark_sent(KEYS[0])
+            claim.mark_failed(KEYS[1])
+            claim.settle()
+            self.assertFalse(NotificationKey.objects.filter(key=KEYS[1]).exists())
+        with Claim(KEYS, 'run-b') as claim:
+            self.assertEqual(list(claim), KEYS[1:2])
+
+    def test_a_retry_with_the_same_token_resumes_its_claims(self):
+        with Claim(KEYS, 'task-1') as claim:
+            claim.mark_sent(KEYS[0])
+            claim.settle()
+        with Claim(KEYS, 'task-1') as retry:
+            self.assertEqual(list(retry), KEYS[1:])
+
+    def test_unsent_keys_are_released_when_the_run_raises(self):
+        with self.assertRaises(RuntimeError):
+            with Claim(KEYS, 'run-a') as claim:
+                claim.mark_sent(KEYS[0])
+                raise RuntimeError('SMTP down')
+        self.assertEqual(list(NotificationKey.objects.values_list('key', flat=True)), KEYS[:1])
+
+    def test_abandoned_claims_are_taken_over_after_the_timeout(self):
+        Claim(KEYS, 'dead-worker')
+        with self.settings(NOTIFICATION_CLAIM_TIMEOUT=600):
+            with Claim(KEYS, 'run-b') as claim:
+                self.assertEqual(list(claim), [])
+            NotificationKey.objects.update(claimed_at=timezone.now() - timedelta(seconds=601))
+            with Claim(KEYS, 'run-b') as claim:
+                self.assertEqual(list(claim), KEYS)
+        self.assertEqual(set(NotificationKey.objects.values_list('run_token', flat=True)), {'run-b'})
+
+    def test_sent_keys_are_not_taken_over(self):
+        with Claim(KEYS[:1], 'run-a') as claim:
+            claim.mark_sent(KEYS[0])
+        NotificationKey.objects.update(claimed_at=timezone.now() - timedelta(days=1))
+        with Claim(KEYS[:1], 'run-b') as claim:
+            self.assertEqual(list(claim), [])
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('onboarding', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='onboardingemaillog',
+            index=models.Index(fields=['sent_at', 'status'], name='onboarding_log_sent_idx'),
+        ),
+    ]
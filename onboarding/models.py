@@ -105,4 +105,7 @@ class OnboardingEmailLog(models.Model):
     
     class Meta:
         ordering = ['-sent_at']
+        indexes = [
+            models.Index(fields=['sent_at', 'status'], name='onboarding_log_sent_idx'),
+        ]
         verbose_name_plural = "Onboarding Email Logs"
@@ -0,0 +1,14 @@
+from django.dispatch import receiver
+
+from notifications.outbox import outbound_sent
+from .models import Onboarding
+
+
+@receiver(outbound_sent)
+def welcome_delivered(sender, rows, **kwargs):
+    """Mark onboarding records notified once their welcome email has gone out"""
+    recipients = {recipient for row in rows if row.email_type == 'welcome' for recipient in row.recipients}
+    if recipients:
+        Onboarding.objects.filter(employee__email__in=recipients, welcome_email_sent=False).update(
+            welcome_email_sent=True
+        )
@@ -1,57 +1,80 @@
+import logging
+
 from celery import shared_task
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.crypto import get_random_string
 from datetime import timedelta, date
 from .models import Onboarding, Offboarding, OnboardingEmailLog
 from django.contrib.auth.models import User
+from notifications.delivery import EmailBatch, build_email
+from notifications.logbuffer import write_log
+from notifications.outbox import enqueue
+
+logger = logging.getLogger(__name__)
+
+
+def _enqueue(message, email_type):
+    """Write the email to the outbox; the dispatcher logs it once delivered"""
+    enqueue(
+        message,
+        email_type,
+        log_model=OnboardingEmailLog,
+        log_fields={'recipient_email': ','.join(message.to)},
+    )
+
+
+def queue_welcome_email(user):
+    """Queue the welcome email; the record is marked notified once it is delivered"""
+    if not user.email:
+        return
+    
+    # Create temporary password (in production, use proper password reset link)
+    temp_password = get_random_string(12)
+    
+    subject = "Welcome to Our Company!"
+    context = {
+        'employee_name': user.get_full_name() or user.username,
+        'username': user.username,
+        'temp_password': temp_password,
+        'first_day_info': 'Please report at 9:00 AM on your first day.',
+    }
+    
+    message = build_email(subject, 'emails/welcome.html', context, [user.email])
+    _enqueue(message, 'welcome')
 
 
 @shared_task
 def send_welcome_email(user_id):
     """Send welcome email to new employee"""
     try:
-        user = User.objects.get(id=user_id)
-        
-        if not user.email:
-            return
-        
-        # Create temporary password (in production, use proper password reset link)
-        temp_password = User.objects.make_random_password(length=12)
-        
-        subject = "Welcome to Our Company!"
-        context = {
-            'employee_name': user.get_full_name() or user.username,
-            'username': user.username,
-            'temp_password': temp_password,
-            'first_day_info': 'Please report at 9:00 AM on your first day.',
-        }
-        
-        html_message = render_to_string('emails/welcome.html', context)
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email='noreply@emailintegration.com',
-            to=[user.email],
-        )
-        email.content_subtype = 'html'
-        
-        email.send(fail_silently=False)
-        
-        # Update onboarding status
-        onboarding = Onboarding.objects.filter(employee=user).first()
-        if onboarding:
-            onboarding.welcome_email_sent = True
-            onboarding.save()
-        
-        OnboardingEmailLog.objects.create(
-            recipient_email=user.email,
-            email_type='welcome',
+        queue_welcome_email(User.objects.get(id=user_id))
+    except Exception:
+        logger.exception('Error sending welcome email to user %s', user_id)
+
+
+def _checklist_sent(onboarding, day, recipient_email):
+    """Return a callback that marks the day's checklist as sent and logs it"""
+    def mark_sent():
+        setattr(onboarding, f'day_{day}_checklist_sent', True)
+        onboarding.save()
+        
+        write_log(OnboardingEmailLog(
+            recipient_email=recipient_email,
+            email_type=f'day_{day}',
             status='sent'
-        )
-    except Exception as e:
-        print(f"Error sending welcome email: {e}")
+        ))
+    return mark_sent
+
+
+def _checklist_failed(day, recipient_email):
+    """Return a callback that logs a checklist email that could not be sent"""
+    def log_failed(exc):
+        write_log(OnboardingEmailLog(
+            recipient_email=recipient_email,
+            email_type=f'day_{day}',
+            status='failed'
+        ))
+    return log_failed
 
 
 @shared_task
@@ -66,41 +89,25 @@ def send_day_3_checklist():
         status='in_progress'
     )
     
-    for onboarding in onboardings:
-        employee = onboarding.employee
-        
-        if not employee.email:
-            continue
-        
-        subject = "Day 3 Onboarding Checklist"
-        context = {
-            'employee_name': employee.get_full_name() or employee.username,
-            'checklist_items': onboarding.checklist_items.filter(day=3),
-        }
-        
-        html_message = render_to_string('emails/day3_checklist.html', context)
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email='noreply@emailintegration.com',
-            to=[employee.email],
-        )
-        email.content_subtype = 'html'
-        
-        try:
-            email.send(fail_silently=False)
+    with EmailBatch() as batch:
+        for onboarding in onboardings:
+            employee = onboarding.employee
+            
+            if not employee.email:
+                continue
             
-            onboarding.day_3_checklist_sent = True
-            onboarding.save()
+            subject = "Day 3 Onboarding Checklist"
+            context = {
+                'employee_name': employee.get_full_name() or employee.username,
+                'checklist_items': onboarding.checklist_items.filter(day=3),
+            }
             
-            OnboardingEmailLog.objects.create(
-                recipient_email=employee.email,
-                email_type='day_3',
-                status='sent'
+            message = build_email(subject, 'emails/day3_checklist.html', context, [employee.email])
+            batch.add(
+                message,
+                on_sent=_checklist_sent(onboarding, 3, employee.email),
+                on_failed=_checklist_failed(3, employee.email),
             )
-        except Exception as e:
-            print(f"Error sending day 3 checklist: {e}")
 
 
 @shared_task
@@ -115,41 +122,25 @@ def send_day_5_checklist():
         status='in_progress'
     )
     
-    for onboarding in onboardings:
-        employee = onboarding.employee
-        
-        if not employee.email:
-            continue
-        
-        subject = "Day 5 Onboarding Checklist"
-        context = {
-            'employee_name': employee.get_full_name() or employee.username,
-            'checklist_items': onboarding.checklist_items.filter(day=5),
-        }
-        
-        html_message = render_to_string('emails/day5_checklist.html', context)
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email='noreply@emailintegration.com',
-            to=[employee.email],
-        )
-        email.content_subtype = 'html'
-        
-        try:
-            email.send(fail_silently=False)
+    with EmailBatch() as batch:
+        for onboarding in onboardings:
+            employee = onboarding.employee
+            
+            if not employee.email:
+                continue
             
-            onboarding.day_5_checklist_sent = True
-            onboarding.save()
+            subject = "Day 5 Onboarding Checklist"
+            context = {
+                'employee_name': employee.get_full_name() or employee.username,
+                'checklist_items': onboarding.checklist_items.filter(day=5),
+            }
             
-            OnboardingEmailLog.objects.create(
-                recipient_email=employee.email,
-                email_type='day_5',
-                status='sent'
+            message = build_email(subject, 'emails/day5_checklist.html', context, [employee.email])
+            batch.add(
+                message,
+                on_sent=_checklist_sent(onboarding, 5, employee.email),
+                on_failed=_checklist_failed(5, employee.email),
             )
-        except Exception as e:
-            print(f"Error sending day 5 checklist: {e}")
 
 
 @shared_task
@@ -164,119 +155,81 @@ def send_day_7_checklist():
         status='in_progress'
     )
     
-    for onboarding in onboardings:
-        employee = onboarding.employee
-        
-        if not employee.email:
-            continue
-        
-        subject = "Day 7 Onboarding Checklist"
-        context = {
-            'employee_name': employee.get_full_name() or employee.username,
-            'checklist_items': onboarding.checklist_items.filter(day=7),
-        }
-        
-        html_message = render_to_string('emails/day7_checklist.html', context)
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email='noreply@emailintegration.com',
-            to=[employee.email],
-        )
-        email.content_subtype = 'html'
-        
-        try:
-            email.send(fail_silently=False)
+    with EmailBatch() as batch:
+        for onboarding in onboardings:
+            employee = onboarding.employee
             
-            onboarding.day_7_checklist_sent = True
-            onboarding.save()
+            if not employee.email:
+                continue
             
-            OnboardingEmailLog.objects.create(
-                recipient_email=employee.email,
-                email_type='day_7',
-                status='sent'
+            subject = "Day 7 Onboarding Checklist"
+            context = {
+                'employee_name': employee.get_full_name() or employee.username,
+                'checklist_items': onboarding.checklist_items.filter(day=7),
+            }
+            
+            message = build_email(subject, 'emails/day7_checklist.html', context, [employee.email])
+            batch.add(
+                message,
+                on_sent=_checklist_sent(onboarding, 7, employee.email),
+                on_failed=_checklist_failed(7, employee.email),
             )
-        except Exception as e:
-            print(f"Error sending day 7 checklist: {e}")
+
+
+def queue_exit_process_email(offboarding):
+    """Queue the exit process email and mark the offboarding record as notified"""
+    employee = offboarding.employee
+    
+    if not employee.email:
+        return
+    
+    subject = "Exit Process Information"
+    context = {
+        'employee_name': employee.get_full_name() or employee.username,
+        'last_working_day': offboarding.last_working_day,
+        'checklist_items': offboarding.checklist_items.all(),
+    }
+    
+    message = build_email(subject, 'emails/exit_process.html', context, [employee.email])
+    _enqueue(message, 'exit_process')
+    
+    offboarding.exit_email_sent = True
+    offboarding.save()
+
+
+def queue_farewell_email(offboarding):
+    """Queue the farewell email and mark the offboarding record as notified"""
+    employee = offboarding.employee
+    
+    if not employee.email:
+        return
+    
+    subject = "Farewell - Best Wishes for Your Future!"
+    context = {
+        'employee_name': employee.get_full_name() or employee.username,
+        'last_working_day': offboarding.last_working_day,
+    }
+    
+    message = build_email(subject, 'emails/farewell.html', context, [employee.email])
+    _enqueue(message, 'farewell')
+    
+    offboarding.farewell_email_sent = True
+    offboarding.save()
 
 
 @shared_task
 def send_exit_process_email(offboarding_id):
     """Send exit process email to departing employee"""
     try:
-        offboarding = Offboarding.objects.get(id=offboarding_id)
-        employee = offboarding.employee
-        
-        if not employee.email:
-            return
-        
-        subject = "Exit Process Information"
-        context = {
-            'employee_name': employee.get_full_name() or employee.username,
-            'last_working_day': offboarding.last_working_day,
-            'checklist_items': offboarding.checklist_items.all(),
-        }
-        
-        html_message = render_to_string('emails/exit_process.html', context)
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email='noreply@emailintegration.com',
-            to=[employee.email],
-        )
-        email.content_subtype = 'html'
-        
-        email.send(fail_silently=False)
-        
-        offboarding.exit_email_sent = True
-        offboarding.save()
-        
-        OnboardingEmailLog.objects.create(
-            recipient_email=employee.email,
-            email_type='exit_process',
-            status='sent'
-        )
-    except Exception as e:
-        print(f"Error sending exit process email: {e}")
+        queue_exit_process_email(Offboarding.objects.get(id=offboarding_id))
+    except Exception:
+        logger.exception('Error sending exit process email for offboarding %s', offboarding_id)
 
 
 @shared_task
 def send_farewell_email(offboarding_id):
     """Send farewell email to departing employee"""
     try:
-        offboarding = Offboarding.objects.get(id=offboarding_id)
-        employee = offboarding.employee
-        
-        if not employee.email:
-            return
-        
-        subject = "Farewell - Best Wishes for Your Future!"
-        context = {
-            'employee_name': employee.get_full_name() or employee.username,
-            'last_working_day': offboarding.last_working_day,
-        }
-        
-        html_message = render_to_string('emails/farewell.html', context)
-        
-        email = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email='noreply@emailintegration.com',
-            to=[employee.email],
-        )
-        email.content_subtype = 'html'
-        
-        email.send(fail_silently=False)
-        
-        offboarding.farewell_email_sent = True
-        offboarding.save()
-        
-        OnboardingEmailLog.objects.create(
-            recipient_email=employee.email,
-            email_type='farewell',
-            status='sent'
-        )
-    except Exception as e:
-        print(f"Error sending farewell email: {e}")
+        queue_farewell_email(Offboarding.objects.get(id=offboarding_id))
+    except Exception:
+        logger.exception('Error sending farewell email for offboarding %s', offboarding_id)
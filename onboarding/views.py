@@ -2,8 +2,9 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
+from django.db import transaction
 from .models import Onboarding, Offboarding, OnboardingChecklist, OffboardingChecklist
-from .tasks import send_welcome_email, send_exit_process_email, send_farewell_email
+from .tasks import queue_welcome_email, queue_exit_process_email
 from users.models import UserRole, EmployeeProfile
 
 
@@ -149,30 +150,31 @@ def new_employee_onboarding(request):
         try:
             employee = User.objects.get(id=employee_id)
             
-            # Create onboarding record
-            onboarding, created = Onboarding.objects.get_or_create(employee=employee)
+            with transaction.atomic():
+                # Create onboarding record
+                onboarding, created = Onboarding.objects.get_or_create(employee=employee)
             
             
-            checklist_tasks = [
-                ('Complete IT setup (laptop, email, access)', 3),
-                ('Meet with HR for policies and benefits overview', 3),
-                ('IT systems and tools training', 5),
-                ('Department introduction and team lunch', 5),
-                ('First week review with manager', 7),
-                ('Initial project assignment', 7),
-            ]
+                checklist_tasks = [
+                    ('Complete IT setup (laptop, email, access)', 3),
+                    ('Meet with HR for policies and benefits overview', 3),
+                    ('IT systems and tools training', 5),
+                    ('Department introduction and team lunch', 5),
+                    ('First week review with manager', 7),
+                    ('Initial project assignment', 7),
+                ]
             
-            for task, day in checklist_tasks:
-                OnboardingChecklist.objects.get_or_create(
-                    onboarding=onboarding,
-                    task=task,
-                    day=day
-                )
+                for task, day in checklist_tasks:
+                    OnboardingChecklist.objects.get_or_create(
+                        onboarding=onboarding,
+                        task=task,
+                        day=day
+                    )
             
-            # Send welcome email
-            send_welcome_email.delay(employee.id)
+                # Send welcome email
+                queue_welcome_email(employee)
             
-            messages.success(request, 'Onboarding record created and welcome email sent.')
+            messages.success(request, 'Onboarding record created and welcome email queued.')
             return redirect('onboarding_status')
         except User.DoesNotExist:
             messages.error(request, 'Employee not found.')
@@ -203,31 +205,33 @@ def initiate_offboarding(request, employee_id):
         final_settlement = request.POST.get('final_settlement', '')
         
         try:
-            offboarding, created = Offboarding.objects.get_or_create(
-                employee=employee,
-                defaults={
-                    'last_working_day': last_working_day,
-                    'final_settlement': final_settlement,
-                }
-            )
+            with transaction.atomic():
+                offboarding, created = Offboarding.objects.get_or_create(
+                    employee=employee,
+                    defaults={
+                        'last_working_day': last_working_day,
+                        'final_settlement': final_settlement,
+                    }
+                )
             
-            # Create default offboarding checklist
-            offboarding_tasks = [
-                'Return laptop and equipment',
-                'Revoke system access',
-                'Clear outstanding dues',
-                'Document handover',
-                'Collect signed exit form',
-            ]
+                # Create default offboarding checklist
+                offboarding_tasks = [
+                    'Return laptop and equipment',
+                    'Revoke system access',
+                    'Clear outstanding dues',
+                    'Document handover',
+                    'Collect signed exit form',
+                ]
             
-            for task in offboarding_tasks:
-                OffboardingChecklist.objects.get_or_create(
-                    offboarding=offboarding,
-                    task=task
-                )
+                for task in offboarding_tasks:
+                    OffboardingChecklist.objects.get_or_create(
+                        offboarding=offboarding,
+                        task=task
+                    )
             
-            # Send exit process email
-            send_exit_process_email.delay(offboarding.id)
+                # Send exit process email
+                offboarding.refresh_from_db(fields=['last_working_day'])
+                queue_exit_process_email(offboarding)
             
             messages.success(request, 'Offboarding initiated and exit process email sent.')
             return redirect('offboarding_status')
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance', '0002_performancereview_self_assessment_content'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='performanceemaillog',
+            index=models.Index(fields=['sent_at', 'status'], name='performance_log_sent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancegoal',
+            index=models.Index(condition=models.Q(('achievement_notified', False)), fields=['status'], name='goal_achievement_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancegoal',
+            index=models.Index(condition=models.Q(('course_correction_notified', False)), fields=['status'], name='goal_correction_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['submission_deadline', 'self_assessment_submitted'], name='review_deadline_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['status'], name='review_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(condition=models.Q(('meeting_confirmation_sent', False)), fields=['meeting_scheduled_for'], name='review_meeting_unsent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(condition=models.Q(('summary_shared', False)), fields=['summary_shared'], name='review_summary_unshared_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(condition=models.Q(('goals_shared', False)), fields=['goals_shared'], name='review_goals_unshared_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+from datetime import timedelta
+from holidays.workdays import working_days
 
 
 class PerformanceReviewCycle(models.Model):
@@ -85,6 +87,18 @@ class PerformanceReview(models.Model):
     class Meta:
         unique_together = ('cycle', 'employee')
         ordering = ['employee__username']
+        indexes = [
+            models.Index(fields=['submission_deadline', 'self_assessment_submitted'], name='review_deadline_submitted_idx'),
+            models.Index(fields=['status'], name='review_status_idx'),
+            # Partial indexes over the few reviews with a notification still to send
+            models.Index(
+                fields=['meeting_scheduled_for'],
+                condition=models.Q(meeting_confirmation_sent=False),
+                name='review_meeting_unsent_idx',
+            ),
+            models.Index(fields=['summary_shared'], condition=models.Q(summary_shared=False), name='review_summary_unshared_idx'),
+            models.Index(fields=['goals_shared'], condition=models.Q(goals_shared=False), name='review_goals_unshared_idx'),
+        ]
         verbose_name = 'Performance Review'
         verbose_name_plural = 'Performance Reviews'
 
@@ -95,6 +109,12 @@ class PerformanceReview(models.Model):
     def days_until_deadline(self):
         return (self.submission_deadline - timezone.now().date()).days
 
+    @property
+    def working_days_until_deadline(self):
+        """Working days from tomorrow up to the deadline; 0 once it has arrived"""
+        today = timezone.now().date()
+        return working_days(today + timedelta(days=1), self.submission_deadline)
+
 
 class PerformanceGoal(models.Model):
     """Goals tracked within a review."""
@@ -119,6 +139,18 @@ class PerformanceGoal(models.Model):
 
     class Meta:
         ordering = ['due_date', 'title']
+        indexes = [
+            models.Index(
+                fields=['status'],
+                condition=models.Q(achievement_notified=False),
+                name='goal_achievement_pending_idx',
+            ),
+            models.Index(
+                fields=['status'],
+                condition=models.Q(course_correction_notified=False),
+                name='goal_correction_pending_idx',
+            ),
+        ]
         verbose_name = 'Performance Goal'
         verbose_name_plural = 'Performance Goals'
 
@@ -177,6 +209,9 @@ class PerformanceEmailLog(models.Model):
 
     class Meta:
         ordering = ['-sent_at']
+        indexes = [
+            models.Index(fields=['sent_at', 'status'], name='performance_log_sent_idx'),
+        ]
         verbose_name = 'Performance Email Log'
         verbose_name_plural = 'Performance Email Logs'
 
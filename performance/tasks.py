@@ -1,10 +1,19 @@
+from datetime import datetime
+
 from celery import shared_task
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
+from django.db.models import Q
 from django.utils import timezone
 
 from django.contrib.auth.models import User
 
+from holidays.workdays import get_calendar
+from notifications.delivery import EmailBatch, build_email, html_email, send_email
+from notifications.fanout import fan_out
+from notifications.idempotency import Claim, notification_key, run_token
+from notifications.logbuffer import write_log
+from notifications.outbox import enqueue
+from notifications.rendering import render
+
 from .models import (
     PerformanceReviewCycle,
     PerformanceReview,
@@ -17,7 +26,7 @@ EMAIL_FROM = 'noreply@emailintegration.com'
 
 
 def _log_email(email_type, subject, recipients, status='sent', cycle=None, review=None, goal=None, error_message=''):
-    PerformanceEmailLog.objects.create(
+    write_log(PerformanceEmailLog(
         email_type=email_type,
         subject=subject,
         recipient_list=', '.join(recipients),
@@ -26,31 +35,53 @@ def _log_email(email_type, subject, recipients, status='sent', cycle=None, revie
         cycle=cycle,
         review=review,
         goal=goal,
-    )
+    ))
 
 
-def _send_email(subject, template, context, recipients, email_type, cycle=None, review=None, goal=None, attachments=None):
+def _send_email(subject, template, context, recipients, email_type, cycle=None, review=None, goal=None, attachments=None, batch=None, html=None, key=None):
     if not recipients:
         return
-    html_message = render_to_string(template, context)
-    email = EmailMessage(
-        subject=subject,
-        body=html_message,
-        from_email=EMAIL_FROM,
-        to=recipients,
-    )
-    email.content_subtype = 'html'
-    attachments = attachments or []
-    for attachment in attachments:
-        if attachment:
-            email.attach_file(attachment)
+    if html is None:
+        email = build_email(subject, template, context, recipients, from_email=EMAIL_FROM, attachments=attachments)
+    else:
+        email = html_email(subject, html, recipients, from_email=EMAIL_FROM, attachments=attachments)
 
-    try:
-        email.send(fail_silently=False)
+    def on_sent():
         _log_email(email_type, subject, recipients, cycle=cycle, review=review, goal=goal)
-    except Exception as exc:
+
+    def on_failed(exc):
         _log_email(email_type, subject, recipients, status='failed', cycle=cycle, review=review, goal=goal, error_message=str(exc))
 
+    if batch is not None:
+        batch.add(email, on_sent=on_sent, on_failed=on_failed, key=key)
+        return
+
+    try:
+        send_email(email)
+        on_sent()
+    except Exception as exc:
+        on_failed(exc)
+
+
+def _queue_email(subject, template, context, recipients, email_type, cycle=None, review=None, goal=None, attachments=None):
+    """Write the email to the outbox; the dispatcher logs it once delivered."""
+    if not recipients:
+        return
+    email = build_email(subject, template, context, recipients, from_email=EMAIL_FROM)
+    enqueue(
+        email,
+        email_type,
+        log_model=PerformanceEmailLog,
+        log_fields={
+            'subject': subject,
+            'recipient_list': ', '.join(recipients),
+            'cycle_id': cycle.id if cycle else None,
+            'review_id': review.id if review else None,
+            'goal_id': goal.id if goal else None,
+        },
+        attachments=attachments,
+    )
+
 
 def _cycle_recipients(cycle):
     return [
@@ -60,19 +91,13 @@ def _cycle_recipients(cycle):
     ]
 
 
-@shared_task
-def launch_cycle_emails(cycle_id):
-    """Send announcement, self-assessment link, and guidelines when a cycle is created."""
-    try:
-        cycle = PerformanceReviewCycle.objects.get(id=cycle_id)
-    except PerformanceReviewCycle.DoesNotExist:
-        return
-
+def queue_cycle_launch_emails(cycle):
+    """Queue announcement, self-assessment link, and guidelines for a new cycle."""
     recipients = _cycle_recipients(cycle)
     context = {'cycle': cycle}
 
     if not cycle.announcement_sent:
-        _send_email(
+        _queue_email(
             subject=f"{cycle.name} Performance Review Kick-off",
             template='emails/performance/review_period_announcement.html',
             context=context,
@@ -83,7 +108,7 @@ def launch_cycle_emails(cycle_id):
         cycle.announcement_sent = True
 
     if cycle.guidelines and not cycle.guidelines_sent:
-        _send_email(
+        _queue_email(
             subject=f"{cycle.name} Review Guidelines & Criteria",
             template='emails/performance/guidelines_email.html',
             context=context,
@@ -94,7 +119,7 @@ def launch_cycle_emails(cycle_id):
         cycle.guidelines_sent = True
 
     if cycle.self_assessment_link and not cycle.self_assessment_sent:
-        _send_email(
+        _queue_email(
             subject=f"{cycle.name} Self-Assessment Form",
             template='emails/performance/self_assessment_link.html',
             context=context,
@@ -108,217 +133,286 @@ def launch_cycle_emails(cycle_id):
 
 
 @shared_task
-def process_review_notifications():
-    """Handle upcoming notifications, reminders, overdue alerts, and completion emails."""
-    today = timezone.now().date()
-    cycles = PerformanceReviewCycle.objects.all()
+def launch_cycle_emails(cycle_id):
+    """Send announcement, self-assessment link, and guidelines when a cycle is created."""
+    try:
+        cycle = PerformanceReviewCycle.objects.get(id=cycle_id)
+    except PerformanceReviewCycle.DoesNotExist:
+        return
 
-    for cycle in cycles:
-        days_until_start = (cycle.start_date - today).days
-        recipients = _cycle_recipients(cycle)
-        context = {'cycle': cycle}
+    queue_cycle_launch_emails(cycle)
 
-        if days_until_start == 14 and not cycle.upcoming_notification_sent:
-            _send_email(
-                subject=f"{cycle.name} Review Period Starts Soon",
-                template='emails/performance/upcoming_review_notification.html',
-                context=context,
-                recipients=recipients,
-                email_type='upcoming',
-                cycle=cycle,
-            )
-            cycle.upcoming_notification_sent = True
 
-        if today == cycle.submission_deadline and not cycle.self_assessment_sent and cycle.self_assessment_link:
-            _send_email(
-                subject=f"{cycle.name} Submission Deadline Today",
-                template='emails/performance/submission_deadline_notice.html',
-                context=context,
-                recipients=recipients,
-                email_type='self_assessment',
-                cycle=cycle,
-            )
-            cycle.self_assessment_sent = True
+def due_for_notification(today):
+    """One filter per kind of pending review notification, each answerable from an index."""
+    # Deadlines 7, 3 or 1 working days away, counted on the holiday calendar
+    calendar = get_calendar()
+    return [
+        Q(
+            self_assessment_submitted=False,
+            submission_deadline__in=[deadline for days in (7, 3, 1) for deadline in calendar.due_in(today, days)],
+        ),
+        Q(self_assessment_submitted=False, submission_deadline__lt=today, overdue_notice_sent=False),
+        Q(meeting_scheduled_for__isnull=False, meeting_confirmation_sent=False),
+        Q(summary_shared=False) & ~Q(review_summary=''),
+        Q(goals_shared=False) & ~Q(goals_next_period=''),
+    ]
+
 
-        cycle.save(update_fields=['upcoming_notification_sent', 'self_assessment_sent'])
+def reviews_due_for_notification(today):
+    """Reviews with at least one notification pending today; the rest need no work."""
+    # Separate indexed lookups instead of one OR, which the database
+    # would answer by reading every review
+    ids = set()
+    for condition in due_for_notification(today):
+        ids.update(PerformanceReview.objects.filter(condition).order_by().values_list('id', flat=True))
+    return PerformanceReview.objects.filter(id__in=sorted(ids)).order_by('id')
 
-    reviews = PerformanceReview.objects.select_related('employee', 'manager', 'cycle')
 
-    for review in reviews:
-        employee_email = review.employee.email
-        manager_email = review.manager.email if review.manager and review.manager.email else None
-        recipients = [email for email in [employee_email] if email]
-        reminder_context = {'review': review, 'cycle': review.cycle, 'manager': review.manager}
+@shared_task
+def process_review_notifications():
+    """Handle upcoming notifications, reminders, overdue alerts, and completion emails."""
+    today = timezone.now().date()
+    cycles = PerformanceReviewCycle.objects.all()
 
-        if not review.self_assessment_submitted:
-            days = review.days_until_deadline
+    with EmailBatch() as batch:
+        for cycle in cycles:
+            days_until_start = (cycle.start_date - today).days
+            recipients = _cycle_recipients(cycle)
+            context = {'cycle': cycle}
 
-            if days == 7 and not review.reminder_7_sent:
+            if days_until_start == 14 and not cycle.upcoming_notification_sent:
                 _send_email(
-                    subject='Performance Review Reminder: 7 Days Left',
-                    template='emails/performance/reminder_7_days.html',
-                    context=reminder_context,
+                    subject=f"{cycle.name} Review Period Starts Soon",
+                    template='emails/performance/upcoming_review_notification.html',
+                    context=context,
                     recipients=recipients,
-                    email_type='reminder_7',
-                    review=review,
+                    email_type='upcoming',
+                    cycle=cycle,
+                    batch=batch,
                 )
-                review.reminder_7_sent = True
+                cycle.upcoming_notification_sent = True
 
-            if days == 3 and not review.reminder_3_sent:
+            if today == cycle.submission_deadline and not cycle.self_assessment_sent and cycle.self_assessment_link:
                 _send_email(
-                    subject='Performance Review Reminder: 3 Days Left',
-                    template='emails/performance/reminder_3_days.html',
-                    context=reminder_context,
+                    subject=f"{cycle.name} Submission Deadline Today",
+                    template='emails/performance/submission_deadline_notice.html',
+                    context=context,
                     recipients=recipients,
-                    email_type='reminder_3',
+                    email_type='self_assessment',
+                    cycle=cycle,
+                    batch=batch,
+                )
+                cycle.self_assessment_sent = True
+
+            cycle.save(update_fields=['upcoming_notification_sent', 'self_assessment_sent'])
+
+        reviews = reviews_due_for_notification(today).select_related('employee', 'manager', 'cycle')
+
+        for review in reviews:
+            employee_email = review.employee.email
+            manager_email = review.manager.email if review.manager and review.manager.email else None
+            recipients = [email for email in [employee_email] if email]
+            reminder_context = {'review': review, 'cycle': review.cycle, 'manager': review.manager}
+
+            if not review.self_assessment_submitted:
+                days = review.days_until_deadline
+                working_days_left = review.working_days_until_deadline
+
+                if working_days_left == 7 and not review.reminder_7_sent:
+                    _send_email(
+                        subject='Performance Review Reminder: 7 Days Left',
+                        template='emails/performance/reminder_7_days.html',
+                        context=reminder_context,
+                        recipients=recipients,
+                        email_type='reminder_7',
+                        review=review,
+                        batch=batch,
+                    )
+                    review.reminder_7_sent = True
+
+                if working_days_left == 3 and not review.reminder_3_sent:
+                    _send_email(
+                        subject='Performance Review Reminder: 3 Days Left',
+                        template='emails/performance/reminder_3_days.html',
+                        context=reminder_context,
+                        recipients=recipients,
+                        email_type='reminder_3',
+                        review=review,
+                        batch=batch,
+                    )
+                    review.reminder_3_sent = True
+
+                if working_days_left == 1 and not review.reminder_1_sent:
+                    _send_email(
+                        subject='Urgent: Performance Review Due Tomorrow',
+                        template='emails/performance/reminder_1_day.html',
+                        context=reminder_context,
+                        recipients=recipients,
+                        email_type='reminder_1',
+                        review=review,
+                        batch=batch,
+                    )
+                    review.reminder_1_sent = True
+
+                if days < 0 and not review.overdue_notice_sent:
+                    _send_email(
+                        subject='Performance Review Overdue',
+                        template='emails/performance/overdue_notification.html',
+                        context=reminder_context,
+                        recipients=recipients,
+                        email_type='overdue',
+                        review=review,
+                        batch=batch,
+                    )
+                    review.overdue_notice_sent = True
+                    review.status = 'overdue'
+
+            if review.meeting_scheduled_for and not review.meeting_confirmation_sent:
+                meeting_recipients = [email for email in [employee_email, manager_email] if email]
+                _send_email(
+                    subject='Performance Review Meeting Scheduled',
+                    template='emails/performance/meeting_confirmation.html',
+                    context=reminder_context,
+                    recipients=meeting_recipients,
+                    email_type='meeting_confirmation',
                     review=review,
+                    batch=batch,
                 )
-                review.reminder_3_sent = True
+                review.meeting_confirmation_sent = True
+                review.status = 'meeting'
 
-            if days == 1 and not review.reminder_1_sent:
+            if review.review_summary and not review.summary_shared:
+                summary_recipients = [email for email in [employee_email, manager_email] if email]
                 _send_email(
-                    subject='Urgent: Performance Review Due Tomorrow',
-                    template='emails/performance/reminder_1_day.html',
+                    subject='Performance Review Summary',
+                    template='emails/performance/review_summary.html',
                     context=reminder_context,
-                    recipients=recipients,
-                    email_type='reminder_1',
+                    recipients=summary_recipients,
+                    email_type='review_summary',
                     review=review,
+                    batch=batch,
                 )
-                review.reminder_1_sent = True
+                review.summary_shared = True
 
-            if days < 0 and not review.overdue_notice_sent:
+            if review.goals_next_period and not review.goals_shared:
+                goals_recipients = [email for email in [employee_email, manager_email] if email]
                 _send_email(
-                    subject='Performance Review Overdue',
-                    template='emails/performance/overdue_notification.html',
+                    subject='Goals for Next Review Period',
+                    template='emails/performance/goal_setting_next_period.html',
                     context=reminder_context,
-                    recipients=recipients,
-                    email_type='overdue',
+                    recipients=goals_recipients,
+                    email_type='goal_setting',
                     review=review,
+                    batch=batch,
                 )
-                review.overdue_notice_sent = True
-                review.status = 'overdue'
-
-        if review.meeting_scheduled_for and not review.meeting_confirmation_sent:
-            meeting_recipients = [email for email in [employee_email, manager_email] if email]
-            _send_email(
-                subject='Performance Review Meeting Scheduled',
-                template='emails/performance/meeting_confirmation.html',
-                context=reminder_context,
-                recipients=meeting_recipients,
-                email_type='meeting_confirmation',
-                review=review,
+                review.goals_shared = True
+
+            review.save(
+                update_fields=[
+                    'reminder_7_sent',
+                    'reminder_3_sent',
+                    'reminder_1_sent',
+                    'overdue_notice_sent',
+                    'status',
+                    'meeting_confirmation_sent',
+                    'summary_shared',
+                    'goals_shared',
+                ]
             )
-            review.meeting_confirmation_sent = True
-            review.status = 'meeting'
-
-        if review.review_summary and not review.summary_shared:
-            summary_recipients = [email for email in [employee_email, manager_email] if email]
-            _send_email(
-                subject='Performance Review Summary',
-                template='emails/performance/review_summary.html',
-                context=reminder_context,
-                recipients=summary_recipients,
-                email_type='review_summary',
-                review=review,
-            )
-            review.summary_shared = True
-
-        if review.goals_next_period and not review.goals_shared:
-            goals_recipients = [email for email in [employee_email, manager_email] if email]
-            _send_email(
-                subject='Goals for Next Review Period',
-                template='emails/performance/goal_setting_next_period.html',
-                context=reminder_context,
-                recipients=goals_recipients,
-                email_type='goal_setting',
-                review=review,
-            )
-            review.goals_shared = True
-
-        review.save(
-            update_fields=[
-                'reminder_7_sent',
-                'reminder_3_sent',
-                'reminder_1_sent',
-                'overdue_notice_sent',
-                'status',
-                'meeting_confirmation_sent',
-                'summary_shared',
-                'goals_shared',
-            ]
-        )
 
 
 @shared_task
 def process_goal_notifications():
     """Send goal achievement or course correction emails based on status."""
-    goals = PerformanceGoal.objects.select_related('review', 'review__employee', 'review__manager', 'review__cycle')
+    goals = PerformanceGoal.objects.filter(
+        Q(status='completed', achievement_notified=False) | Q(status='off_track', course_correction_notified=False)
+    ).select_related('review', 'review__employee', 'review__manager', 'review__cycle')
+
+    with EmailBatch() as batch:
+        for goal in goals:
+            review = goal.review
+            employee_email = review.employee.email
+            manager_email = review.manager.email if review.manager and review.manager.email else None
+            recipients = [email for email in [employee_email, manager_email] if email]
+            context = {'goal': goal, 'review': review}
+
+            if goal.status == 'completed' and not goal.achievement_notified:
+                _send_email(
+                    subject=f"Goal Achieved: {goal.title}",
+                    template='emails/performance/goal_achievement.html',
+                    context=context,
+                    recipients=recipients,
+                    email_type='goal_achievement',
+                    review=review,
+                    goal=goal,
+                    batch=batch,
+                )
+                goal.achievement_notified = True
 
-    for goal in goals:
-        review = goal.review
-        employee_email = review.employee.email
-        manager_email = review.manager.email if review.manager and review.manager.email else None
-        recipients = [email for email in [employee_email, manager_email] if email]
-        context = {'goal': goal, 'review': review}
+            if goal.status == 'off_track' and not goal.course_correction_notified:
+                _send_email(
+                    subject=f"Course Correction Needed: {goal.title}",
+                    template='emails/performance/course_correction.html',
+                    context=context,
+                    recipients=recipients,
+                    email_type='course_correction',
+                    review=review,
+                    goal=goal,
+                    batch=batch,
+                )
+                goal.course_correction_notified = True
 
-        if goal.status == 'completed' and not goal.achievement_notified:
-            _send_email(
-                subject=f"Goal Achieved: {goal.title}",
-                template='emails/performance/goal_achievement.html',
-                context=context,
-                recipients=recipients,
-                email_type='goal_achievement',
-                review=review,
-                goal=goal,
-            )
-            goal.achievement_notified = True
+            goal.save(update_fields=['achievement_notified', 'course_correction_notified'])
 
-        if goal.status == 'off_track' and not goal.course_correction_notified:
-            _send_email(
-                subject=f"Course Correction Needed: {goal.title}",
-                template='emails/performance/course_correction.html',
-                context=context,
-                recipients=recipients,
-                email_type='course_correction',
-                review=review,
-                goal=goal,
-            )
-            goal.course_correction_notified = True
 
-        goal.save(update_fields=['achievement_notified', 'course_correction_notified'])
+def reviews_in_progress():
+    return PerformanceReview.objects.filter(status__in=['pending', 'submitted', 'review'])
 
 
 @shared_task
 def send_quarterly_goal_reminders():
     """Quarterly nudge for teams to update goal progress."""
-    now = timezone.now()
-    reviews = PerformanceReview.objects.filter(status__in=['pending', 'submitted', 'review']).select_related(
+    return fan_out(send_quarterly_goal_reminders_chunk, reviews_in_progress(), timezone.now().isoformat())
+
+
+@shared_task(bind=True)
+def send_quarterly_goal_reminders_chunk(self, first_id, last_id, sent_at):
+    """Quarterly goal reminders for one range of review ids."""
+    now = datetime.fromisoformat(sent_at)
+    quarter = f'{now.year}Q{(now.month - 1) // 3 + 1}'
+    reviews = reviews_in_progress().filter(id__range=(first_id, last_id)).select_related(
         'employee', 'manager', 'cycle'
     )
-
-    for review in reviews:
-        recipients = [email for email in [review.employee.email, review.manager.email if review.manager else None] if email]
-        context = {'review': review, 'cycle': review.cycle}
-        _send_email(
-            subject='Quarterly Goal Progress Reminder',
-            template='emails/performance/goal_quarterly_reminder.html',
-            context=context,
-            recipients=recipients,
-            email_type='goal_quarter',
-            review=review,
-        )
-        review.last_quarterly_goal_reminder = now
-        review.save(update_fields=['last_quarterly_goal_reminder'])
+    by_key = {notification_key('goal_quarter', review.id, quarter): review for review in reviews}
+
+    # The reminder only names the cycle, so each cycle's copy is rendered once
+    rendered = {}
+
+    with Claim(by_key, run_token(self)) as claim, EmailBatch(claim=claim) as batch:
+        for key in claim:
+            review = by_key[key]
+            recipients = [email for email in [review.employee.email, review.manager.email if review.manager else None] if email]
+            context = {'review': review, 'cycle': review.cycle}
+            if review.cycle_id not in rendered:
+                rendered[review.cycle_id] = render('emails/performance/goal_quarterly_reminder.html', context)
+            _send_email(
+                subject='Quarterly Goal Progress Reminder',
+                template='emails/performance/goal_quarterly_reminder.html',
+                context=context,
+                recipients=recipients,
+                email_type='goal_quarter',
+                review=review,
+                batch=batch,
+                html=rendered[review.cycle_id],
+                key=key,
+            )
+        PerformanceReview.objects.filter(id__in=[by_key[key].id for key in claim]).update(last_quarterly_goal_reminder=now)
+    return {'sent': batch.sent, 'failed': batch.failed}
 
 
-@shared_task
-def send_appreciation_email_task(record_id):
-    """Send appreciation email with optional badge attachment."""
-    try:
-        record = AppreciationRecord.objects.select_related('employee', 'manager').get(id=record_id)
-    except AppreciationRecord.DoesNotExist:
-        return
-
+def queue_appreciation_email(record):
+    """Queue appreciation email with optional badge attachment."""
     recipients = [record.employee.email] if record.employee.email else []
     cc_recipients = []
 
@@ -334,11 +428,22 @@ def send_appreciation_email_task(record_id):
     context = {'record': record, 'manager': record.manager}
     attachments = [record.badge_attachment.path] if record.badge_attachment else []
 
-    _send_email(
+    _queue_email(
         subject=record.subject,
         template='emails/performance/appreciation_email.html',
         context=context,
         recipients=all_recipients,
         email_type='appreciation',
+        attachments=attachments,
     )
 
+
+@shared_task
+def send_appreciation_email_task(record_id):
+    """Send appreciation email with optional badge attachment."""
+    try:
+        record = AppreciationRecord.objects.select_related('employee', 'manager').get(id=record_id)
+    except AppreciationRecord.DoesNotExist:
+        return
+
+    queue_appreciation_email(record)
@@ -1,6 +1,7 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.shortcuts import redirect, render, get_object_or_404
 from django.utils import timezone
 from django.http import HttpResponseForbidden
@@ -8,7 +9,7 @@ from django.http import HttpResponseForbidden
 from users.models import UserRole
 from .forms import PerformanceReviewCycleForm, AppreciationEmailForm, SelfAssessmentSubmissionForm
 from .models import PerformanceReviewCycle, PerformanceReview
-from .tasks import launch_cycle_emails, send_appreciation_email_task
+from .tasks import queue_cycle_launch_emails, queue_appreciation_email
 
 
 def _get_user_role(user):
@@ -60,27 +61,29 @@ def create_review_cycle(request):
     if request.method == 'POST':
         form = PerformanceReviewCycleForm(request.POST)
         if form.is_valid():
-            cycle = form.save(commit=False)
-            cycle.created_by = request.user
-            cycle.save()
-
-            employees = User.objects.filter(role_profile__role='employee').select_related('role_profile')
-            review_objects = []
-            for employee in employees:
-                role_profile = getattr(employee, 'role_profile', None)
-                manager = role_profile.manager if role_profile else None
-                review_objects.append(
-                    PerformanceReview(
-                        cycle=cycle,
-                        employee=employee,
-                        manager=manager,
-                        submission_deadline=cycle.submission_deadline,
+            with transaction.atomic():
+                cycle = form.save(commit=False)
+                cycle.created_by = request.user
+                cycle.save()
+
+                employees = User.objects.filter(role_profile__role='employee').select_related('role_profile')
+                review_objects = []
+                for employee in employees:
+                    role_profile = getattr(employee, 'role_profile', None)
+                    manager = role_profile.manager if role_profile else None
+                    review_objects.append(
+                        PerformanceReview(
+                            cycle=cycle,
+                            employee=employee,
+                            manager=manager,
+                            submission_deadline=cycle.submission_deadline,
+                        )
                     )
-                )
-            if review_objects:
-                PerformanceReview.objects.bulk_create(review_objects, ignore_conflicts=True)
+                if review_objects:
+                    PerformanceReview.objects.bulk_create(review_objects, ignore_conflicts=True)
+
+                queue_cycle_launch_emails(cycle)
 
-            launch_cycle_emails.delay(cycle.id)
             messages.success(request, 'Review cycle created and announcement emails queued.')
             return redirect('performance_dashboard')
     else:
@@ -115,10 +118,11 @@ def send_appreciation(request):
     form = AppreciationEmailForm(request.POST, request.FILES)
     form.fields['employee'].queryset = employee_queryset
     if form.is_valid():
-        record = form.save(commit=False)
-        record.manager = request.user
-        record.save()
-        send_appreciation_email_task.delay(record.id)
+        with transaction.atomic():
+            record = form.save(commit=False)
+            record.manager = request.user
+            record.save()
+            queue_appreciation_email(record)
         messages.success(request, 'Appreciation email queued successfully.')
         return redirect('performance_dashboard')
 
@@ -0,0 +1,147 @@
+"""
+Move expired rows into gzip NDJSON archives and read them back.
+
+Archives live under ``RETENTION_ARCHIVE_ROOT`` as one file per model and
+month of the policy's date field::
+
+    <root>/attendance.attendanceemaillog/2024/2024-03.ndjson.gz
+
+Rows move in batches of ``RETENTION_BATCH_SIZE``: each batch is appended to
+its month files as a new gzip member and synced to disk, then deleted in its
+own short transaction, with ``RETENTION_BATCH_PAUSE`` seconds between
+batches so other writers get the table. A crash between the two steps leaves
+the batch in both places; the next run archives it again and ``read_archive``
+drops the duplicates by primary key.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def _root():
+    return Path(getattr(settings, 'RETENTION_ARCHIVE_ROOT', Path(settings.BASE_DIR) / 'archive'))
+
+
+def _batch_size():
+    return getattr(settings, 'RETENTION_BATCH_SIZE', 1000)
+
+
+def _batch_pause():
+    return getattr(settings, 'RETENTION_BATCH_PAUSE', 0.1)
+
+
+def archive_path(label, year, month):
+    return _root() / label.lower() / f'{year:04d}' / f'{year:04d}-{month:02d}.ndjson.gz'
+
+
+def _append(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+            for row in rows:
+                archive.write(json.dumps(row, cls=DjangoJSONEncoder).encode() + b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive_policy(policy, today=None, dry_run=False):
+    """Archive and delete every expired row for ``policy``; return how many rows moved"""
+    if not policy.months:
+        return 0
+    model = policy.model
+    expired = policy.expired(today)
+    if dry_run:
+        return expired.count()
+
+    fields = [field.attname for field in model._meta.concrete_fields]
+    date_attname = model._meta.get_field(policy.date_field).attname
+    batch_size = _batch_size()
+    moved = 0
+    while True:
+        rows = list(expired.values(*fields)[:batch_size])
+        if not rows:
+            break
+
+        by_month = {}
+        for row in rows:
+            moment = row[date_attname]
+            by_month.setdefault((moment.year, moment.month), []).append(row)
+        for (year, month), month_rows in sorted(by_month.items()):
+            _append(archive_path(policy.label, year, month), month_rows)
+
+        with transaction.atomic():
+            model._default_manager.filter(pk__in=[row[model._meta.pk.attname] for row in rows]).delete()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+        time.sleep(_batch_pause())
+    return moved
+
+
+def _months(start, end):
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _as_date(value):
+    if value is None:
+        return None
+    parsed = parse_datetime(value)
+    return parsed.date() if parsed else parse_date(value)
+
+
+def archived_months(label):
+    """``[(year, month), ...]`` that have an archive file for ``label``"""
+    folder = _root() / label.lower()
+    months = []
+    for path in folder.glob('*/*.ndjson.gz'):
+        year, month = path.name[:7].split('-')
+        months.append((int(year), int(month)))
+    return sorted(months)
+
+
+def read_archive(policy, start=None, end=None, **filters):
+    """
+    Yield archived rows of ``policy``'s model as dicts, oldest month first.
+
+    ``start``/``end`` (dates, inclusive) limit the policy's date field and
+    pick which month files are opened at all; ``filters`` are exact matches
+    on stored values, e.g. ``employee_id=5`` or ``status='failed'``. Values
+    come back as they were serialised: dates and times as ISO strings.
+    """
+    months = archived_months(policy.label)
+    if not months:
+        return
+    first = start or date(*months[0], 1)
+    last = end or date(*months[-1], 1)
+    model = policy.model
+    date_attname = model._meta.get_field(policy.date_field).attname
+    pk_attname = model._meta.pk.attname
+
+    seen = set()
+    for year, month in _months(first, last):
+        path = archive_path(policy.label, year, month)
+        if not path.exists():
+            continue
+        with gzip.open(path, 'rt') as archive:
+            for line in archive:
+                row = json.loads(line)
+                if row[pk_attname] in seen:
+                    continue
+                seen.add(row[pk_attname])
+                day = _as_date(row[date_attname])
+                if (start and day < start) or (end and day > end):
+                    continue
+                if any(row.get(field) != value for field, value in filters.items()):
+                    continue
+                yield row
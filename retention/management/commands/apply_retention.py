@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from retention.archive import archive_policy
+from retention.policies import POLICIES, get_policy
+
+
+class Command(BaseCommand):
+    help = 'Move rows older than each retention policy into gzip NDJSON archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', help='Only this model, e.g. attendance.AttendanceEmailLog (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Count what would be archived without moving anything')
+
+    def handle(self, *args, **options):
+        try:
+            policies = [get_policy(label) for label in options['model']] if options['model'] else POLICIES
+        except LookupError as e:
+            raise CommandError(e)
+
+        for policy in policies:
+            if not policy.months:
+                self.stdout.write(f'{policy.label}: kept indefinitely (no RETENTION_MONTHS entry)')
+                continue
+            count = archive_policy(policy, dry_run=options['dry_run'])
+            verb = 'would archive' if options['dry_run'] else 'archived'
+            self.stdout.write(f'{policy.label}: {verb} {count} rows dated before {policy.cutoff()}')
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('✓ Retention applied'))
@@ -0,0 +1,43 @@
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from retention.archive import read_archive
+from retention.policies import get_policy
+
+
+class Command(BaseCommand):
+    help = 'Print archived rows of a model as NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='Model label, e.g. attendance.AttendanceRecord')
+        parser.add_argument('--start', type=date.fromisoformat, help='First date to include')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last date to include')
+        parser.add_argument('--where', action='append', default=[], metavar='FIELD=VALUE',
+                            help='Exact match on a stored value, e.g. employee_id=5 (repeatable)')
+        parser.add_argument('--count', action='store_true', help='Print only the number of matching rows')
+
+    def handle(self, *args, **options):
+        try:
+            policy = get_policy(options['model'])
+        except LookupError as e:
+            raise CommandError(e)
+
+        filters = {}
+        for condition in options['where']:
+            field, sep, value = condition.partition('=')
+            if not sep:
+                raise CommandError(f'--where expects FIELD=VALUE, got {condition!r}')
+            # Numbers, booleans and null as JSON; anything else is a string
+            try:
+                filters[field] = json.loads(value)
+            except ValueError:
+                filters[field] = value
+
+        rows = read_archive(policy, start=options['start'], end=options['end'], **filters)
+        if options['count']:
+            self.stdout.write(str(sum(1 for _ in rows)))
+            return
+        for row in rows:
+            self.stdout.write(json.dumps(row))
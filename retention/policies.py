@@ -0,0 +1,70 @@
+"""
+What retention archives, and after how long.
+
+A policy names a model and the date field that ages its rows; how many
+months of rows stay in the database comes from ``RETENTION_MONTHS``, so a
+model missing there (or set to 0) is never archived.
+"""
+from datetime import date, datetime, time
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import DateTimeField, Q
+from django.utils import timezone
+
+
+class Policy:
+    def __init__(self, label, date_field, condition=None):
+        self.label = label
+        self.date_field = date_field
+        # Only rows matching ``condition`` are ever archived
+        self.condition = condition
+
+    def __repr__(self):
+        return f'Policy({self.label!r})'
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    @property
+    def months(self):
+        return getattr(settings, 'RETENTION_MONTHS', {}).get(self.label, 0)
+
+    def cutoff(self, today=None):
+        """First day of the month ``months`` before today's; rows dated before it are archived"""
+        today = today or date.today()
+        index = today.year * 12 + today.month - 1 - self.months
+        return date(index // 12, index % 12 + 1, 1)
+
+    def expired(self, today=None):
+        """Queryset of rows past the policy's cutoff, oldest first"""
+        cutoff = self.cutoff(today)
+        if isinstance(self.model._meta.get_field(self.date_field), DateTimeField):
+            cutoff = timezone.make_aware(datetime.combine(cutoff, time.min))
+        rows = self.model._default_manager.filter(**{f'{self.date_field}__lt': cutoff})
+        if self.condition is not None:
+            rows = rows.filter(self.condition)
+        return rows.order_by(self.date_field, 'pk')
+
+
+POLICIES = [
+    Policy('attendance.AttendanceRecord', 'attendance_date'),
+    Policy('attendance.AttendanceEmailLog', 'sent_at'),
+    Policy('leave.LeaveEmailLog', 'sent_at'),
+    Policy('onboarding.OnboardingEmailLog', 'sent_at'),
+    Policy('performance.PerformanceEmailLog', 'sent_at'),
+    Policy('notifications.EmailDeliveryLog', 'sent_at'),
+    # Pending and in-flight outbox rows are live work, never history
+    Policy('notifications.OutboundEmail', 'available_at', Q(status__in=['sent', 'failed'])),
+    Policy('monitoring.TaskRunMetric', 'started_at'),
+    # Keys only need to outlive the period they deduplicate (at most a quarter)
+    Policy('notifications.NotificationKey', 'claimed_at'),
+]
+
+
+def get_policy(label):
+    for policy in POLICIES:
+        if policy.label.lower() == label.lower():
+            return policy
+    raise LookupError(f'No retention policy for {label}')
@@ -0,0 +1,24 @@
+import logging
+
+from celery import shared_task
+
+from .archive import archive_policy
+from .policies import POLICIES
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def apply_retention_policies():
+    """Archive rows older than each model's retention period at 2:30 AM"""
+    moved = {}
+    for policy in POLICIES:
+        try:
+            count = archive_policy(policy)
+        except Exception as e:
+            # One model's failure must not keep the others growing
+            logger.warning('Retention failed for %s: %s', policy.label, e)
+            continue
+        if count:
+            moved[policy.label] = count
+    return moved
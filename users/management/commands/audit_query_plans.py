@@ -0,0 +1,169 @@
+import re
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from attendance.models import AttendanceRecord, AttendanceEmailLog, AttendanceDailyRollup, late_threshold
+from attendance.tasks import employees_without_checkin
+from email_integration_system.pagination import KeysetPaginator
+from leave.calendar import leaves_in_window, month_window
+from leave.models import LeaveRequest, LeaveEmailLog
+from notifications.models import EmailDeliveryLog, OutboundEmail
+from onboarding.models import OnboardingEmailLog
+from performance.models import PerformanceReview, PerformanceGoal, PerformanceEmailLog
+from performance.tasks import due_for_notification
+
+
+def _next_page(queryset, ordering, boundary):
+    """Queryset for the page after ``boundary``, as the list views run it"""
+    paginator = KeysetPaginator(queryset, ordering, 20)
+    cursor = paginator.encode_cursor('after', boundary)
+    return paginator.page_queryset(cursor)[0]
+
+
+def audited_queries():
+    """
+    (label, queryset, model, ordered) for each hot query.
+
+    ``model``'s table must be reached through an index. ``ordered`` marks
+    first-page queries, which may walk an index in order under their LIMIT.
+    """
+    today = date.today()
+    now = timezone.now()
+    month_start = today.replace(day=1)
+    year_start = today.replace(month=1, day=1)
+    week_start = today - timedelta(days=today.weekday() + 7)
+
+    return [
+        # attendance tasks
+        ('Employees without a check-in', employees_without_checkin(today), AttendanceRecord),
+        ('Late check-in alert', AttendanceRecord.objects.filter(
+            attendance_date=today, check_in_time__gte=late_threshold(today)
+        ), AttendanceRecord),
+        ('Missing check-out reminder', AttendanceRecord.objects.filter(
+            attendance_date=today, check_in_time__isnull=False, check_out_time__isnull=True
+        ), AttendanceRecord),
+        ('Weekly attendance report', AttendanceRecord.objects.filter(
+            attendance_date__gte=week_start,
+            attendance_date__lte=week_start + timedelta(days=6),
+            employee__role_profile__role='employee',
+        ).select_related('employee', 'employee__role_profile__manager'), AttendanceRecord),
+        ('Monthly attendance report', AttendanceRecord.objects.filter(
+            attendance_date__gte=month_start, attendance_date__lte=today
+        ), AttendanceRecord),
+        # attendance views
+        ('Attendance report, first page', _next_page(
+            AttendanceRecord.objects.all(), ('-attendance_date', '-id'), None
+        ), AttendanceRecord, True),
+        ('Attendance report, later page', _next_page(
+            AttendanceRecord.objects.all(), ('-attendance_date', '-id'),
+            AttendanceRecord(id=1, attendance_date=year_start),
+        ), AttendanceRecord),
+        ('Attendance rollups for the year', AttendanceDailyRollup.objects.filter(
+            date__gte=year_start
+        ), AttendanceDailyRollup),
+        ('Attendance rollups for today', AttendanceDailyRollup.objects.filter(date=today), AttendanceDailyRollup),
+        # leave
+        ('Leave starting tomorrow', LeaveRequest.objects.filter(
+            status='approved', start_date=today + timedelta(days=1)
+        ), LeaveRequest),
+        ('Leave ended yesterday', LeaveRequest.objects.filter(
+            status='approved', end_date=today - timedelta(days=1)
+        ), LeaveRequest),
+        ('Pending leave on the HR dashboard', LeaveRequest.objects.filter(
+            status='pending'
+        ).order_by('-created_at')[:10], LeaveRequest),
+        ('Leave calendar for the month', leaves_in_window(
+            LeaveRequest.objects.all(), *month_window(today.year, today.month)
+        ), LeaveRequest),
+        ('Leave requests, first page', _next_page(
+            LeaveRequest.objects.all(), ('-created_at', '-id'), None
+        ), LeaveRequest, True),
+        ('Leave requests, later page', _next_page(
+            LeaveRequest.objects.all(), ('-created_at', '-id'), LeaveRequest(id=1, created_at=now),
+        ), LeaveRequest),
+        # performance
+        ('Open reviews for quarterly reminders', PerformanceReview.objects.filter(
+            status__in=['pending', 'submitted', 'review']
+        ), PerformanceReview),
+        ('Goals due a notification', PerformanceGoal.objects.filter(
+            status='completed', achievement_notified=False
+        ), PerformanceGoal),
+        # outbox and email logs
+        ('Outbox claim', OutboundEmail.objects.filter(
+            status='pending', available_at__lte=now
+        ).order_by('id'), OutboundEmail),
+        ('Outbox stale claims', OutboundEmail.objects.filter(status='sending', claimed_at__lt=now), OutboundEmail),
+        ('Email deliveries for the month', EmailDeliveryLog.objects.filter(
+            month=EmailDeliveryLog.month_key(now), source=1
+        ).values('email_type', 'status').annotate(emails=Count('id')).order_by(), EmailDeliveryLog),
+        ('Email deliveries to a user', EmailDeliveryLog.objects.filter(
+            recipient_id=1, sent_at__gte=now - timedelta(days=30)
+        ), EmailDeliveryLog),
+    ] + [
+        (f'Reviews due a notification ({number})', PerformanceReview.objects.filter(condition).order_by(), PerformanceReview)
+        for number, condition in enumerate(due_for_notification(today), start=1)
+    ] + [
+        (f'{model._meta.verbose_name_plural} since a date', model.objects.filter(
+            sent_at__gte=now - timedelta(days=30), status='failed'
+        ), model)
+        for model in (AttendanceEmailLog, LeaveEmailLog, OnboardingEmailLog, PerformanceEmailLog)
+    ]
+
+
+def full_scans(plan, model, ordered=False):
+    """Plan lines that read every row of ``model``'s table instead of seeking an index"""
+    table = re.escape(model._meta.db_table)
+    if connection.vendor != 'sqlite':
+        pattern = re.compile(rf'\bSeq Scan on {table}\b')
+        return [line.strip() for line in plan.splitlines() if pattern.search(line)]
+
+    # "SCAN t" reads the table and "SCAN t USING INDEX i" walks a whole index;
+    # "SEARCH t USING INDEX i (...)" seeks a range of one. Walking a partial
+    # index only touches the rows it was built for, and walking any index in
+    # order is how a LIMITed first page reads.
+    partial = {index.name for index in model._meta.indexes if index.condition is not None}
+    scans = []
+    for line in plan.splitlines():
+        match = re.search(rf'\bSCAN {table}\b(?: USING (?:COVERING )?INDEX (\w+))?', line)
+        if not match:
+            continue
+        index = match.group(1)
+        if index and (ordered or index in partial):
+            continue
+        scans.append(line.strip())
+    return scans
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the project's main queries and fail if any falls back to a full table scan"
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Query plan audit supports SQLite and PostgreSQL, not {connection.vendor}')
+
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Small development tables make sequential scans look cheap;
+                # only fall back to them when no index can answer the query
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for label, queryset, model, *ordered in audited_queries():
+                plan = queryset.explain()
+                scans = full_scans(plan, model, *ordered)
+                if scans:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f'✗ {label}: full scan of {model._meta.db_table}'))
+                else:
+                    self.stdout.write(f'✓ {label}')
+                if scans or options['verbosity'] > 1:
+                    self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        if failures:
+            raise CommandError(f'{len(failures)} of the audited queries scan a whole table')
+        self.stdout.write(self.style.SUCCESS('✓ Every audited query uses an index'))
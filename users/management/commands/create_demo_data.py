@@ -3,6 +3,7 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import date
 from users.models import UserRole, EmployeeProfile
+from leave import ledger
 from leave.models import LeaveType, LeaveBalance
 from onboarding.models import Onboarding, OnboardingChecklist
 
@@ -122,12 +123,8 @@ class Command(BaseCommand):
             
             # Create leave balance for each leave type
             for leave_type in LeaveType.objects.all():
-                LeaveBalance.objects.get_or_create(
-                    employee=emp_user,
-                    leave_type=leave_type,
-                    year=timezone.now().year,
-                    defaults={'total_balance': 20, 'used_balance': 0}
-                )
+                if not LeaveBalance.objects.filter(employee=emp_user, leave_type=leave_type, year=timezone.now().year).exists():
+                    ledger.accrue(emp_user, leave_type, timezone.now().year, 20, note='Annual allowance')
             
             self.stdout.write(f'✓ Employee user created: emp{i} / password123')
         
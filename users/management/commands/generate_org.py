@@ -0,0 +1,380 @@
+import math
+import random
+import time as timer
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from attendance.models import AttendanceRecord, attendance_timezone
+from attendance.rollups import rebuild
+from leave.models import LeaveType, LeaveRequest, LeaveBalance, LeaveLedgerEntry
+from performance.models import PerformanceReviewCycle, PerformanceReview, PerformanceGoal
+from users.models import UserRole, EmployeeProfile
+
+DEPARTMENTS = [
+    'Engineering', 'Sales', 'Marketing', 'Finance', 'Operations', 'Customer Support',
+    'Product', 'Legal', 'Data', 'Design', 'Security', 'Facilities',
+]
+
+FIRST_NAMES = [
+    'Aarav', 'Maya', 'Noah', 'Priya', 'Liam', 'Sofia', 'Arjun', 'Emma', 'Ravi', 'Olivia',
+    'Kabir', 'Ava', 'Ethan', 'Isha', 'Lucas', 'Mia', 'Rohan', 'Zara', 'Leo', 'Anika',
+]
+
+LAST_NAMES = [
+    'Sharma', 'Smith', 'Patel', 'Johnson', 'Khan', 'Garcia', 'Singh', 'Brown', 'Iyer', 'Miller',
+    'Das', 'Wilson', 'Rao', 'Taylor', 'Nair', 'Anderson', 'Gupta', 'Thomas', 'Mehta', 'Moore',
+]
+
+LEAVE_TYPES = [
+    ('Vacation', 'Vacation leave'),
+    ('Sick Leave', 'Sick leave for medical reasons'),
+    ('Personal Leave', 'Personal leave for emergencies'),
+]
+
+# Daily attendance outcome and its share of working days
+ATTENDANCE_MIX = [('present', 0.85), ('late', 0.08), ('absent', 0.05), ('half_day', 0.02)]
+
+GOAL_TITLES = [
+    'Ship quarterly roadmap items', 'Improve customer satisfaction', 'Mentor a new hire',
+    'Reduce open defects', 'Complete certification', 'Automate a manual process',
+]
+
+
+def chunks(iterable, size):
+    """Yield lists of up to ``size`` items without materialising ``iterable``"""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic organization (users, manager tree, attendance, leave, reviews) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=1000, help='Number of employees (excluding managers and HR)')
+        parser.add_argument('--departments', type=int, default=8, help=f'Number of departments (max {len(DEPARTMENTS)})')
+        parser.add_argument('--span', type=int, default=8, help='Direct reports per manager')
+        parser.add_argument('--years', type=int, default=2, help='Years of attendance, leave and review history')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk_create call')
+        parser.add_argument('--prefix', default='org', help='Username prefix, so several orgs can coexist')
+        parser.add_argument('--password', default='password123', help='Password shared by every generated user')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible data')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['departments'] <= len(DEPARTMENTS):
+            raise CommandError(f'--departments must be between 1 and {len(DEPARTMENTS)}')
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(f"Users with prefix '{options['prefix']}_' already exist; pick another --prefix")
+
+        self.options = options
+        self.chunk_size = options['chunk_size']
+        self.rng = random.Random(options['seed'])
+        self.today = date.today()
+        self.history_start = self.today - timedelta(days=365 * options['years'])
+
+        started = timer.perf_counter()
+        people = self._stage('Users and manager tree', self.create_people)
+        self._stage('Employee profiles and leave balances', self.create_profiles, people)
+        self._stage('Attendance history', self.create_attendance, people)
+        self._stage('Attendance rollups', self.rebuild_rollups)
+        self._stage('Leave requests', self.create_leave, people)
+        self._stage('Review cycles, reviews and goals', self.create_reviews, people)
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Organization generated in {timer.perf_counter() - started:.1f}s. '
+            f"Log in as {options['prefix']}_hr_0 / {options['password']}"
+        ))
+
+    def _stage(self, label, func, *args):
+        started = timer.perf_counter()
+        with transaction.atomic():
+            result = func(*args)
+        count = len(result) if isinstance(result, list) else result
+        self.stdout.write(f'✓ {label}: {count} rows in {timer.perf_counter() - started:.1f}s')
+        return result
+
+    def _bulk_create(self, model, objects):
+        """Insert an iterable of unsaved instances chunk by chunk; return the row count"""
+        created = 0
+        for chunk in chunks(objects, self.chunk_size):
+            model.objects.bulk_create(chunk, batch_size=self.chunk_size)
+            created += len(chunk)
+        return created
+
+    def _name(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def create_people(self):
+        """
+        Create HR, managers and employees with one shared password hash.
+
+        Each department gets a head, middle managers reporting to the head
+        and employees spread across those managers, ``--span`` per manager.
+        Returns dicts describing every person; bulk_create skips the post_save
+        signal, so roles are created here explicitly.
+        """
+        prefix = self.options['prefix']
+        span = self.options['span']
+        departments = DEPARTMENTS[:self.options['departments']]
+        password = make_password(self.options['password'])
+
+        people = []
+        for number in range(max(1, self.options['employees'] // 200)):
+            people.append({'username': f'{prefix}_hr_{number}', 'role': 'hr', 'department': 'Human Resources', 'reports_to': None})
+
+        per_department = math.ceil(self.options['employees'] / len(departments))
+        remaining = self.options['employees']
+        for department in departments:
+            headcount = min(per_department, remaining)
+            remaining -= headcount
+            if headcount <= 0:
+                break
+            slug = department.lower().replace(' ', '_')
+            head = f'{prefix}_{slug}_head'
+            people.append({'username': head, 'role': 'manager', 'department': department, 'reports_to': None})
+            managers = [
+                f'{prefix}_{slug}_mgr_{number}'
+                for number in range(max(1, math.ceil(headcount / span)))
+            ]
+            people.extend(
+                {'username': manager, 'role': 'manager', 'department': department, 'reports_to': head}
+                for manager in managers
+            )
+            people.extend(
+                {
+                    'username': f'{prefix}_{slug}_emp_{number}',
+                    'role': 'employee',
+                    'department': department,
+                    'reports_to': managers[number // span],
+                }
+                for number in range(headcount)
+            )
+
+        def users():
+            for person in people:
+                first_name, last_name = self._name()
+                yield User(
+                    username=person['username'],
+                    first_name=first_name,
+                    last_name=last_name,
+                    email=f"{person['username']}@example.com",
+                    password=password,
+                    is_staff=person['role'] == 'hr',
+                )
+
+        self._bulk_create(User, users())
+        # Re-read ids: not every backend returns primary keys from bulk_create
+        ids = dict(User.objects.filter(username__startswith=f'{prefix}_').values_list('username', 'id'))
+        for person in people:
+            person['id'] = ids[person['username']]
+            person['manager_id'] = ids.get(person['reports_to'])
+
+        self._bulk_create(UserRole, (
+            UserRole(
+                user_id=person['id'],
+                role=person['role'],
+                department=person['department'],
+                manager_id=person['manager_id'],
+            )
+            for person in people
+        ))
+        return people
+
+    def create_profiles(self, people):
+        leave_types = list(LeaveType.objects.filter(is_active=True))
+        if not leave_types:
+            leave_types = [
+                LeaveType.objects.get_or_create(name=name, defaults={'description': description})[0]
+                for name, description in LEAVE_TYPES
+            ]
+        self.leave_types = leave_types
+
+        earliest_joining = self.history_start - timedelta(days=365)
+        for person in people:
+            person['joined'] = earliest_joining + timedelta(
+                days=self.rng.randrange((self.today - earliest_joining).days - 30)
+            )
+
+        created = self._bulk_create(EmployeeProfile, (
+            EmployeeProfile(
+                user_id=person['id'],
+                employee_id=f"{self.options['prefix'].upper()}{person['id']:08d}",
+                date_of_joining=person['joined'],
+            )
+            for person in people
+        ))
+        balances = [
+            LeaveBalance(
+                employee_id=person['id'],
+                leave_type=leave_type,
+                year=self.today.year,
+                total_balance=20,
+                used_balance=self.rng.randrange(10),
+            )
+            for person in people
+            for leave_type in leave_types
+        ]
+        created += self._bulk_create(LeaveBalance, balances)
+        # Opening ledger entries that sum to each balance
+        created += self._bulk_create(LeaveLedgerEntry, (
+            LeaveLedgerEntry(
+                employee_id=balance.employee_id,
+                leave_type=balance.leave_type,
+                year=balance.year,
+                kind=kind,
+                days=days,
+                note='Opening balance',
+            )
+            for balance in balances
+            for kind, days in (('accrual', balance.total_balance), ('debit', balance.used_balance))
+            if days
+        ))
+        return created
+
+    def _attendance_times(self, day, status):
+        zone = attendance_timezone()
+        if status == 'absent':
+            return None, None
+        if status == 'half_day':
+            check_in = datetime.combine(day, time(12, 30), tzinfo=zone) + timedelta(minutes=self.rng.randrange(60))
+        elif status == 'late':
+            check_in = datetime.combine(day, time(9, 30), tzinfo=zone) + timedelta(minutes=self.rng.randrange(75))
+        else:
+            check_in = datetime.combine(day, time(8, 30), tzinfo=zone) + timedelta(minutes=self.rng.randrange(60))
+        # A few people forget to check out
+        if self.rng.random() < 0.03:
+            return check_in, None
+        check_out = datetime.combine(day, time(17, 0), tzinfo=zone) + timedelta(minutes=self.rng.randrange(120))
+        return check_in, check_out
+
+    def create_attendance(self, people):
+        """One record per person per weekday since joining, up to yesterday"""
+        statuses = [status for status, _ in ATTENDANCE_MIX]
+        weights = [weight for _, weight in ATTENDANCE_MIX]
+
+        def records():
+            for person in people:
+                day = max(self.history_start, person['joined'])
+                while day < self.today:
+                    if day.weekday() < 5:
+                        status = self.rng.choices(statuses, weights)[0]
+                        check_in, check_out = self._attendance_times(day, status)
+                        yield AttendanceRecord(
+                            employee_id=person['id'],
+                            attendance_date=day,
+                            check_in_time=check_in,
+                            check_out_time=check_out,
+                            status=status,
+                        )
+                    day += timedelta(days=1)
+
+        return self._bulk_create(AttendanceRecord, records())
+
+    def rebuild_rollups(self):
+        return rebuild(self.history_start, self.today)
+
+    def create_leave(self, people):
+        """Roughly four non-overlapping requests per person per year, past and upcoming"""
+        requests_per_person = 4 * self.options['years']
+        horizon = self.today + timedelta(days=90)
+
+        def leave_requests():
+            for person in people:
+                start = max(self.history_start, person['joined'])
+                span_days = (horizon - start).days
+                if span_days < 30:
+                    continue
+                starts = sorted(self.rng.sample(range(span_days), min(requests_per_person, span_days // 30)))
+                previous_end = None
+                for offset in starts:
+                    start_date = start + timedelta(days=offset)
+                    if previous_end and start_date <= previous_end:
+                        continue
+                    end_date = start_date + timedelta(days=self.rng.choice([0, 0, 1, 2, 4, 9]))
+                    previous_end = end_date
+                    if start_date > self.today:
+                        status = self.rng.choices(['pending', 'approved', 'rejected'], [0.5, 0.4, 0.1])[0]
+                    else:
+                        status = self.rng.choices(['approved', 'rejected', 'cancelled'], [0.85, 0.1, 0.05])[0]
+                    yield LeaveRequest(
+                        employee_id=person['id'],
+                        leave_type=self.rng.choice(self.leave_types),
+                        start_date=start_date,
+                        end_date=end_date,
+                        span_days=(end_date - start_date).days + 1,
+                        reason='Generated leave request',
+                        status=status,
+                        approved_by_id=person['manager_id'] if status == 'approved' else None,
+                        rejection_reason='Team capacity' if status == 'rejected' else '',
+                    )
+
+        return self._bulk_create(LeaveRequest, leave_requests())
+
+    def create_reviews(self, people):
+        """Half-yearly cycles with a review per person and three goals per review"""
+        hr = next(person for person in people if person['role'] == 'hr')
+        cycles = []
+        cycle_start = date(self.history_start.year, 1 if self.history_start.month <= 6 else 7, 1)
+        while cycle_start <= self.today:
+            half = 1 if cycle_start.month == 1 else 2
+            cycle_end = date(cycle_start.year, 6, 30) if half == 1 else date(cycle_start.year, 12, 31)
+            cycles.append(PerformanceReviewCycle(
+                name=f'H{half} {cycle_start.year} Review',
+                start_date=cycle_start,
+                end_date=cycle_end,
+                submission_deadline=cycle_end + timedelta(days=14),
+                created_by_id=hr['id'],
+                announcement_sent=True,
+                upcoming_notification_sent=True,
+                self_assessment_sent=cycle_end + timedelta(days=14) < self.today,
+                guidelines_sent=True,
+            ))
+            cycle_start = cycle_end + timedelta(days=1)
+        PerformanceReviewCycle.objects.bulk_create(cycles)
+        cycles = list(PerformanceReviewCycle.objects.filter(created_by_id=hr['id']).order_by('start_date'))
+
+        reviewed = [person for person in people if person['manager_id']]
+
+        def reviews():
+            for cycle in cycles:
+                closed = cycle.submission_deadline < self.today
+                for person in reviewed:
+                    if person['joined'] > cycle.end_date:
+                        continue
+                    yield PerformanceReview(
+                        cycle=cycle,
+                        employee_id=person['id'],
+                        manager_id=person['manager_id'],
+                        submission_deadline=cycle.submission_deadline,
+                        status='completed' if closed else 'pending',
+                        self_assessment_submitted=closed,
+                        review_summary='Generated review summary' if closed else '',
+                        summary_shared=closed,
+                        reminder_7_sent=closed,
+                        reminder_3_sent=closed,
+                        reminder_1_sent=closed,
+                        overdue_notice_sent=closed,
+                    )
+
+        created = len(cycles) + self._bulk_create(PerformanceReview, reviews())
+
+        def goals():
+            closed_reviews = PerformanceReview.objects.filter(cycle__in=cycles).values_list('id', 'status')
+            for review_id, status in closed_reviews.iterator(chunk_size=self.chunk_size):
+                closed = status == 'completed'
+                for title in self.rng.sample(GOAL_TITLES, 3):
+                    goal_status = self.rng.choices(['on_track', 'off_track', 'completed'], [0.6, 0.15, 0.25])[0]
+                    yield PerformanceGoal(
+                        review_id=review_id,
+                        title=title,
+                        status=goal_status,
+                        progress_percent=100 if goal_status == 'completed' else self.rng.randrange(90),
+                        achievement_notified=closed and goal_status == 'completed',
+                        course_correction_notified=closed and goal_status == 'off_track',
+                    )
+
+        return created + self._bulk_create(PerformanceGoal, goals())
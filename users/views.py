@@ -3,6 +3,7 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
+from django.db.models import Sum
 from django.utils import timezone
 from .models import UserRole, EmployeeProfile
 
@@ -202,7 +203,7 @@ def hr_dashboard(request):
     # Get all employees
     employees = User.objects.filter(role_profile__role='employee')
     
-    from attendance.models import AttendanceRecord
+    from attendance.models import AttendanceRecord, AttendanceDailyRollup
     from leave.models import LeaveRequest
     
     today = timezone.now().date()
@@ -211,8 +212,12 @@ def hr_dashboard(request):
     today_attendance = AttendanceRecord.objects.filter(
         attendance_date=today
     )
-    present_count = today_attendance.filter(status='present').count()
-    late_count = today_attendance.filter(status='late').count()
+    today_counts = AttendanceDailyRollup.objects.filter(date=today).aggregate(
+        present=Sum('present'),
+        late=Sum('late')
+    )
+    present_count = today_counts['present']
+    late_count = today_counts['late']
     
     # Get all pending leave requests
     pending_leaves = LeaveRequest.objects.filter(